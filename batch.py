@@ -0,0 +1,244 @@
+import asyncio
+import csv
+import json
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, TextIO, Tuple, Union
+
+from core import BrowserPool
+from models import PatientDetails, Session, SharedState
+
+PATIENT_FIELDS = ["family_name", "given_name", "dob", "medicare_number", "sex"]
+
+
+@dataclass
+class BatchResult:
+    """Outcome of one patient lookup on one provider"""
+
+    row: int
+    patient: str  # CLI flags for the patient, as printed in interactive mode
+    provider: Optional[str]
+    status: str  # "ok", "error", "skipped" or "invalid"
+    detail: str = ""
+    elapsed: float = 0.0
+    url: Optional[str] = None
+    screenshot_path: Optional[str] = None
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self))
+
+
+def _clean_row(row: Dict[str, object]) -> Dict[str, Optional[str]]:
+    """Keep known patient fields, trimming blanks to None"""
+    details = {}
+    for field in PATIENT_FIELDS:
+        value = row.get(field)
+        value = str(value).strip() if value is not None else ""
+        details[field] = value or None
+    if details["sex"]:
+        details["sex"] = details["sex"].upper()
+    return details
+
+
+def read_patients(
+    path: Path,
+) -> Iterator[Tuple[int, Union[PatientDetails, ValueError]]]:
+    """
+    Stream patients from a CSV (header row) or JSONL file.
+
+    Each row is validated by PatientDetails; rows that fail validation (or,
+    in JSONL, lines that are not a JSON object) are yielded as a ValueError
+    so the batch can report them and carry on. JSONL rows are numbered by
+    their line in the file.
+
+    The file is opened straight away, so a missing or unreadable file
+    raises OSError here rather than when the first row is read.
+    """
+    path = Path(path)
+    f = path.open(newline="", encoding="utf-8-sig")
+    return _read_rows(f, path.suffix.lower() in (".jsonl", ".ndjson"))
+
+
+def _read_rows(
+    f: TextIO, jsonl: bool
+) -> Iterator[Tuple[int, Union[PatientDetails, ValueError]]]:
+    with f:
+        if jsonl:
+            rows = ((n, line) for n, line in enumerate(f, start=1) if line.strip())
+        else:
+            rows = enumerate(csv.DictReader(f), start=1)
+
+        for row_number, row in rows:
+            try:
+                if isinstance(row, str):
+                    try:
+                        row = json.loads(row)
+                    except json.JSONDecodeError as e:
+                        raise ValueError(f"Invalid JSON: {e}")
+                if not isinstance(row, dict):
+                    raise ValueError(
+                        f"Expected a JSON object, not {type(row).__name__}"
+                    )
+                yield row_number, PatientDetails(**_clean_row(row))
+            except (TypeError, ValueError) as e:
+                yield row_number, ValueError(str(e))
+
+
+class BatchRunner:
+    """
+    Pushes a stream of patients through already logged-in provider sessions.
+
+    Up to ``workers`` patients are in flight at once. Each provider session
+    has a single page, so lookups on the same provider are serialised with a
+    lock while different providers search concurrently. Results are printed
+    and appended to the JSONL output as soon as each lookup completes.
+    """
+
+    def __init__(
+        self,
+        sessions: Dict[str, Session],
+        shared_state: SharedState,
+        workers: int = 2,
+        output_path: Optional[Path] = None,
+        screenshot_dir: Optional[Path] = None,
+    ):
+        self.sessions = sessions
+        self.shared_state = shared_state
+        self.workers = max(1, workers)
+        self.output_path = output_path
+        self.screenshot_dir = screenshot_dir
+        self.locks = {name: asyncio.Lock() for name in sessions}
+        self.results: List[BatchResult] = []
+
+    def emit(self, result: BatchResult) -> None:
+        """Report a finished lookup immediately"""
+        self.results.append(result)
+        label = result.provider or "-"
+        print(f"[row {result.row}] {label}: {result.status} {result.detail}".rstrip())
+        if self.output_path:
+            with self.output_path.open("a", encoding="utf-8") as f:
+                f.write(result.to_json() + "\n")
+
+    async def lookup(
+        self, row: int, patient: PatientDetails, name: str, session: Session
+    ) -> None:
+        """Search one patient on one provider and emit the result"""
+        flags = patient.to_cli_args()
+        missing = [f for f in session.required_fields if not getattr(patient, f)]
+        if missing:
+            self.emit(
+                BatchResult(
+                    row, flags, name, "skipped", f"missing {', '.join(missing)}"
+                )
+            )
+            return
+
+        async with self.locks[name]:
+            started = time.monotonic()
+            try:
+                await session.lookup(patient)
+                result = BatchResult(row, flags, name, "ok")
+                page = session.current_page
+                if page:
+                    result.url = page.url
+                    if self.screenshot_dir:
+                        slug = name.lower().replace(" ", "_")
+                        path = self.screenshot_dir / f"row{row}_{slug}.png"
+                        await page.screenshot(path=str(path), full_page=True)
+                        result.screenshot_path = str(path)
+            except Exception as e:
+                result = BatchResult(row, flags, name, "error", str(e))
+            result.elapsed = round(time.monotonic() - started, 3)
+        self.emit(result)
+
+    async def worker(self, queue: asyncio.Queue) -> None:
+        while True:
+            item = await queue.get()
+            try:
+                if item is None:
+                    return
+                row, patient = item
+                await asyncio.gather(
+                    *(
+                        self.lookup(row, patient, name, session)
+                        for name, session in self.sessions.items()
+                    )
+                )
+            finally:
+                queue.task_done()
+
+    async def run(
+        self, patients: Iterator[Tuple[int, Union[PatientDetails, ValueError]]]
+    ) -> List[BatchResult]:
+        """Feed patients to the workers with back-pressure and wait for them"""
+        if self.screenshot_dir:
+            self.screenshot_dir.mkdir(parents=True, exist_ok=True)
+
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.workers)
+        workers = [asyncio.create_task(self.worker(queue)) for _ in range(self.workers)]
+        try:
+            for row, patient in patients:
+                if self.shared_state.exit:
+                    print("Batch stopped by quit instruction")
+                    break
+                if isinstance(patient, ValueError):
+                    self.emit(BatchResult(row, "", None, "invalid", str(patient)))
+                    continue
+                await queue.put((row, patient))
+        finally:
+            for _ in workers:
+                await queue.put(None)
+            await asyncio.gather(*workers)
+        return self.results
+
+
+async def run_batch(
+    patients: Iterator[Tuple[int, Union[PatientDetails, ValueError]]],
+    session_classes: Dict[str, type],
+    shared_state: SharedState,
+    pool: BrowserPool,
+    workers: int = 2,
+    output_path: Optional[Path] = None,
+    screenshot_dir: Optional[Path] = None,
+) -> List[BatchResult]:
+    """
+    Log in to each provider once, then look up every patient.
+
+    ``patients`` comes from ``read_patients``, which opens the file up front,
+    so a bad path is reported before any login or 2FA prompt.
+    """
+    sessions: Dict[str, Session] = {}
+    for name, session_class in session_classes.items():
+        session = session_class.create(None, shared_state)
+        if session:
+            sessions[name] = session
+
+    # Logins (and any 2FA prompts) for all providers run concurrently
+    outcomes = await asyncio.gather(
+        *(session.start(pool) for session in sessions.values()),
+        return_exceptions=True,
+    )
+    for (name, session), outcome in zip(list(sessions.items()), outcomes):
+        if isinstance(outcome, BaseException):
+            print(f"{name} login failed, skipping provider: {outcome}")
+            await session.cleanup()
+            del sessions[name]
+
+    if not sessions:
+        print("No provider sessions available for batch")
+        return []
+
+    runner = BatchRunner(sessions, shared_state, workers, output_path, screenshot_dir)
+    try:
+        results = await runner.run(patients)
+        ok = sum(1 for r in results if r.status == "ok")
+        print(f"\n=== Batch Complete: {ok}/{len(results)} lookups succeeded ===")
+        if output_path:
+            print(f"Results written to {output_path}")
+        for session in sessions.values():
+            await session.save_login()
+        return results
+    finally:
+        for session in sessions.values():
+            await session.cleanup()
@@ -0,0 +1 @@
+# Offline stand-in portals and benchmark runner for the provider sessions
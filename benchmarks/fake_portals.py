@@ -0,0 +1,184 @@
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+from playwright.async_api import Route
+
+from core import BrowserPool
+
+PORTALS_DIR = Path(__file__).parent / "portals"
+
+# Provider name -> portal host the Session navigates to (and popups it opens)
+PORTAL_HOSTS: Dict[str, str] = {
+    "4Cyte": "4cyte.mocloud.com.au",
+    "IMed": "i-med.com.au",
+    "Mater Legacy": "laboratoryresults.mater.org.au",
+    "Mater Pathology": "pathresults.mater.org.au",
+    "MediTrust": "www.meditrust.com.au",
+    "Medway": "www.medway.com.au",
+    "My Health Record": "proda.humanservices.gov.au",
+    "QGov Viewer": "hpp.health.qld.gov.au",
+    "QScan": "www.qscaniq.com.au",
+    "QScript": "hp.qscript.health.qld.gov.au",
+    "QXR": "qxrpacs.com.au",
+    "SNP": "www.sonicdx.com.au",
+}
+
+CONTENT_TYPES = {
+    ".html": "text/html; charset=utf-8",
+    ".js": "application/javascript",
+    ".css": "text/css",
+    ".json": "application/json",
+    ".jpg": "image/jpeg",
+    ".png": "image/png",
+    ".woff2": "font/woff2",
+}
+
+# /assets/<name>-<size>k.<ext> returns <size> KB of filler, standing in for
+# the bundles, fonts and hero images the real portals load
+ASSET_PATTERN = re.compile(r"^/assets/[\w.-]+?-(\d+)k(\.\w+)$")
+
+
+class _PortalHandler(BaseHTTPRequestHandler):
+    server: "_PortalHTTPServer"
+
+    def log_message(self, format, *args):
+        pass  # Keep benchmark output readable
+
+    def do_GET(self):
+        time.sleep(self.server.latency)
+        host, _, path = self.path.lstrip("/").partition("/")
+        path = "/" + urlsplit(path).path
+        portal_dir = PORTALS_DIR / host
+        if not host or ".." in self.path or not portal_dir.is_dir():
+            self.send_error(404, f"No fake portal for {host}")
+            return
+
+        asset = ASSET_PATTERN.match(path)
+        if path.startswith("/api/"):
+            body, suffix = b"{}", ".json"
+        elif asset:
+            body, suffix = b"0" * (int(asset.group(1)) * 1024), asset.group(2)
+        else:
+            # Portal files first, then files shared by every portal, then the
+            # portal's single page (the page script renders steps by URL)
+            name = path.lstrip("/")
+            candidates = [portal_dir / name, PORTALS_DIR / name]
+            target = next(
+                (c for c in candidates if name and c.is_file()),
+                portal_dir / "index.html",
+            )
+            body, suffix = target.read_bytes(), target.suffix
+
+        self.send_response(200)
+        self.send_header(
+            "Content-Type", CONTENT_TYPES.get(suffix, "application/octet-stream")
+        )
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_POST = do_GET
+
+
+class _PortalHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    latency = 0.0
+
+
+class FakePortalServer:
+    """
+    Local stand-ins for the provider portals, served over HTTP.
+
+    Each portal is a single page under ``benchmarks/portals/<host>/`` that
+    reproduces the forms, popups and 2FA steps its Session drives, using the
+    same labels, placeholders and test ids. Every response is delayed by
+    ``latency`` seconds to model the round trip to a real portal.
+
+    Example:
+        ```python
+        with FakePortalServer(latency=0.05) as server:
+            server.local_url("https://qxrpacs.com.au/Portal/app")
+            # -> "http://127.0.0.1:<port>/qxrpacs.com.au/Portal/app"
+        ```
+    """
+
+    def __init__(self, latency: float = 0.05, port: int = 0):
+        self.latency = latency
+        self.port = port
+        self._server: Optional[_PortalHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def __enter__(self) -> "FakePortalServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def start(self) -> "FakePortalServer":
+        self._server = _PortalHTTPServer(("127.0.0.1", self.port), _PortalHandler)
+        self._server.latency = self.latency
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    @staticmethod
+    def serves(url: str) -> bool:
+        """True if the URL belongs to one of the fake portals"""
+        host = urlsplit(url).hostname or ""
+        return (PORTALS_DIR / host).is_dir()
+
+    def local_url(self, url: str) -> str:
+        """Map a portal URL onto the local server"""
+        parts = urlsplit(url)
+        local = f"http://127.0.0.1:{self.port}/{parts.hostname}{parts.path or '/'}"
+        return f"{local}?{parts.query}" if parts.query else local
+
+
+class FakePortalPool(BrowserPool):
+    """
+    Browser pool whose contexts talk to a FakePortalServer.
+
+    Requests for portal hosts are fetched from the local server and fulfilled
+    under their original URL, so providers see the same URLs as in
+    production. Everything else is aborted, keeping benchmarks offline.
+    Browsers run headless unless ``headless`` is False.
+    """
+
+    def __init__(self, server: FakePortalServer, headless: bool = True, **kwargs):
+        super().__init__(**kwargs)
+        self.server = server
+        self.headless = headless
+
+    async def get_browser(self, launch_options: Optional[Dict[str, Any]] = None):
+        options = {**(launch_options or {}), "headless": self.headless}
+        return await super().get_browser(options)
+
+    async def new_context(
+        self, launch_options: Optional[Dict[str, Any]] = None, **context_options
+    ):
+        context = await super().new_context(launch_options, **context_options)
+        # Registered first, so the session's routing profile sees requests
+        # before they fall back to this handler
+        await context.route("**/*", self._forward)
+        return context
+
+    async def _forward(self, route: Route) -> None:
+        url = route.request.url
+        if not self.server.serves(url):
+            await route.abort("blockedbyclient")
+            return
+        response = await route.fetch(url=self.server.local_url(url))
+        await route.fulfill(response=response)
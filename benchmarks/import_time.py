@@ -0,0 +1,107 @@
+import argparse
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+REPO_ROOT = Path(__file__).parent.parent
+
+# Loaded on first use, so none of these should be imported before the menu
+DEFERRED_MODULES = (
+    "aioconsole",
+    "cryptography",
+    "numpy",
+    "PIL",
+    "playwright",
+    "pynput",
+    "pyotp",
+    "pyperclip",
+    "sqlite3",
+)
+
+DEFAULT_BUDGET_MS = 300
+
+
+def parse_importtime(output: str, module: str) -> Tuple[Optional[float], List[str]]:
+    """
+    Milliseconds taken to import ``module`` and every module imported, from
+    ``python -X importtime`` output.
+    """
+    total_ms, loaded = None, []
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        if not cumulative.strip().isdigit():
+            continue  # Column headings
+        loaded.append(name.strip())
+        if name.rstrip() == f" {module}":  # Top level, not a nested import
+            total_ms = int(cumulative) / 1000
+    return total_ms, loaded
+
+
+def measure_import(module: str = "main") -> Tuple[float, List[str]]:
+    """Import ``module`` in a fresh interpreter and time it"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=REPO_ROOT,
+        stdin=subprocess.DEVNULL,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+    total_ms, loaded = parse_importtime(result.stderr, module)
+    if total_ms is None:
+        raise RuntimeError(f"No import time reported for {module}")
+    return total_ms, loaded
+
+
+def deferred_imports(loaded: List[str]) -> List[str]:
+    """The deferred packages among the loaded modules"""
+    return sorted({name.split(".")[0] for name in loaded} & set(DEFERRED_MODULES))
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Check that the entry point starts without slow imports"
+    )
+    parser.add_argument("--module", default="main", help="Module to import")
+    parser.add_argument(
+        "--runs", type=int, default=5, help="Fresh interpreters to time (median)"
+    )
+    parser.add_argument(
+        "--budget-ms",
+        type=float,
+        default=DEFAULT_BUDGET_MS,
+        help=f"Fail when the median import takes longer (default {DEFAULT_BUDGET_MS})",
+    )
+    args = parser.parse_args(argv)
+
+    times, loaded = [], []
+    for _ in range(args.runs):
+        total_ms, loaded = measure_import(args.module)
+        times.append(total_ms)
+    median_ms = statistics.median(times)
+    print(
+        f"import {args.module}: median {median_ms:.0f} ms over {args.runs} runs "
+        f"(min {min(times):.0f}, max {max(times):.0f}, budget {args.budget_ms:.0f})"
+    )
+
+    failures = []
+    heavy = deferred_imports(loaded)
+    if heavy:
+        failures.append(f"imported at startup: {', '.join(heavy)}")
+    if median_ms > args.budget_ms:
+        failures.append(
+            f"{median_ms:.0f} ms is over the {args.budget_ms:.0f} ms budget"
+        )
+    for failure in failures:
+        print(f"FAILED: {failure}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
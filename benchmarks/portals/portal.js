@@ -0,0 +1,46 @@
+// Step renderer shared by the fake portals.
+//
+// Each portal page holds one <template id="step-NAME"> per screen. Only the
+// current step is in the DOM, so labels and placeholders that repeat across
+// steps never match twice. Moving to a step makes a request to /api/NAME
+// first, so the configured server latency applies to every transition, as it
+// would for a real portal round trip.
+
+function render(step) {
+  const template = document.getElementById("step-" + step);
+  const app = document.getElementById("app");
+  app.replaceChildren(template.content.cloneNode(true));
+  app.dataset.step = step;
+  const focus = app.querySelector("[autofocus]");
+  if (focus) focus.focus();
+}
+
+function go(step) {
+  fetch("/api/" + step, { method: "POST" }).then(
+    () => render(step),
+    () => render(step)
+  );
+  return false;
+}
+
+// Add a step's content below the current one (dropdowns, dialogs, results)
+function reveal(step, targetId) {
+  const template = document.getElementById("step-" + step);
+  const target = document.getElementById(targetId);
+  fetch("/api/" + step, { method: "POST" }).then(
+    () => target.replaceChildren(template.content.cloneNode(true)),
+    () => target.replaceChildren(template.content.cloneNode(true))
+  );
+  return false;
+}
+
+function dismiss(targetId) {
+  document.getElementById(targetId).replaceChildren();
+  return false;
+}
+
+// Render the step for the current path or hash, e.g. {"#/login": "login"}
+function start(routes, fallback) {
+  const key = location.hash || location.pathname;
+  render(routes[key] || routes[location.pathname] || fallback);
+}
@@ -0,0 +1,187 @@
+import argparse
+import asyncio
+import importlib
+import inspect
+import json
+import tempfile
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from benchmarks.fake_portals import FakePortalPool, FakePortalServer
+from core import Tracer
+from core.tracing import print_summary, read_trace, summarise
+from models import PatientDetails, Session, SessionStage, SharedState
+
+PROVIDERS_DIR = Path(__file__).parent.parent / "providers"
+RESULTS_DIR = Path("benchmark_results")
+
+# Accepted by every fake portal; the TOTP secret only needs to be valid base32
+BENCH_CREDENTIALS = {
+    "user_name": "bench_user",
+    "user_password": "bench_pass",
+    "totp_secret": "JBSWY3DPEHPK3PXP",
+    "PIN": "1234",
+    "postcode": "4000",
+    "suburb": "- BRISBANE CITY",
+    "PRODA_full_name": "Test User",
+}
+
+BENCH_PATIENT = PatientDetails(
+    family_name="SMITH",
+    given_name="JOHN",
+    dob="01011990",
+    medicare_number="12345678901",
+    sex="M",
+)
+
+
+def discover_sessions() -> Dict[str, type]:
+    """Every concrete Session subclass in the providers package, by name"""
+    sessions = {}
+    for file_path in sorted(PROVIDERS_DIR.glob("*.py")):
+        if file_path.stem.startswith("__"):
+            continue
+        module = importlib.import_module(f"providers.{file_path.stem}")
+        for _, obj in inspect.getmembers(module, inspect.isclass):
+            if issubclass(obj, Session) and not inspect.isabstract(obj):
+                sessions[obj.name] = obj
+    return sessions
+
+
+def write_credentials(session_classes: Dict[str, type], directory: Path) -> Path:
+    path = directory / "credentials.json"
+    data = {cls.credentials_key: BENCH_CREDENTIALS for cls in session_classes.values()}
+    path.write_text(json.dumps(data))
+    return path
+
+
+async def answer_2fa(shared_state: SharedState) -> None:
+    """Deliver a code as soon as a provider asks, like an instant SMS"""
+    while True:
+        provider = await shared_state.two_fa_requests.get()
+        shared_state.set_2fa_code(provider, "123456")
+
+
+async def exit_when_searched(shared_state: SharedState, names: List[str]) -> None:
+    """Let the sessions finish once every provider has searched or failed"""
+    events = shared_state.session_events.subscribe()
+    pending = set(names)
+    while pending:
+        event = await events.get()
+        if event.stage in (SessionStage.SEARCHED, SessionStage.FAILED):
+            pending.discard(event.provider)
+    shared_state.request_exit()
+
+
+async def run_iteration(
+    session_classes: Dict[str, type],
+    pool: FakePortalPool,
+    tracer: Tracer,
+    credentials_file: Path,
+    block_resources: bool = True,
+) -> Dict[str, str]:
+    """Run every provider once, concurrently, and return any failures"""
+    shared_state = SharedState(
+        credentials_file=str(credentials_file),
+        tracer=tracer,
+        block_resources=block_resources,
+    )
+    sessions = {
+        name: cls.create(BENCH_PATIENT, shared_state)
+        for name, cls in session_classes.items()
+    }
+    watchers = [
+        asyncio.create_task(answer_2fa(shared_state)),
+        asyncio.create_task(exit_when_searched(shared_state, list(sessions))),
+    ]
+    try:
+        outcomes = await asyncio.gather(
+            *(session.run(pool) for session in sessions.values()),
+            return_exceptions=True,
+        )
+    finally:
+        for watcher in watchers:
+            watcher.cancel()
+
+    return {
+        name: f"{type(outcome).__name__}: {outcome}"
+        for name, outcome in zip(sessions, outcomes)
+        if isinstance(outcome, BaseException)
+    }
+
+
+async def run_benchmark(
+    providers: Optional[List[str]] = None,
+    iterations: int = 3,
+    latency: float = 0.05,
+    headless: bool = True,
+    block_resources: bool = True,
+    trace_file: Optional[Path] = None,
+) -> Path:
+    """Drive the real provider sessions against the fake portals"""
+    session_classes = discover_sessions()
+    if providers:
+        wanted = {p.lower() for p in providers}
+        session_classes = {
+            name: cls for name, cls in session_classes.items() if name.lower() in wanted
+        }
+    if not session_classes:
+        raise ValueError(f"No providers match {providers}")
+
+    if trace_file is None:
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        trace_file = RESULTS_DIR / f"trace-{stamp}.jsonl"
+    tracer = Tracer(trace_file)
+
+    with tempfile.TemporaryDirectory() as tmp, FakePortalServer(latency) as server:
+        credentials_file = write_credentials(session_classes, Path(tmp))
+        async with FakePortalPool(server, headless=headless) as pool:
+            for iteration in range(1, iterations + 1):
+                print(f"\n=== Benchmark iteration {iteration}/{iterations} ===")
+                failures = await run_iteration(
+                    session_classes, pool, tracer, credentials_file, block_resources
+                )
+                for name, error in failures.items():
+                    print(f"{name} failed: {error}")
+    tracer.close()
+    return trace_file
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Benchmark provider sessions against local stand-in portals"
+    )
+    parser.add_argument(
+        "--providers", nargs="+", help="Provider names to run (default: all)"
+    )
+    parser.add_argument("--iterations", type=int, default=3)
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0.05,
+        help="Seconds added to every portal response (default 0.05)",
+    )
+    parser.add_argument("--headed", action="store_true", help="Show the browsers")
+    parser.add_argument(
+        "--no-block", action="store_true", help="Disable resource blocking profiles"
+    )
+    parser.add_argument("--trace-file", type=Path, help="Where to write the spans")
+    args = parser.parse_args(argv)
+
+    trace_file = asyncio.run(
+        run_benchmark(
+            providers=args.providers,
+            iterations=args.iterations,
+            latency=args.latency,
+            headless=not args.headed,
+            block_resources=not args.no_block,
+            trace_file=args.trace_file,
+        )
+    )
+    print(f"\nTrace written to {trace_file}\n")
+    print_summary(summarise(read_trace(trace_file)))
+
+
+if __name__ == "__main__":
+    main()
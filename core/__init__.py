@@ -1,3 +1,46 @@
-from .data_collector import PageDataCollector
+from .auto_capture import AutoCapture
+from .browser_pool import BrowserPool
+from .capture_index import CaptureIndex
+from .capture_profile import (
+    CAPTURE_PROFILES,
+    DEFAULT_CAPTURE_PROFILE,
+    VIEWPORT_CAPTURE_PROFILE,
+    CaptureProfile,
+)
+from .capture_store import CaptureStore
+from .data_collector import CaptureWriter, PageDataCollector
+from .dedupe import ScreenshotDeduper
+from .dom_snapshot import DomSnapshot
+from .events import Topic
+from .har import HarArchive
+from .provider_registry import ProviderInfo, ProviderRegistry
+from .retention import RetentionManager
+from .routing import DEFAULT_ROUTING_PROFILE, RoutingProfile
+from .storage_state import StorageStateCache
+from .totp import TotpCode
+from .tracing import Tracer
 
-__all__ = ['PageDataCollector']
+__all__ = [
+    'AutoCapture',
+    'BrowserPool',
+    'CAPTURE_PROFILES',
+    'CaptureIndex',
+    'CaptureProfile',
+    'CaptureStore',
+    'CaptureWriter',
+    'DEFAULT_CAPTURE_PROFILE',
+    'DEFAULT_ROUTING_PROFILE',
+    'DomSnapshot',
+    'HarArchive',
+    'PageDataCollector',
+    'ProviderInfo',
+    'ProviderRegistry',
+    'RetentionManager',
+    'RoutingProfile',
+    'ScreenshotDeduper',
+    'StorageStateCache',
+    'Topic',
+    'TotpCode',
+    'Tracer',
+    'VIEWPORT_CAPTURE_PROFILE',
+]
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import asyncio
+from typing import TYPE_CHECKING, Callable, Dict, List, Set, Tuple
+
+from .data_collector import PageDataCollector
+
+if TYPE_CHECKING:
+    from playwright.async_api import Frame, Page
+
+
+class AutoCapture:
+    """
+    Captures pages automatically as a session moves through them.
+
+    Watched pages are captured after each main-frame navigation, and popups
+    they open are watched and captured too. Captures are debounced per page:
+    a navigation starts a ``debounce`` second timer and any further
+    navigation restarts it, so a burst of single page app route changes
+    (``Portal/app#/...``) produces one capture of where the page settled.
+    ``capture`` takes one straight away, replacing any pending capture, for
+    phase boundaries such as "logged in".
+
+    Failed captures are reported and never interrupt the session.
+
+    Example:
+        ```python
+        auto_capture = AutoCapture(PageDataCollector())
+        auto_capture.watch(page)
+        await page.goto(url)  # Captured once the page has settled
+        await auto_capture.capture(page, "login")
+        await auto_capture.close()
+        ```
+    """
+
+    def __init__(self, collector: PageDataCollector, debounce: float = 1.0):
+        """
+        Args:
+            collector: Collector the captures are written with.
+            debounce: Seconds a page must go without navigating before it is
+                      captured.
+        """
+        self.collector = collector
+        self.debounce = debounce
+        self._pending: Dict[Page, asyncio.Task] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        self._listeners: List[Tuple[Page, str, Callable]] = []
+
+    def watch(self, page: Page, task: str = "navigation") -> None:
+        """Capture the page after navigations and watch any popups it opens"""
+        if any(watched is page for watched, _, _ in self._listeners):
+            return
+
+        def on_navigated(frame: Frame) -> None:
+            if frame == page.main_frame:
+                self.schedule(page, task)
+
+        def on_popup(popup: Page) -> None:
+            self.watch(popup, "popup")
+            self.schedule(popup, "popup")
+
+        for event, listener in (("framenavigated", on_navigated), ("popup", on_popup)):
+            page.on(event, listener)
+            self._listeners.append((page, event, listener))
+
+    def schedule(self, page: Page, task: str) -> None:
+        """Capture the page once it has not navigated for ``debounce`` seconds"""
+        self._cancel_pending(page)
+        capture = asyncio.create_task(self._capture_later(page, task))
+        self._pending[page] = capture
+        self._tasks.add(capture)
+        capture.add_done_callback(self._tasks.discard)
+
+    async def capture(self, page: Page, task: str) -> None:
+        """Capture the page now, in place of any pending capture"""
+        self._cancel_pending(page)
+        await self._capture(page, task)
+
+    async def close(self) -> None:
+        """Stop watching, drop pending captures and wait for running ones"""
+        for page, event, listener in self._listeners:
+            page.remove_listener(event, listener)
+        self._listeners.clear()
+        for page in list(self._pending):
+            self._cancel_pending(page)
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def _cancel_pending(self, page: Page) -> None:
+        pending = self._pending.pop(page, None)
+        if pending:
+            pending.cancel()
+
+    async def _capture_later(self, page: Page, task: str) -> None:
+        await asyncio.sleep(self.debounce)
+        # Past the wait this capture can no longer be cancelled by a newer one
+        if self._pending.get(page) is asyncio.current_task():
+            del self._pending[page]
+        await self._capture(page, task)
+
+    async def _capture(self, page: Page, task: str) -> None:
+        if page.is_closed():
+            return
+        try:
+            await self.collector.capture_page_data(page, task=task)
+        except Exception as e:
+            print(f"Automatic {task} capture failed: {e}")
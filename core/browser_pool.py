@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+if TYPE_CHECKING:
+    from playwright.async_api import Browser, BrowserContext, Playwright
+
+DEFAULT_LAUNCH_OPTIONS: Dict[str, Any] = {"headless": False}
+
+
+class BrowserPool:
+    """
+    Shares one Playwright driver and its browsers between provider sessions.
+
+    Each session gets its own isolated BrowserContext (cookies, storage and
+    pages are not shared), but contexts are opened on a browser that is
+    launched once per distinct set of launch options. Sessions that use the
+    default options therefore all run inside a single Chromium process.
+
+    ``prewarm`` launches a browser before any session needs it and can keep
+    a number of blank contexts open on it. ``new_context`` hands those out
+    to sessions that need no extra context options, and opens a replacement
+    in the background.
+
+    Example:
+        ```python
+        async with BrowserPool() as pool:
+            prewarm = asyncio.create_task(pool.prewarm(contexts=2))
+            ...  # Provider selection, while Chromium starts
+            context = await pool.new_context({"headless": False})
+            page = await context.new_page()
+        ```
+    """
+
+    def __init__(self, playwright: Optional[Playwright] = None):
+        """
+        Args:
+            playwright: Optional running Playwright instance. When omitted the
+                pool starts (and later stops) its own driver.
+        """
+        self._playwright = playwright
+        self._owns_playwright = playwright is None
+        self._browsers: Dict[str, Browser] = {}
+        self._lock = asyncio.Lock()
+        # Blank contexts kept open per launch options key, and how many to keep
+        self._spares: Dict[str, List[BrowserContext]] = {}
+        self._spare_counts: Dict[str, int] = {}
+        self._refills: Dict[str, asyncio.Task] = {}
+
+    async def __aenter__(self) -> "BrowserPool":
+        return await self.start()
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def start(self) -> "BrowserPool":
+        """Start the Playwright driver if the pool owns it"""
+        if self._playwright is None:
+            # Imported on first use; Playwright is slow to import
+            from playwright.async_api import async_playwright
+
+            self._playwright = await async_playwright().start()
+        return self
+
+    @staticmethod
+    def _options_key(options: Dict[str, Any]) -> str:
+        return json.dumps(options, sort_keys=True, default=str)
+
+    def _launch_key(self, launch_options: Optional[Dict[str, Any]]) -> str:
+        return self._options_key({**DEFAULT_LAUNCH_OPTIONS, **(launch_options or {})})
+
+    async def prewarm(
+        self, contexts: int = 0, launch_options: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """
+        Launch the browser for these options now and keep ``contexts`` blank
+        contexts open on it for the sessions that start later.
+        """
+        self._spare_counts[self._launch_key(launch_options)] = contexts
+        await self._top_up(launch_options)
+
+    async def get_browser(
+        self, launch_options: Optional[Dict[str, Any]] = None
+    ) -> Browser:
+        """Return the shared browser for these launch options, launching it once"""
+        options = {**DEFAULT_LAUNCH_OPTIONS, **(launch_options or {})}
+        key = self._options_key(options)
+
+        async with self._lock:
+            if self._playwright is None:
+                await self.start()
+            browser = self._browsers.get(key)
+            if browser is None or not browser.is_connected():
+                browser = await self._playwright.chromium.launch(**options)
+                self._browsers[key] = browser
+                self._spares.pop(key, None)  # Opened on the browser that was lost
+        return browser
+
+    async def new_context(
+        self, launch_options: Optional[Dict[str, Any]] = None, **context_options
+    ) -> BrowserContext:
+        """Open a new isolated context on the shared browser"""
+        browser = await self.get_browser(launch_options)
+        if not context_options:
+            key = self._launch_key(launch_options)
+            spares = self._spares.get(key)
+            if spares:
+                context = spares.pop(0)
+                self._refill(key, launch_options)
+                return context
+        return await browser.new_context(**context_options)
+
+    async def _top_up(self, launch_options: Optional[Dict[str, Any]]) -> None:
+        """Open blank contexts until the spare count for these options is met"""
+        browser = await self.get_browser(launch_options)
+        key = self._launch_key(launch_options)
+        spares = self._spares.setdefault(key, [])
+        while len(spares) < self._spare_counts.get(key, 0):
+            context = await browser.new_context()
+            if self._spares.get(key) is not spares:  # Browser relaunched or closed
+                await context.close()
+                return
+            spares.append(context)
+
+    def _refill(self, key: str, launch_options: Optional[Dict[str, Any]]) -> None:
+        running = self._refills.get(key)
+        if running is None or running.done():
+            self._refills[key] = asyncio.create_task(self._refill_later(launch_options))
+
+    async def _refill_later(self, launch_options: Optional[Dict[str, Any]]) -> None:
+        try:
+            await self._top_up(launch_options)
+        except Exception as e:
+            print(f"Error opening spare browser context: {e}")
+
+    async def close(self) -> None:
+        """Close every browser and stop the driver if the pool started it"""
+        refills = list(self._refills.values())
+        self._refills.clear()
+        for refill in refills:
+            refill.cancel()
+        if refills:
+            await asyncio.gather(*refills, return_exceptions=True)
+        self._spares.clear()  # Closed with their browsers
+
+        browsers = list(self._browsers.values())
+        self._browsers.clear()
+        for browser in browsers:
+            try:
+                await browser.close()
+            except Exception as e:
+                print(f"Error closing browser: {e}")
+
+        if self._owns_playwright and self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
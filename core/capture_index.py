@@ -0,0 +1,278 @@
+from __future__ import annotations
+
+import argparse
+import json
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    import sqlite3
+
+DEFAULT_INDEX_PATH = Path("screen_shots_data/captures.db")
+
+COLUMNS = (
+    "capture_id",
+    "provider",
+    "task",
+    "url",
+    "timestamp",
+    "captured_at",
+    "screenshot_path",
+    "mhtml_path",
+    "duplicate_of",
+    "dom_path",
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS captures (
+    capture_id TEXT PRIMARY KEY,
+    provider TEXT NOT NULL,
+    task TEXT,
+    url TEXT,
+    timestamp TEXT NOT NULL,
+    captured_at REAL NOT NULL,
+    screenshot_path TEXT,
+    mhtml_path TEXT,
+    duplicate_of TEXT,
+    dom_path TEXT
+);
+CREATE INDEX IF NOT EXISTS captures_provider ON captures (provider, captured_at);
+CREATE INDEX IF NOT EXISTS captures_task ON captures (task, captured_at);
+CREATE INDEX IF NOT EXISTS captures_url ON captures (url);
+CREATE INDEX IF NOT EXISTS captures_time ON captures (captured_at);
+"""
+
+
+def _captured_at(timestamp: str) -> float:
+    """Epoch seconds from a collector timestamp such as 20241018_101500_123456_0001"""
+    parts = timestamp.split("_")
+    moment = datetime.strptime(parts[0] + parts[1], "%Y%m%d%H%M%S")
+    if len(parts) > 2:
+        moment = moment.replace(microsecond=int(parts[2]))
+    return moment.timestamp()
+
+
+class CaptureIndex:
+    """
+    SQLite index of capture metadata, replacing one JSON file per capture.
+
+    Rows are buffered and inserted ``batch_size`` at a time (and on
+    ``flush``), so the capture writer does not commit once per capture. The
+    database uses WAL mode, so queries from another process, such as the
+    command line below, do not block a running session.
+
+    Example:
+        ```python
+        index = CaptureIndex()
+        index.add("qxr", "screen_shots_data/qxr/metadata_1.json", metadata)
+        rows = index.query(provider="qxr", task="search", since=time.time() - 86400)
+        ```
+
+    From the command line:
+        ```bash
+        python -m core.capture_index --provider qxr --since 2024-10-01
+        ```
+    """
+
+    def __init__(self, path: Optional[Path] = None, batch_size: int = 20):
+        """
+        Args:
+            path: Database file, defaults to screen_shots_data/captures.db.
+            batch_size: Rows buffered before they are written.
+        """
+        self.path = Path(path or DEFAULT_INDEX_PATH)
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        self._connection: Optional[sqlite3.Connection] = None
+        self._pending: List[Tuple[Any, ...]] = []
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            import sqlite3  # Only loaded once a capture is recorded or queried
+
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(self.path, check_same_thread=False)
+            connection.row_factory = sqlite3.Row
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(SCHEMA)
+            # Databases from before DOM snapshots lack the dom_path column
+            columns = connection.execute("PRAGMA table_info(captures)").fetchall()
+            if "dom_path" not in {column["name"] for column in columns}:
+                connection.execute("ALTER TABLE captures ADD COLUMN dom_path TEXT")
+            self._connection = connection
+        return self._connection
+
+    def add(self, provider: str, capture_id: Path, metadata: Dict[str, Any]) -> None:
+        """Buffer a capture's metadata, writing the batch once it is full"""
+        row = (
+            str(capture_id),
+            provider,
+            metadata.get("task"),
+            metadata.get("url"),
+            metadata["timestamp"],
+            _captured_at(metadata["timestamp"]),
+            metadata.get("screenshot_path"),
+            metadata.get("mhtml_path"),
+            metadata.get("duplicate_of"),
+            metadata.get("dom_path"),
+        )
+        with self._lock:
+            self._pending.append(row)
+            if len(self._pending) >= self.batch_size:
+                self._write_pending()
+
+    def _write_pending(self) -> None:
+        if not self._pending:
+            return
+        connection = self._connect()
+        with connection:
+            connection.executemany(
+                f"INSERT OR REPLACE INTO captures ({', '.join(COLUMNS)}) "
+                f"VALUES ({', '.join('?' for _ in COLUMNS)})",
+                self._pending,
+            )
+        self._pending.clear()
+
+    def flush(self) -> None:
+        """Write any buffered rows"""
+        with self._lock:
+            self._write_pending()
+
+    def remove(self, capture_ids: Iterable[Path]) -> None:
+        """Drop rows for captures that have been deleted"""
+        ids = [(str(capture_id),) for capture_id in capture_ids]
+        if not ids:
+            return
+        with self._lock:
+            self._write_pending()
+            connection = self._connect()
+            with connection:
+                connection.executemany("DELETE FROM captures WHERE capture_id = ?", ids)
+
+    def query(
+        self,
+        provider: Optional[str] = None,
+        task: Optional[str] = None,
+        url: Optional[str] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        limit: Optional[int] = 100,
+    ) -> List[Dict[str, Any]]:
+        """
+        Captures matching every given filter, newest first.
+
+        Args:
+            provider: Provider directory name, e.g. "qxr".
+            task: Exact task name.
+            url: Start of the captured URL, e.g. "https://portal.qxr.com.au/results".
+            since: Earliest capture time (epoch seconds).
+            until: Latest capture time (epoch seconds).
+            limit: Most rows to return (None for all).
+        """
+        clauses, params = [], []
+        for column, value in (("provider", provider), ("task", task)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if url:
+            # A range rather than LIKE, so the url index is used
+            clauses.append("url >= ? AND url < ?")
+            params.extend((url, url[:-1] + chr(ord(url[-1]) + 1)))
+        if since is not None:
+            clauses.append("captured_at >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("captured_at <= ?")
+            params.append(until)
+
+        sql = "SELECT * FROM captures"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY captured_at DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        with self._lock:
+            self._write_pending()
+            rows = self._connect().execute(sql, params).fetchall()
+        return [dict(row) for row in rows]
+
+    def import_json(self, root: Path) -> int:
+        """Index metadata_*.json files written before the index existed"""
+        count = 0
+        for metadata_path in sorted(Path(root).glob("*/metadata_*.json")):
+            try:
+                metadata = json.loads(metadata_path.read_text(encoding="utf-8"))
+                self.add(metadata_path.parent.name, metadata_path, metadata)
+            except (OSError, ValueError, KeyError, IndexError) as e:
+                print(f"Skipping {metadata_path}: {e}")
+                continue
+            count += 1
+        self.flush()
+        return count
+
+    def close(self) -> None:
+        with self._lock:
+            self._write_pending()
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+
+def _parse_time(value: str) -> float:
+    return datetime.fromisoformat(value).timestamp()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Find page captures")
+    parser.add_argument(
+        "--index", type=Path, default=DEFAULT_INDEX_PATH, help="Index database"
+    )
+    parser.add_argument("--provider", help="Provider directory name, e.g. qxr")
+    parser.add_argument("--task", help="Capture task")
+    parser.add_argument("--url", help="Start of the page URL")
+    parser.add_argument(
+        "--since", type=_parse_time, help="Earliest time, e.g. 2024-10-01T09:00"
+    )
+    parser.add_argument("--until", type=_parse_time, help="Latest time")
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument(
+        "--import-json",
+        action="store_true",
+        help="First index metadata_*.json files next to the index",
+    )
+    args = parser.parse_args(argv)
+
+    index = CaptureIndex(args.index)
+    if args.import_json:
+        print(f"Indexed {index.import_json(args.index.parent)} captures")
+    rows = index.query(
+        provider=args.provider,
+        task=args.task,
+        url=args.url,
+        since=args.since,
+        until=args.until,
+        limit=args.limit,
+    )
+    index.close()
+    if not rows:
+        print("No captures found")
+        return
+
+    for row in rows:
+        when = datetime.fromtimestamp(row["captured_at"])
+        when = when.strftime("%Y-%m-%d %H:%M:%S")
+        print(f"{when}  {row['provider']:<16}{row['task'] or '-':<20}{row['url']}")
+        print(f"    screenshot: {row['screenshot_path']}")
+        if row["dom_path"]:
+            print(f"    dom:        {row['dom_path']}")
+        else:
+            print(f"    mhtml:      {row['mhtml_path']}")
+
+
+if __name__ == "__main__":
+    main()
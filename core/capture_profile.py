@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import base64
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+if TYPE_CHECKING:
+    from playwright.async_api import Page
+
+MODES = ("full_page", "viewport", "element")
+SUFFIXES = {"png": ".png", "jpeg": ".jpg", "webp": ".webp"}
+
+
+@dataclass(frozen=True)
+class CaptureProfile:
+    """
+    How a capture's screenshot is taken.
+
+    - ``mode``: "full_page" scrolls the whole document, "viewport" takes
+      only what is on screen, and "element" clips to the first element
+      matching ``selector`` (for example a results table).
+    - ``image_format``: "png", "jpeg" or "webp". JPEG and WebP take a
+      ``quality`` from 0 to 100 and are much smaller and quicker to encode
+      than PNG for long result pages.
+    - ``scale``: values below 1 shrink the image in the browser as it is
+      captured, e.g. 0.5 for half width and height.
+
+    PNG and JPEG at full scale go through ``page.screenshot``; WebP and
+    scaled captures use the DevTools ``Page.captureScreenshot`` command,
+    which Playwright does not expose.
+
+    Example:
+        ```python
+        results = CaptureProfile("element", selector="table.results",
+                                 image_format="jpeg", quality=70)
+        image = await results.screenshot(page)
+        ```
+    """
+
+    mode: str = "full_page"
+    selector: Optional[str] = None
+    image_format: str = "png"
+    quality: Optional[int] = None
+    scale: float = 1.0
+
+    def __post_init__(self):
+        if self.mode not in MODES:
+            raise ValueError(f"Capture mode must be one of {MODES}, not {self.mode!r}")
+        if self.mode == "element" and not self.selector:
+            raise ValueError("Element captures need a selector")
+        if self.image_format not in SUFFIXES:
+            raise ValueError(
+                f"Image format must be one of {tuple(SUFFIXES)}, "
+                f"not {self.image_format!r}"
+            )
+        if self.quality is not None and self.image_format == "png":
+            raise ValueError("PNG captures do not take a quality")
+        if not 0 < self.scale <= 1:
+            raise ValueError("Capture scale must be above 0 and at most 1")
+
+    @property
+    def suffix(self) -> str:
+        return SUFFIXES[self.image_format]
+
+    async def screenshot(self, page: Page) -> bytes:
+        """Take the screenshot this profile describes"""
+        if self.image_format == "webp" or self.scale != 1:
+            return await self._devtools_screenshot(page)
+
+        options: Dict[str, Any] = {"type": self.image_format}
+        if self.quality is not None:
+            options["quality"] = self.quality
+        if self.mode == "element":
+            return await page.locator(self.selector).first.screenshot(**options)
+        return await page.screenshot(full_page=self.mode == "full_page", **options)
+
+    async def _devtools_screenshot(self, page: Page) -> bytes:
+        cdp_session = await page.context.new_cdp_session(page)
+        try:
+            metrics = await cdp_session.send("Page.getLayoutMetrics")
+            viewport = metrics["cssLayoutViewport"]
+            if self.mode == "full_page":
+                content = metrics["cssContentSize"]
+                clip = {
+                    "x": 0,
+                    "y": 0,
+                    "width": content["width"],
+                    "height": content["height"],
+                }
+            elif self.mode == "element":
+                box = await page.locator(self.selector).first.bounding_box()
+                if box is None:
+                    raise ValueError(f"{self.selector!r} is not visible")
+                clip = {
+                    "x": viewport["pageX"] + box["x"],
+                    "y": viewport["pageY"] + box["y"],
+                    "width": box["width"],
+                    "height": box["height"],
+                }
+            else:
+                clip = {
+                    "x": viewport["pageX"],
+                    "y": viewport["pageY"],
+                    "width": viewport["clientWidth"],
+                    "height": viewport["clientHeight"],
+                }
+            params: Dict[str, Any] = {
+                "format": self.image_format,
+                "clip": {**clip, "scale": self.scale},
+                "captureBeyondViewport": self.mode != "viewport",
+            }
+            if self.quality is not None:
+                params["quality"] = self.quality
+            result = await cdp_session.send("Page.captureScreenshot", params)
+        finally:
+            await cdp_session.detach()
+        return base64.b64decode(result["data"])
+
+
+# Matches the collector's original behaviour: the whole page as PNG
+DEFAULT_CAPTURE_PROFILE = CaptureProfile()
+
+# On-screen area only, as a compact JPEG
+VIEWPORT_CAPTURE_PROFILE = CaptureProfile("viewport", image_format="jpeg", quality=70)
+
+# Profiles --capture-profile can choose for every provider's captures
+CAPTURE_PROFILES = {
+    "full_page": DEFAULT_CAPTURE_PROFILE,
+    "viewport": VIEWPORT_CAPTURE_PROFILE,
+}
@@ -0,0 +1,158 @@
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import re
+import threading
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+MANIFEST_FORMAT = "mhtml-parts/1"
+MANIFEST_SUFFIX = ".mhtml.json"
+
+BOUNDARY_PATTERN = re.compile(r'boundary="?([^";\r\n]+)"?', re.IGNORECASE)
+
+
+def split_mhtml(mhtml: str) -> Tuple[str, List[str], str, str]:
+    """
+    Split an MHTML document into (header, parts, tail, delimiter).
+
+    ``delimiter.join([header, *parts, tail])`` gives back the original text
+    exactly. A document without a multipart boundary is returned as a single
+    part with an empty header and tail.
+    """
+    match = BOUNDARY_PATTERN.search(mhtml)
+    if match is None:
+        return "", [mhtml], "", ""
+    delimiter = "--" + match.group(1)
+    pieces = mhtml.split(delimiter)
+    if len(pieces) < 3:
+        return "", [mhtml], "", ""
+    return pieces[0], pieces[1:-1], pieces[-1], delimiter
+
+
+class CaptureStore:
+    """
+    Content-addressed, compressed storage for captured pages.
+
+    Portal pages embed the same stylesheets, scripts and images in every
+    MHTML snapshot. The store splits each snapshot into its MIME parts and
+    keeps every distinct part once, gzip-compressed, under
+    ``<root>/objects/<sha256[:2]>/<sha256[2:]>.gz``. A small JSON manifest
+    lists the parts needed to rebuild the original document byte for byte.
+    Screenshots are stored once per distinct image, uncompressed, so the
+    PNG files can still be opened directly.
+
+    Objects are written to a temporary name and renamed into place, so
+    sessions writing the same part at the same time are safe.
+
+    Example:
+        ```python
+        store = CaptureStore(Path("screen_shots_data"))
+        store.put_mhtml(mhtml, Path("screen_shots_data/qxr/page_1.mhtml.json"))
+        mhtml = store.read_mhtml(Path("screen_shots_data/qxr/page_1.mhtml.json"))
+        ```
+    """
+
+    def __init__(self, root: Optional[Path] = None, compresslevel: int = 6):
+        """
+        Args:
+            root: Directory that holds the shared objects directory.
+                Defaults to "screen_shots_data" in the current working
+                directory.
+            compresslevel: gzip level for MHTML parts (1 fastest, 9 smallest).
+        """
+        self.root = root or Path("screen_shots_data")
+        self.objects_dir = self.root / "objects"
+        self.compresslevel = compresslevel
+
+    def object_path(self, digest: str, suffix: str = ".gz") -> Path:
+        return self.objects_dir / digest[:2] / f"{digest[2:]}{suffix}"
+
+    def _put(self, data: bytes, suffix: str, compress: bool) -> str:
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.object_path(digest, suffix)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_name(
+                f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp"
+            )
+            if compress:
+                data = gzip.compress(data, compresslevel=self.compresslevel)
+            tmp_path.write_bytes(data)
+            os.replace(tmp_path, path)
+        return digest
+
+    def screenshot_path(self, image: bytes, suffix: str = ".png") -> Path:
+        """Where put_screenshot will store this image"""
+        return self.object_path(hashlib.sha256(image).hexdigest(), suffix)
+
+    def put_screenshot(self, image: bytes, suffix: str = ".png") -> Path:
+        """Store an image once and return its path"""
+        return self.object_path(self._put(image, suffix, compress=False), suffix)
+
+    def put_mhtml(self, mhtml: str, manifest_path: Path) -> List[Path]:
+        """Store a snapshot's parts, write the manifest and return the part paths"""
+        header, parts, tail, delimiter = split_mhtml(mhtml)
+        manifest = {
+            "format": MANIFEST_FORMAT,
+            "delimiter": delimiter,
+            "header": header,
+            "tail": tail,
+            "parts": [
+                self._put(part.encode("utf-8"), ".gz", compress=True) for part in parts
+            ],
+        }
+        manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = manifest_path.with_name(manifest_path.name + ".tmp")
+        tmp_path.write_text(json.dumps(manifest), encoding="utf-8")
+        os.replace(tmp_path, manifest_path)
+        return [self.object_path(digest) for digest in manifest["parts"]]
+
+    def read_part(self, digest: str) -> str:
+        return gzip.decompress(self.object_path(digest).read_bytes()).decode("utf-8")
+
+    def read_mhtml(self, manifest_path: Path) -> str:
+        """Rebuild the original MHTML document from its manifest"""
+        manifest = json.loads(Path(manifest_path).read_text(encoding="utf-8"))
+        if manifest.get("format") != MANIFEST_FORMAT:
+            raise ValueError(f"{manifest_path} is not an MHTML capture manifest")
+        parts = [self.read_part(digest) for digest in manifest["parts"]]
+        return manifest["delimiter"].join(
+            [manifest["header"], *parts, manifest["tail"]]
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Rebuild a captured MHTML page from its manifest"
+    )
+    parser.add_argument("manifest", type=Path, help=f"A *{MANIFEST_SUFFIX} file")
+    parser.add_argument(
+        "--root",
+        type=Path,
+        default=Path("screen_shots_data"),
+        help="Capture directory that contains objects/",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        type=Path,
+        help="Where to write the .mhtml (defaults to next to the manifest)",
+    )
+    args = parser.parse_args(argv)
+
+    output = args.output
+    if output is None:
+        name = args.manifest.name
+        if name.endswith(MANIFEST_SUFFIX):
+            name = name[: -len(MANIFEST_SUFFIX)]
+        output = args.manifest.with_name(name + ".mhtml")
+    mhtml = CaptureStore(args.root).read_mhtml(args.manifest)
+    output.write_bytes(mhtml.encode("utf-8"))
+    print(f"Wrote {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,111 +1,449 @@
-from pathlib import Path
-from datetime import datetime
+from __future__ import annotations
+
+import asyncio
+import itertools
 import json
-from typing import Dict, Optional
-from playwright.async_api import Page, CDPSession, Error as PlaywrightError
+import os
+from contextlib import nullcontext
+from datetime import datetime
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple, Union
+
+from .capture_index import CaptureIndex
+from .capture_profile import DEFAULT_CAPTURE_PROFILE, CaptureProfile
+from .capture_store import MANIFEST_SUFFIX, CaptureStore
+from .dedupe import ScreenshotDeduper
+from .dom_snapshot import DOM_SNAPSHOT_SUFFIX, DomSnapshot, capture_dom_snapshot
+from .retention import RetentionManager
+
+if TYPE_CHECKING:
+    from playwright.async_api import Page
+
+
+class CaptureWriter:
+    """
+    Writes captured files to disk on a worker thread.
+
+    Captures are queued with their contents already in memory, so the page
+    can carry on as soon as the browser has returned them. At most
+    ``max_pending`` captures wait to be written; when the queue is full
+    ``submit`` waits for the writer to catch up, which bounds the memory held
+    by multi-megabyte MHTML snapshots.
+
+    Each file is written to a temporary name and renamed into place, and
+    files are written in the order given, so a capture's metadata (written
+    last) only appears once the rest of it is complete.
+    """
+
+    def __init__(self, max_pending: int = 4):
+        self.max_pending = max_pending
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    async def submit(self, files: Dict[Path, Union[bytes, str]]) -> None:
+        """Queue files for writing, waiting while the queue is full"""
+        await self.submit_call(self._write, files)
+
+    async def submit_call(self, func: Callable[..., Any], *args) -> None:
+        """Queue a blocking write to run on the worker thread"""
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue(maxsize=self.max_pending)
+            self._worker = asyncio.create_task(self._run())
+        await self._queue.put((func, args))
+
+    async def flush(self) -> None:
+        """Wait until every queued capture has been written"""
+        if self._queue is not None and self._worker and not self._worker.done():
+            await self._queue.join()
+
+    async def close(self) -> None:
+        """Write what is queued and stop the worker"""
+        await self.flush()
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+    async def _run(self) -> None:
+        while True:
+            func, args = await self._queue.get()
+            try:
+                await asyncio.to_thread(func, *args)
+            except Exception as e:
+                print(f"Failed to write capture: {e}")
+            finally:
+                self._queue.task_done()
+
+    @staticmethod
+    def _write(files: Dict[Path, Union[bytes, str]]) -> None:
+        written = []
+        try:
+            for path, data in files.items():
+                if isinstance(data, str):
+                    data = data.encode("utf-8")
+                tmp_path = path.with_name(path.name + ".tmp")
+                tmp_path.write_bytes(data)
+                os.replace(tmp_path, path)
+                written.append(path)
+        except Exception:
+            # Clean up any partially written capture
+            for path in written + [p.with_name(p.name + ".tmp") for p in files]:
+                if path.exists():
+                    path.unlink()
+            raise
+
+
+PAGE_FORMATS = ("mhtml", "dom")
+
 
 class PageDataCollector:
     """
     Utility class for collecting webpage data including screenshots and HTML.
-    
+
     This class captures both visual and structural data from web pages:
-    - Full page screenshots (PNG format)
-    - Complete page content including resources (MHTML format)
+    - Screenshots, full page PNG by default (see ``CaptureProfile``)
+    - Complete page content including resources (MHTML format), or with
+      ``page_format="dom"`` a much smaller ``DomSnapshot`` of the DOM,
+      a few computed styles and the visible text
     - Metadata about the capture (JSON format)
-    
+
+    Files are written in the background by a ``CaptureWriter``; call
+    ``close`` (or ``flush``) before reading them back. With a
+    ``CaptureStore`` the MHTML is kept as shared compressed parts plus a
+    small manifest, and identical screenshots are stored once. With a
+    ``ScreenshotDeduper`` a capture that looks the same as the last one of
+    its URL and task only records a link to it. With a ``RetentionManager`` every capture is
+    recorded in its ledger and old captures are evicted to stay in budget.
+    With a ``CaptureIndex`` metadata goes into its SQLite database instead
+    of a ``metadata_<timestamp>.json`` file per capture.
+
     Example:
         ```python
         from playwright.async_api import async_playwright
-        
+
         collector = PageDataCollector()
         async with async_playwright() as p:
             browser = await p.chromium.launch()
             page = await browser.new_page()
-            
+
             # Navigate and capture
             await page.goto('https://example.com')
             metadata = await collector.capture_page_data(
                 page,
                 task="login_form_detection"
             )
+            await collector.close()
         ```
     """
-    
-    def __init__(self, output_dir: Optional[Path] = None):
+
+    def __init__(
+        self,
+        output_dir: Optional[Path] = None,
+        writer: Optional[CaptureWriter] = None,
+        store: Optional[CaptureStore] = None,
+        dedupe: Optional[ScreenshotDeduper] = None,
+        retention: Optional[RetentionManager] = None,
+        index: Optional[CaptureIndex] = None,
+        profile: CaptureProfile = DEFAULT_CAPTURE_PROFILE,
+        task_profiles: Optional[Dict[str, CaptureProfile]] = None,
+        page_format: str = "mhtml",
+    ):
         """
         Initialize the collector with an output directory.
-        
+
         Args:
             output_dir: Path to store captured data. Defaults to "screen_shots_data"
                       in the current working directory.
+            writer: Background writer to queue captures on. Defaults to a
+                    writer owned by this collector.
+            store: Content-addressed store for MHTML parts and screenshots.
+                   Without one each capture is written as plain files.
+            dedupe: Skips the screenshot and MHTML of captures that look the
+                    same as the last capture of the same URL and task.
+            retention: Disk budget that captures are recorded against.
+            index: SQLite index to record metadata in instead of JSON files.
+            profile: How screenshots are taken unless the task has its own.
+            task_profiles: Screenshot profiles for particular tasks, e.g. a
+                           clipped JPEG of the results table for "search".
+            page_format: "mhtml" for a complete copy of the page, or "dom"
+                         for a compressed DOM snapshot and page text.
         """
+        if page_format not in PAGE_FORMATS:
+            raise ValueError(
+                f"Page format must be one of {PAGE_FORMATS}, not {page_format!r}"
+            )
         self.output_dir = output_dir or Path("screen_shots_data")
-        self.output_dir.mkdir(exist_ok=True)
-    
-    async def capture_page_data(self, page: Page, task: Optional[str] = None, url: Optional[str] = None) -> Dict[str, str]:
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.writer = writer or CaptureWriter()
+        self._owns_writer = writer is None
+        self.store = store
+        self.dedupe = dedupe
+        self.retention = retention
+        self.index = index
+        self.profile = profile
+        self.task_profiles = dict(task_profiles or {})
+        self.page_format = page_format
+        self._sequence = itertools.count(1)
+
+    async def flush(self) -> None:
+        """Wait until every capture so far is on disk"""
+        await self.writer.flush()
+        if self.index:
+            await asyncio.to_thread(self.index.flush)
+
+    async def close(self) -> None:
+        """Finish writing captures and stop the writer if this collector owns it"""
+        if self._owns_writer:
+            await self.writer.close()
+        else:
+            await self.writer.flush()
+        if self.index:
+            await asyncio.to_thread(self.index.flush)
+
+    async def capture_page_data(
+        self,
+        page: Page,
+        task: Optional[str] = None,
+        url: Optional[str] = None,
+        profile: Optional[CaptureProfile] = None,
+    ) -> Dict[str, str]:
         """
         Capture page screenshot and HTML/resources for the current page state.
-        
+
+        Returns once the data is in memory and queued; the files listed in
+        the metadata are written shortly afterwards.
+
         Args:
             page: Playwright page object to capture
             task: Description of what the page represents (e.g., "login_form")
             url: Optional URL to record in metadata (defaults to page.url)
-            
+            profile: Screenshot profile for this capture only (defaults to the
+                     task's profile, then the collector's)
+
         Returns:
             Dictionary containing:
             - task: Optional task description
             - url: Page URL
             - timestamp: Capture timestamp
-            - screenshot_path: Path to the PNG screenshot
-            - mhtml_path: Path to the MHTML content
+            - screenshot_path: Path to the screenshot
+            - mhtml_path: Path to the MHTML content (a manifest when stored)
+            - dom_path: Path to the DOM snapshot, in place of mhtml_path
+              when the collector's page format is "dom"
             - viewport: Page viewport size
-            
+            - duplicate_of: Timestamp of the earlier capture this one looks
+              the same as, whose screenshot and MHTML paths are reused
+
         Raises:
             PlaywrightError: If screenshot or CDP operations fail
         """
-        screenshot_path = None
-        mhtml_path = None
-        metadata_path = None
-        
         try:
-            # Generate timestamp for unique filenames
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            
+            # Timestamp with microseconds and a per-collector sequence number,
+            # so captures in the same second never share a filename
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+            timestamp = f"{timestamp}_{next(self._sequence):04d}"
+
             # Get current URL if not provided
             url = url or page.url
-            
+
             # Take screenshot
-            screenshot_path = self.output_dir / f"screenshot_{timestamp}.png"
-            await page.screenshot(path=str(screenshot_path), full_page=True)
-            
-            # Use Chrome DevTools Protocol (CDP) to capture complete page content
-            # CDP allows direct communication with the browser to access advanced features
-            # Here we use it to get a snapshot that includes all page resources (HTML, CSS, images)
-            cdp_session = await page.context.new_cdp_session(page)
-            try:
-                mhtml_data = await cdp_session.send("Page.captureSnapshot")
-                
-                # Save the captured content as MHTML (web archive format that includes all resources)
-                mhtml_path = self.output_dir / f"page_{timestamp}.mhtml"
-                mhtml_path.write_text(mhtml_data["data"], encoding="utf-8")
-            finally:
-                await cdp_session.detach()  # Clean up CDP session
-            
+            profile = profile or self._profile_for(task)
+            screenshot = await profile.screenshot(page)
+            metadata_path = self.output_dir / f"metadata_{timestamp}.json"
+
+            # A page that looks the same as its last capture (a spinner, an
+            # untouched search form) links to it instead of being captured again
+            image_hash = None
+            if self.dedupe:
+                image_hash, previous = await asyncio.to_thread(
+                    self.dedupe.check, screenshot, (url, task)
+                )
+                if previous is not None:
+                    return await self._link_duplicate(
+                        task, url, timestamp, metadata_path, previous
+                    )
+
+            if self.store:
+                screenshot_path = self.store.screenshot_path(screenshot, profile.suffix)
+            else:
+                screenshot_path = (
+                    self.output_dir / f"screenshot_{timestamp}{profile.suffix}"
+                )
+            page_key, page_path, page_data = await self._capture_page(page, timestamp)
+
             # Save metadata
             metadata = {
                 "task": task,
-                "url": url,           
+                "url": url,
                 "timestamp": timestamp,
                 "screenshot_path": str(screenshot_path),
-                "mhtml_path": str(mhtml_path)
+                page_key: str(page_path),
             }
-            metadata_path = self.output_dir / f"metadata_{timestamp}.json"
-            metadata_path.write_text(json.dumps(metadata, indent=2))
-            
+            if self.dedupe:
+                self.dedupe.remember((url, task), image_hash, metadata)
+
+            await self._queue_write(
+                screenshot,
+                screenshot_path,
+                page_data,
+                page_path,
+                metadata_path,
+                metadata,
+            )
             return metadata
-            
+
         except Exception as e:
-            # Clean up any partially created files
-            for path in [p for p in [screenshot_path, mhtml_path, metadata_path] if p and p.exists()]:
-                path.unlink()
             raise Exception(f"Failed to capture page data: {str(e)}")
+
+    def _profile_for(self, task: Optional[str]) -> CaptureProfile:
+        """The screenshot profile for a capture task"""
+        return self.task_profiles.get(task, self.profile)
+
+    async def _capture_page(
+        self, page: Page, timestamp: str
+    ) -> Tuple[str, Path, Union[str, DomSnapshot]]:
+        """The page in the collector's format, with its metadata key and path"""
+        if self.page_format == "dom":
+            # Only the DOM, a few computed styles and the page text
+            page_data = await capture_dom_snapshot(page)
+            return (
+                "dom_path",
+                self.output_dir / f"page_{timestamp}{DOM_SNAPSHOT_SUFFIX}",
+                page_data,
+            )
+
+        # Use Chrome DevTools Protocol (CDP) to capture complete page content
+        # CDP allows direct communication with the browser to access advanced features
+        # Here we use it to get a snapshot that includes all page resources (HTML, CSS, images)
+        cdp_session = await page.context.new_cdp_session(page)
+        try:
+            mhtml_data = await cdp_session.send("Page.captureSnapshot")
+        finally:
+            await cdp_session.detach()  # Clean up CDP session
+
+        # MHTML is a web archive format that includes all resources
+        suffix = MANIFEST_SUFFIX if self.store else ".mhtml"
+        page_path = self.output_dir / f"page_{timestamp}{suffix}"
+        return "mhtml_path", page_path, mhtml_data["data"]
+
+    async def _link_duplicate(
+        self,
+        task: Optional[str],
+        url: str,
+        timestamp: str,
+        metadata_path: Path,
+        previous: Dict[str, str],
+    ) -> Dict[str, str]:
+        """Record a capture that reuses an earlier capture's files"""
+        metadata = {
+            "task": task,
+            "url": url,
+            "timestamp": timestamp,
+            "screenshot_path": previous["screenshot_path"],
+            **{
+                key: previous[key]
+                for key in ("mhtml_path", "dom_path")
+                if key in previous
+            },
+            "duplicate_of": previous["timestamp"],
+        }
+        previous_path = self.output_dir / f"metadata_{previous['timestamp']}.json"
+        await self.writer.submit_call(
+            self._finish, metadata_path, metadata, [], [], previous_path
+        )
+        return metadata
+
+    async def _queue_write(
+        self,
+        screenshot: bytes,
+        screenshot_path: Path,
+        page_data: Union[str, DomSnapshot],
+        page_path: Path,
+        metadata_path: Path,
+        metadata: Dict[str, str],
+    ) -> None:
+        """Hand a capture to the writer; its metadata is recorded last"""
+        if self.store:
+            await self.writer.submit_call(
+                self._write_stored,
+                screenshot,
+                page_data,
+                page_path,
+                metadata_path,
+                metadata,
+            )
+        else:
+            await self.writer.submit_call(
+                self._write_files,
+                screenshot_path,
+                screenshot,
+                page_path,
+                page_data,
+                metadata_path,
+                metadata,
+            )
+
+    def _write_stored(
+        self,
+        screenshot: bytes,
+        page_data: Union[str, DomSnapshot],
+        page_path: Path,
+        metadata_path: Path,
+        metadata: Dict[str, str],
+    ) -> None:
+        """Store a capture's screenshot and page data, then its metadata"""
+        with self.retention.lock if self.retention else nullcontext():
+            suffix = Path(metadata["screenshot_path"]).suffix
+            objects = [self.store.put_screenshot(screenshot, suffix)]
+            if isinstance(page_data, DomSnapshot):
+                CaptureWriter._write({page_path: page_data.encode()})
+            else:
+                objects += self.store.put_mhtml(page_data, page_path)
+            try:
+                self._finish(metadata_path, metadata, [page_path], objects)
+            except Exception:
+                page_path.unlink(missing_ok=True)
+                raise
+
+    def _write_files(
+        self,
+        screenshot_path: Path,
+        screenshot: bytes,
+        page_path: Path,
+        page_data: Union[str, DomSnapshot],
+        metadata_path: Path,
+        metadata: Dict[str, str],
+    ) -> None:
+        """Write a capture as plain files, then its metadata"""
+        if isinstance(page_data, DomSnapshot):
+            page_data = page_data.encode()
+        CaptureWriter._write({screenshot_path: screenshot, page_path: page_data})
+        try:
+            self._finish(metadata_path, metadata, [screenshot_path, page_path], [])
+        except Exception:
+            for path in (screenshot_path, page_path):
+                path.unlink(missing_ok=True)
+            raise
+
+    def _finish(
+        self,
+        metadata_path: Path,
+        metadata: Dict[str, str],
+        files: List[Path],
+        objects: List[Path],
+        duplicate_of: Optional[Path] = None,
+    ) -> None:
+        """Record a written capture's metadata and charge it to the disk budget"""
+        if self.index:
+            self.index.add(self.output_dir.name, metadata_path, metadata)
+        else:
+            CaptureWriter._write({metadata_path: json.dumps(metadata, indent=2)})
+            files = files + [metadata_path]
+        if self.retention:
+            evicted = self.retention.add(
+                metadata_path, self.output_dir.name, files, objects, duplicate_of
+            )
+            if self.index and evicted:
+                self.index.remove(evicted)
@@ -0,0 +1,97 @@
+import hashlib
+import io
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+HASH_SIZE = 16  # 16x16 gradient bits, a 256-bit hash
+
+
+def perceptual_hash(image: bytes, hash_size: int = HASH_SIZE) -> int:
+    """
+    Difference hash of an encoded image.
+
+    The image is reduced to a (hash_size + 1) x hash_size greyscale thumbnail
+    and each bit records whether a pixel is brighter than its right-hand
+    neighbour. Re-encoding, small rendering differences and a blinking cursor
+    change few bits; a different page changes many.
+    """
+    import numpy as np  # Only needed for perceptual matching
+    from PIL import Image
+
+    with Image.open(io.BytesIO(image)) as img:
+        thumbnail = img.convert("L").resize(
+            (hash_size + 1, hash_size), Image.Resampling.BOX
+        )
+    pixels = np.asarray(thumbnail, dtype=np.int16)
+    bits = (pixels[:, 1:] > pixels[:, :-1]).ravel()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+class ScreenshotDeduper:
+    """
+    Spots a page that has not changed since its last capture in a session.
+
+    Each screenshot is compared only with the previous capture of the same
+    page, identified by a key such as its URL and capture task, never with
+    captures of other pages. By default it only counts as a duplicate if the
+    screenshot is byte-for-byte the same, as pages with different results
+    (or none yet) can look alike at any thumbnail size. Given
+    ``max_distance``, perceptual hashes that differ in at most that many of
+    their 256 bits match instead, which also catches re-encoded images. For
+    a duplicate ``PageDataCollector`` records a link to the earlier capture
+    instead of writing a new screenshot and MHTML snapshot.
+
+    Example:
+        ```python
+        deduper = ScreenshotDeduper()
+        key = (page.url, "search")
+        image_hash, previous = deduper.check(png_bytes, key)
+        if previous is None:
+            deduper.remember(key, image_hash, metadata)
+        ```
+    """
+
+    def __init__(self, max_distance: Optional[int] = None, history: int = 32):
+        """
+        Args:
+            max_distance: Most differing perceptual hash bits still treated as
+                the same image, or None to only match identical screenshots.
+            history: Number of pages whose last capture is remembered.
+        """
+        self.max_distance = max_distance
+        self.history = history
+        self._last: "OrderedDict[Hashable, Tuple[int, Dict[str, Any]]]" = OrderedDict()
+
+    def check(
+        self, image: bytes, key: Hashable
+    ) -> Tuple[Optional[int], Optional[Dict[str, Any]]]:
+        """Return the image's hash, and the page's last capture if it matches"""
+        if self.max_distance is None:
+            image_hash = int.from_bytes(hashlib.sha256(image).digest(), "big")
+        else:
+            try:
+                image_hash = perceptual_hash(image)
+            except Exception as e:  # Undecodable image: never a duplicate
+                print(f"Could not hash screenshot: {e}")
+                return None, None
+        last = self._last.get(key)
+        limit = self.max_distance or 0
+        if last and hamming_distance(image_hash, last[0]) <= limit:
+            return image_hash, last[1]
+        return image_hash, None
+
+    def remember(
+        self, key: Hashable, image_hash: Optional[int], metadata: Dict[str, Any]
+    ) -> None:
+        """Record a page's latest capture, which its next one is compared with"""
+        if image_hash is None:
+            self._last.pop(key, None)  # Its next capture has nothing to match
+            return
+        self._last[key] = (image_hash, metadata)
+        self._last.move_to_end(key)
+        while len(self._last) > self.history:
+            self._last.popitem(last=False)
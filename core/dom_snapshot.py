@@ -0,0 +1,254 @@
+from __future__ import annotations
+
+import argparse
+import gzip
+import html
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from playwright.async_api import Page
+
+DOM_SNAPSHOT_FORMAT = "domsnapshot/1"
+DOM_SNAPSHOT_SUFFIX = ".dom.jsonl.gz"
+
+# Computed styles kept for each rendered node; enough to tell hidden,
+# highlighted and disabled parts of a results page apart
+DEFAULT_SNAPSHOT_STYLES = (
+    "display",
+    "visibility",
+    "color",
+    "background-color",
+    "font-weight",
+)
+
+VOID_ELEMENTS = frozenset(
+    "area base br col embed hr img input link meta source track wbr".split()
+)
+
+
+@dataclass
+class DomSnapshot:
+    """
+    A page's DOM, a few computed styles and its visible text.
+
+    Taken with the DevTools ``DOMSnapshot.captureSnapshot`` command, which
+    returns the DOM of the page and its frames without the stylesheets,
+    scripts and images that make MHTML snapshots large and slow to produce.
+
+    ``encode`` gives a gzip-compressed JSON lines file: a header line with
+    the URL, the captured style names and the page text, then one line per
+    node with short keys (see ``_nodes``).
+
+    Example:
+        ```python
+        snapshot = await capture_dom_snapshot(page)
+        path.write_bytes(snapshot.encode())
+        header, nodes = read_dom_snapshot(path)
+        ```
+    """
+
+    url: str
+    text: str
+    styles: Tuple[str, ...]
+    documents: List[Dict[str, Any]]
+    strings: List[str]
+
+    def encode(self, compresslevel: int = 6) -> bytes:
+        header = {
+            "format": DOM_SNAPSHOT_FORMAT,
+            "url": self.url,
+            "styles": list(self.styles),
+            "text": self.text,
+        }
+        lines = [json.dumps(header, separators=(",", ":"))]
+        lines += [json.dumps(node, separators=(",", ":")) for node in self._nodes()]
+        data = "\n".join(lines).encode("utf-8") + b"\n"
+        return gzip.compress(data, compresslevel=compresslevel, mtime=0)
+
+    def _string(self, index: int) -> Optional[str]:
+        return self.strings[index] if index >= 0 else None
+
+    def _nodes(self) -> Iterator[Dict[str, Any]]:
+        """
+        One dict per node, resolving the snapshot's string table:
+        ``d`` document, ``i`` node, ``p`` parent, ``t`` node type, ``n`` name,
+        ``v`` value, ``a`` attributes, ``in`` form input value, and for
+        rendered nodes ``s`` styles and ``b`` bounds (x, y, width, height).
+        Password fields are written without their value.
+        """
+        for d, document in enumerate(self.documents):
+            nodes = document["nodes"]
+            layout = document.get("layout", {})
+            rendered = {}
+            for position, node_index in enumerate(layout.get("nodeIndex", [])):
+                rendered[node_index] = position
+            input_values = dict(
+                zip(
+                    nodes.get("inputValue", {}).get("index", []),
+                    nodes.get("inputValue", {}).get("value", []),
+                )
+            )
+
+            for i, parent in enumerate(nodes.get("parentIndex", [])):
+                node: Dict[str, Any] = {
+                    "d": d,
+                    "i": i,
+                    "p": parent,
+                    "t": nodes["nodeType"][i],
+                    "n": self._string(nodes["nodeName"][i]),
+                }
+                value = self._string(nodes["nodeValue"][i])
+                if value:
+                    node["v"] = value
+                attributes = self._attributes(nodes, i)
+                if attributes:
+                    node["a"] = attributes
+                if _is_password(node):
+                    attributes.pop("value", None)  # Never write a password
+                elif i in input_values:
+                    node["in"] = self._string(input_values[i])
+                if i in rendered:
+                    self._add_layout(node, layout, rendered[i])
+                yield node
+
+    def _attributes(self, nodes: Dict[str, Any], i: int) -> Dict[str, str]:
+        attributes = nodes.get("attributes", [])
+        pairs = attributes[i] if i < len(attributes) else []
+        return {
+            self.strings[pairs[k]]: self.strings[pairs[k + 1]]
+            for k in range(0, len(pairs) - 1, 2)
+        }
+
+    def _add_layout(
+        self, node: Dict[str, Any], layout: Dict[str, Any], position: int
+    ) -> None:
+        styles = {
+            name: self.strings[index]
+            for name, index in zip(self.styles, layout["styles"][position])
+            if index >= 0 and self.strings[index]
+        }
+        if styles:
+            node["s"] = styles
+        node["b"] = [round(v, 1) for v in layout["bounds"][position]]
+
+
+def _is_password(node: Dict[str, Any]) -> bool:
+    return (node["n"] or "").lower() == "input" and (
+        node.get("a", {}).get("type", "").lower() == "password"
+    )
+
+
+async def capture_dom_snapshot(
+    page: Page, styles: Tuple[str, ...] = DEFAULT_SNAPSHOT_STYLES
+) -> DomSnapshot:
+    """Snapshot the page's DOM, the given computed styles and its visible text"""
+    cdp_session = await page.context.new_cdp_session(page)
+    try:
+        result = await cdp_session.send(
+            "DOMSnapshot.captureSnapshot", {"computedStyles": list(styles)}
+        )
+    finally:
+        await cdp_session.detach()
+    text = await page.inner_text("body")
+    return DomSnapshot(
+        url=page.url,
+        text=text,
+        styles=tuple(styles),
+        documents=result["documents"],
+        strings=result["strings"],
+    )
+
+
+def read_dom_snapshot(path: Path) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """The header and node list of an encoded snapshot file"""
+    lines = gzip.decompress(Path(path).read_bytes()).decode("utf-8").splitlines()
+    header = json.loads(lines[0])
+    if header.get("format") != DOM_SNAPSHOT_FORMAT:
+        raise ValueError(f"{path} is not a {DOM_SNAPSHOT_FORMAT} snapshot")
+    return header, [json.loads(line) for line in lines[1:]]
+
+
+def to_html(nodes: List[Dict[str, Any]], document: int = 0) -> str:
+    """Rebuild approximate HTML for one document of a snapshot (no styles)"""
+    nodes = [node for node in nodes if node["d"] == document]
+    children: Dict[int, List[Dict[str, Any]]] = {}
+    for node in nodes:
+        children.setdefault(node["p"], []).append(node)
+
+    out: List[str] = []
+    for root in children.get(-1, []):
+        _render(root, children, out)
+    return "".join(out)
+
+
+def _render(
+    node: Dict[str, Any], children: Dict[int, List[Dict[str, Any]]], out: List[str]
+) -> None:
+    """Append the HTML of a node and everything under it to ``out``"""
+    node_type = node["t"]
+    if node_type == 1:  # Element
+        _render_element(node, children, out)
+    elif node_type == 3:  # Text
+        out.append(html.escape(node.get("v", "")))
+    elif node_type == 10:  # Doctype
+        out.append(f"<!DOCTYPE {(node['n'] or '').lower()}>")
+    else:  # Document, fragments; comments are dropped
+        for child in children.get(node["i"], []):
+            _render(child, children, out)
+
+
+def _render_element(
+    node: Dict[str, Any], children: Dict[int, List[Dict[str, Any]]], out: List[str]
+) -> None:
+    name = (node["n"] or "").lower()
+    attributes = "".join(
+        f' {key}="{html.escape(value)}"' for key, value in node.get("a", {}).items()
+    )
+    if "in" in node:
+        attributes += f' value="{html.escape(node["in"] or "")}"'
+    out.append(f"<{name}{attributes}>")
+    for child in children.get(node["i"], []):
+        _render(child, children, out)
+    if name not in VOID_ELEMENTS:
+        out.append(f"</{name}>")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Show the text or HTML of a captured DOM snapshot"
+    )
+    parser.add_argument("snapshot", type=Path, help=f"A *{DOM_SNAPSHOT_SUFFIX} file")
+    parser.add_argument(
+        "--html",
+        action="store_true",
+        help="Write the page's HTML instead of printing its text",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        type=Path,
+        help="Where to write the .html (defaults to next to the snapshot)",
+    )
+    args = parser.parse_args(argv)
+
+    header, nodes = read_dom_snapshot(args.snapshot)
+    if not args.html:
+        print(header["url"])
+        print(header["text"])
+        return
+
+    output = args.output
+    if output is None:
+        name = args.snapshot.name
+        if name.endswith(DOM_SNAPSHOT_SUFFIX):
+            name = name[: -len(DOM_SNAPSHOT_SUFFIX)]
+        output = args.snapshot.with_name(name + ".html")
+    output.write_text(to_html(nodes), encoding="utf-8")
+    print(f"Wrote {output}")
+
+
+if __name__ == "__main__":
+    main()
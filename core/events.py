@@ -0,0 +1,41 @@
+import asyncio
+from typing import Generic, List, TypeVar
+
+T = TypeVar("T")
+
+
+class Topic(Generic[T]):
+    """
+    In-process publish/subscribe channel for one kind of message.
+
+    Every subscriber gets its own unbounded queue, so a slow reader never
+    blocks the publisher or misses messages published while it was busy.
+    Publishing is synchronous and safe to call from any coroutine on the loop.
+
+    Example:
+        ```python
+        events: Topic[SessionEvent] = Topic()
+        queue = events.subscribe()
+        events.publish(SessionEvent("QXR", SessionStage.LOGGED_IN))
+        event = await queue.get()
+        ```
+    """
+
+    def __init__(self):
+        self._subscribers: List[asyncio.Queue] = []
+
+    def subscribe(self) -> "asyncio.Queue[T]":
+        """Start receiving messages published from now on"""
+        queue: asyncio.Queue = asyncio.Queue()
+        self._subscribers.append(queue)
+        return queue
+
+    def unsubscribe(self, queue: "asyncio.Queue[T]") -> None:
+        """Stop delivering messages to a subscriber queue"""
+        if queue in self._subscribers:
+            self._subscribers.remove(queue)
+
+    def publish(self, message: T) -> None:
+        """Deliver a message to every current subscriber"""
+        for queue in self._subscribers:
+            queue.put_nowait(message)
@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+import base64
+import json
+import os
+import re
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional
+
+if TYPE_CHECKING:
+    from playwright.async_api import BrowserContext
+
+RECORD = "record"
+REPLAY = "replay"
+
+# Header and cookie values that hold session tokens are blanked outright
+SCRUBBED = "[scrubbed]"
+SECRET_HEADERS = {"authorization", "cookie", "set-cookie", "x-csrf-token"}
+
+TEXT_MIME_PATTERN = re.compile(r"^text/|json|javascript|xml|x-www-form-urlencoded")
+
+
+def _compile(replacements: Dict[str, str]) -> Optional[re.Pattern]:
+    """Match any value to scrub, longest first, but never inside a longer word"""
+    values = sorted((v for v in replacements if v), key=len, reverse=True)
+    if not values:
+        return None
+    alternatives = "|".join(re.escape(v) for v in values)
+    return re.compile(rf"(?<![0-9A-Za-z])(?:{alternatives})(?![0-9A-Za-z])")
+
+
+def scrub_text(text: str, pattern: Optional[re.Pattern], replacements: Dict[str, str]):
+    """Replace every sensitive value in text with its stand-in"""
+    if pattern is None or not text:
+        return text
+    return pattern.sub(lambda m: replacements[m.group(0)], text)
+
+
+def scrub_har(har: Dict[str, Any], replacements: Dict[str, str]) -> Dict[str, Any]:
+    """
+    Remove credentials and patient details from a recorded HAR in place.
+
+    Every string in the archive has the sensitive values in ``replacements``
+    swapped for their stand-ins, including text response bodies stored as
+    base64. Token-bearing headers and cookies are blanked. A request body
+    that contained a sensitive value is moved to ``_postData`` so that
+    ``route_from_har`` matches the request on URL and method alone, since
+    replayed requests carry different secrets and 2FA codes.
+    """
+    pattern = _compile(replacements)
+
+    def scrub(text: str) -> str:
+        return scrub_text(text, pattern, replacements)
+
+    for entry in har.get("log", {}).get("entries", []):
+        request = entry.get("request", {})
+        response = entry.get("response", {})
+        for message in (request, response):
+            scrub_headers(message, scrub)
+            scrub_cookies(message)
+        scrub_query_string(request, scrub)
+        scrub_post_data(request, scrub)
+        scrub_content(response.get("content", {}), scrub)
+
+    # Anything else, such as page titles and redirect URLs
+    har["log"] = _scrub_strings(har.get("log", {}), scrub)
+    return har
+
+
+def _scrub_strings(value: Any, scrub: Callable[[str], str]) -> Any:
+    """A copy of a JSON value with ``scrub`` applied to every string in it"""
+    if isinstance(value, str):
+        return scrub(value)
+    if isinstance(value, list):
+        return [_scrub_strings(item, scrub) for item in value]
+    if isinstance(value, dict):
+        return {key: _scrub_strings(item, scrub) for key, item in value.items()}
+    return value
+
+
+def scrub_headers(message: Dict[str, Any], scrub: Callable[[str], str]) -> None:
+    """Blank token-bearing headers of a request or response and scrub the rest"""
+    for header in message.get("headers", []):
+        if header.get("name", "").lower() in SECRET_HEADERS:
+            header["value"] = SCRUBBED
+        else:
+            header["value"] = scrub(header.get("value", ""))
+
+
+def scrub_cookies(message: Dict[str, Any]) -> None:
+    """Blank every cookie value of a request or response"""
+    for cookie in message.get("cookies", []):
+        cookie["value"] = SCRUBBED
+
+
+def scrub_query_string(request: Dict[str, Any], scrub: Callable[[str], str]) -> None:
+    """Scrub a request's URL and its parsed query string parameters"""
+    if "url" in request:
+        request["url"] = scrub(request["url"])
+    for param in request.get("queryString", []):
+        param["name"] = scrub(param.get("name", ""))
+        param["value"] = scrub(param.get("value", ""))
+
+
+def scrub_post_data(request: Dict[str, Any], scrub: Callable[[str], str]) -> None:
+    """Scrub a request body, moving it out of replay matching if it changed"""
+    post_data = request.get("postData")
+    if post_data:
+        scrubbed = _scrub_strings(post_data, scrub)
+        if scrubbed != post_data:
+            del request["postData"]
+            request["_postData"] = scrubbed
+
+
+def scrub_content(content: Dict[str, Any], scrub: Callable[[str], str]) -> None:
+    """Scrub a text response body, decoding it first if it is base64"""
+    if not content.get("text"):
+        return
+    if content.get("encoding") != "base64":
+        content["text"] = scrub(content["text"])
+    elif TEXT_MIME_PATTERN.search(content.get("mimeType", "")):
+        try:
+            text = base64.b64decode(content["text"]).decode("utf-8")
+        except (ValueError, UnicodeDecodeError):
+            return  # Not text after all; leave it as recorded
+        content["text"] = base64.b64encode(scrub(text).encode("utf-8")).decode("ascii")
+
+
+class HarArchive:
+    """
+    Per-provider HAR files for recording live traffic and replaying it offline.
+
+    In record mode each provider's browser context writes its traffic to
+    ``<directory>/<provider>.har``. The file is scrubbed with
+    ``scrub_har`` once the context closes. In replay mode the context
+    is served from that file through ``context.route_from_har`` and any
+    request not in the recording is aborted, so nothing reaches the network.
+
+    Example:
+        ```python
+        archive = HarArchive(Path("hars"), REPLAY)
+        context = await browser.new_context(**archive.context_options("QXR"))
+        await archive.attach(context, "QXR")
+        ```
+    """
+
+    def __init__(self, directory: Optional[Path] = None, mode: str = RECORD):
+        """
+        Args:
+            directory: Where the HAR files live. Defaults to "hars" in the
+                current working directory.
+            mode: RECORD to capture traffic or REPLAY to serve it back.
+        """
+        if mode not in (RECORD, REPLAY):
+            raise ValueError(f"HAR mode must be {RECORD!r} or {REPLAY!r}, not {mode!r}")
+        self.directory = directory or Path("hars")
+        self.mode = mode
+
+    @property
+    def recording(self) -> bool:
+        return self.mode == RECORD
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == REPLAY
+
+    def path(self, provider: str) -> Path:
+        safe_name = "".join(c if c.isalnum() or c in "-_" else "_" for c in provider)
+        return self.directory / f"{safe_name}.har"
+
+    def context_options(self, provider: str) -> Dict[str, Any]:
+        """Extra browser.new_context options for this provider"""
+        if not self.recording:
+            return {}
+        self.directory.mkdir(parents=True, exist_ok=True)
+        return {
+            "record_har_path": str(self.path(provider)),
+            "record_har_content": "embed",
+        }
+
+    async def attach(self, context: BrowserContext, provider: str) -> None:
+        """Serve the context from the provider's recording when replaying"""
+        if not self.replaying:
+            return
+        path = self.path(provider)
+        if not path.exists():
+            raise FileNotFoundError(
+                f"No HAR recording for {provider} at {path}; record one with --record-har"
+            )
+        await context.route_from_har(path, not_found="abort")
+
+    def scrub(self, provider: str, replacements: Dict[str, str]) -> None:
+        """Rewrite a finished recording without the sensitive values"""
+        path = self.path(provider)
+        if not self.recording or not path.exists():
+            return
+        har = scrub_har(json.loads(path.read_text(encoding="utf-8")), replacements)
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(har), encoding="utf-8")
+        os.replace(tmp_path, path)
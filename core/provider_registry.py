@@ -0,0 +1,248 @@
+import ast
+import importlib
+import inspect
+import json
+import os
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+MANIFEST_VERSION = 1
+
+# Session class attributes recorded in the manifest
+SESSION_FIELDS = ("name", "required_fields", "provider_group", "credentials_key")
+
+
+@dataclass
+class ProviderInfo:
+    """What the provider menu needs, plus where to import the provider from"""
+
+    name: str
+    group: str
+    required_fields: List[str]
+    credentials_key: str
+    module: str  # e.g. "providers.qxr"
+    session_class: str  # e.g. "QXRSession"
+    process_func: str  # e.g. "QXR_process"
+
+    def __post_init__(self):
+        self._loaded: Optional[Tuple[Callable, type]] = None
+
+    def load(self) -> Tuple[Callable, type]:
+        """Import the provider and return its process function and session class"""
+        if self._loaded is None:
+            module = importlib.import_module(self.module)
+            self._loaded = (
+                getattr(module, self.process_func),
+                getattr(module, self.session_class),
+            )
+        return self._loaded
+
+    @property
+    def process(self) -> Callable:
+        return self.load()[0]
+
+    @property
+    def session(self) -> type:
+        return self.load()[1]
+
+
+def _scan_source(path: Path, module: str) -> Optional[ProviderInfo]:
+    """Read a provider's details from its source without importing it"""
+    tree = ast.parse(path.read_text(encoding="utf-8"), str(path))
+    session_class, values, process_func = None, {}, None
+    for node in tree.body:
+        if (
+            isinstance(node, ast.ClassDef)
+            and node.name.endswith("Session")
+            and session_class is None
+        ):
+            session_class = node.name
+            for statement in node.body:
+                if (
+                    isinstance(statement, ast.Assign)
+                    and len(statement.targets) == 1
+                    and isinstance(statement.targets[0], ast.Name)
+                    and statement.targets[0].id in SESSION_FIELDS
+                ):
+                    try:
+                        value = ast.literal_eval(statement.value)
+                    except ValueError:
+                        continue
+                    values[statement.targets[0].id] = value
+        elif (
+            isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef))
+            and node.name.endswith("_process")
+            and process_func is None
+        ):
+            process_func = node.name
+    if session_class is None or process_func is None:
+        return None
+    if set(values) != set(SESSION_FIELDS):
+        raise ValueError("session details are not plain literals")
+    return ProviderInfo(
+        name=values["name"],
+        group=values["provider_group"],
+        required_fields=list(values["required_fields"]),
+        credentials_key=values["credentials_key"],
+        module=module,
+        session_class=session_class,
+        process_func=process_func,
+    )
+
+
+def _scan_module(module_name: str) -> Optional[ProviderInfo]:
+    """Import a provider to read its details (for sessions that compute them)"""
+    module = importlib.import_module(module_name)
+    session_class = next(
+        (
+            obj
+            for _, obj in inspect.getmembers(module, inspect.isclass)
+            if obj.__name__.endswith("Session") and obj.__module__ == module_name
+        ),
+        None,
+    )
+    process_func = next(
+        (
+            func
+            for _, func in inspect.getmembers(module, inspect.isfunction)
+            if func.__name__.endswith("_process")
+        ),
+        None,
+    )
+    if session_class is None or process_func is None:
+        return None
+    info = ProviderInfo(
+        name=session_class.name,
+        group=session_class.provider_group,
+        required_fields=list(session_class.required_fields),
+        credentials_key=session_class.credentials_key,
+        module=module_name,
+        session_class=session_class.__name__,
+        process_func=process_func.__name__,
+    )
+    info._loaded = (process_func, session_class)
+    return info
+
+
+class ProviderRegistry:
+    """
+    The available providers, listed without importing them.
+
+    Each ``providers/*.py`` file is read once for its ``*Session`` class
+    details (name, group, required fields, credentials key) and its
+    ``*_process`` function, and the results are cached in a manifest keyed
+    by each file's modification time and size. Later runs only stat the
+    files, so the provider menu is shown without importing Playwright or any
+    provider, and only the providers that are selected are imported (by
+    ``ProviderInfo.load``).
+
+    Details are read from the source when they are plain literals, as in
+    every current provider; otherwise the module is imported to read them.
+
+    Example:
+        ```python
+        registry = ProviderRegistry()
+        for name, info in registry.providers().items():
+            print(info.group, name, info.required_fields)
+        process, session_class = registry.providers()["QXR"].load()
+        ```
+    """
+
+    def __init__(
+        self,
+        providers_dir: Optional[Path] = None,
+        manifest_path: Optional[Path] = None,
+        package: str = "providers",
+    ):
+        """
+        Args:
+            providers_dir: Directory of provider modules, defaults to the
+                           providers package next to this one.
+            manifest_path: Cache file, defaults to
+                           <providers_dir>/__pycache__/registry.json.
+            package: Package the provider modules are imported from.
+        """
+        self.providers_dir = Path(
+            providers_dir or Path(__file__).parent.parent / "providers"
+        )
+        self.manifest_path = Path(
+            manifest_path or self.providers_dir / "__pycache__" / "registry.json"
+        )
+        self.package = package
+        self._stamps: Optional[Dict[str, List[int]]] = None
+        self._providers: Dict[str, ProviderInfo] = {}
+
+    def _current_stamps(self) -> Dict[str, List[int]]:
+        stamps = {}
+        for entry in os.scandir(self.providers_dir):
+            if entry.name.endswith(".py") and not entry.name.startswith("__"):
+                stat = entry.stat()
+                stamps[entry.name] = [stat.st_mtime_ns, stat.st_size]
+        return stamps
+
+    def _read_manifest(self) -> Dict[str, Any]:
+        try:
+            manifest = json.loads(self.manifest_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+        if manifest.get("version") != MANIFEST_VERSION:
+            return {}
+        return manifest.get("files", {})
+
+    def _write_manifest(self, files: Dict[str, Any]) -> None:
+        try:
+            self.manifest_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.manifest_path.with_name(self.manifest_path.name + ".tmp")
+            tmp_path.write_text(
+                json.dumps({"version": MANIFEST_VERSION, "files": files}, indent=2),
+                encoding="utf-8",
+            )
+            os.replace(tmp_path, self.manifest_path)
+        except OSError as e:
+            print(f"Could not save provider manifest: {e}")
+
+    def providers(self) -> Dict[str, ProviderInfo]:
+        """Every provider by display name, rescanning only changed files"""
+        stamps = self._current_stamps()
+        if stamps == self._stamps:
+            return dict(self._providers)
+
+        cached = self._read_manifest()
+        files: Dict[str, Any] = {}
+        changed = set(cached) != set(stamps)
+        for file_name, stamp in sorted(stamps.items()):
+            entry = cached.get(file_name)
+            if entry is None or entry["stamp"] != stamp:
+                entry = {"stamp": stamp, "provider": self._scan(file_name)}
+                changed = True
+            files[file_name] = entry
+        if changed:
+            self._write_manifest(files)
+
+        loaded = {info.module: info for info in self._providers.values()}
+        providers = {}
+        for entry in files.values():
+            if entry["provider"] is None:
+                continue
+            info = ProviderInfo(**entry["provider"])
+            previous = loaded.get(info.module)
+            if previous is not None and previous == info:
+                info = previous  # Keep the already imported module
+            providers[info.name] = info
+        self._stamps, self._providers = stamps, providers
+        return dict(providers)
+
+    def _scan(self, file_name: str) -> Optional[Dict[str, Any]]:
+        module = f"{self.package}.{file_name[:-3]}"
+        try:
+            try:
+                info = _scan_source(self.providers_dir / file_name, module)
+            except (SyntaxError, ValueError):
+                info = _scan_module(module)
+        except Exception as e:
+            print(f"Error loading provider {file_name[:-3]}: {e}")
+            return None
+        if info is None:
+            return None
+        return asdict(info)
@@ -0,0 +1,268 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+LEDGER_NAME = "retention.json"
+MB = 1024 * 1024
+
+
+@dataclass
+class CaptureEntry:
+    """Files that belong to one capture and the shared objects it uses"""
+
+    provider: str
+    accessed: float
+    files: Dict[str, int] = field(default_factory=dict)  # Relative path -> bytes
+    objects: List[str] = field(default_factory=list)  # Relative object paths
+    duplicate_of: Optional[str] = None  # Capture whose files this one links to
+
+
+class RetentionManager:
+    """
+    Keeps the capture directory within a disk budget.
+
+    Every capture is recorded in a ledger (``<root>/retention.json``) when
+    it is written, so limits are enforced without walking the directory
+    tree. Captures are kept in least-recently-used order; linking a
+    near-duplicate to a capture, or calling ``touch``, counts as a use. After
+    each new capture the oldest captures are evicted until:
+
+    - nothing is older than ``max_age_days`` since it was last used,
+    - each provider is within its quota, and
+    - the whole directory is within ``max_total_bytes``.
+
+    Objects in a ``CaptureStore`` are shared between captures, so they are
+    reference counted and deleted once no remaining capture uses them. A
+    shared object counts towards the quota of every provider that uses it,
+    but only once towards the total. A near-duplicate capture only links to
+    the files of the capture it duplicates, so it is evicted along with it.
+
+    All methods are thread-safe and are normally called from the capture
+    writer thread. Hold ``lock`` while writing objects that ``add`` will
+    reference, so an eviction cannot delete a shared object in between.
+
+    Example:
+        ```python
+        retention = RetentionManager(
+            Path("screen_shots_data"),
+            max_total_bytes=2048 * MB,
+            provider_quotas={"qxr": 256 * MB},
+            max_age_days=30,
+        )
+        retention.add(metadata_path, "qxr", [metadata_path, png_path], [])
+        ```
+    """
+
+    def __init__(
+        self,
+        root: Optional[Path] = None,
+        max_total_bytes: Optional[int] = None,
+        provider_quotas: Optional[Dict[str, int]] = None,
+        default_provider_quota: Optional[int] = None,
+        max_age_days: Optional[float] = None,
+    ):
+        """
+        Args:
+            root: Capture directory. Defaults to "screen_shots_data".
+            max_total_bytes: Budget for all captures together (None for no limit).
+            provider_quotas: Byte limits per provider directory name.
+            default_provider_quota: Limit for providers not in provider_quotas.
+            max_age_days: Captures unused for longer than this are removed.
+        """
+        self.root = root or Path("screen_shots_data")
+        self.max_total_bytes = max_total_bytes
+        self.provider_quotas = dict(provider_quotas or {})
+        self.default_provider_quota = default_provider_quota
+        self.max_age_seconds = max_age_days * 86400 if max_age_days else None
+        self.lock = threading.RLock()
+        self._entries: Optional["OrderedDict[str, CaptureEntry]"] = None
+        self._object_sizes: Dict[str, int] = {}
+        self._object_refs: Dict[str, int] = defaultdict(int)
+        self._provider_refs: Dict[str, Dict[str, int]] = defaultdict(
+            lambda: defaultdict(int)
+        )
+        self._provider_bytes: Dict[str, int] = defaultdict(int)
+        self.total_bytes = 0
+
+    @property
+    def ledger_path(self) -> Path:
+        return self.root / LEDGER_NAME
+
+    def _key(self, path: Path) -> str:
+        try:
+            return Path(path).relative_to(self.root).as_posix()
+        except ValueError:
+            return Path(path).as_posix()
+
+    def _load(self) -> "OrderedDict[str, CaptureEntry]":
+        """Read the ledger once; later changes are kept in memory and saved"""
+        if self._entries is None:
+            self._entries = OrderedDict()
+            try:
+                data = json.loads(self.ledger_path.read_text(encoding="utf-8"))
+            except FileNotFoundError:
+                data = {}
+            except (OSError, ValueError) as e:
+                print(f"Ignoring unreadable capture ledger: {e}")
+                data = {}
+            self._object_sizes = dict(data.get("objects", {}))
+            captures = sorted(
+                data.get("captures", {}).items(), key=lambda item: item[1]["accessed"]
+            )
+            for key, values in captures:
+                self._track(key, CaptureEntry(**values))
+        return self._entries
+
+    def _save(self) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        data = {
+            "captures": {key: asdict(entry) for key, entry in self._entries.items()},
+            "objects": self._object_sizes,
+        }
+        tmp_path = self.ledger_path.with_name(LEDGER_NAME + ".tmp")
+        tmp_path.write_text(json.dumps(data), encoding="utf-8")
+        os.replace(tmp_path, self.ledger_path)
+
+    def _track(self, key: str, entry: CaptureEntry) -> None:
+        self._entries[key] = entry
+        owned = sum(entry.files.values())
+        self.total_bytes += owned
+        self._provider_bytes[entry.provider] += owned
+        provider_refs = self._provider_refs[entry.provider]
+        for obj in entry.objects:
+            size = self._object_sizes.get(obj, 0)
+            if self._object_refs[obj] == 0:
+                self.total_bytes += size
+            self._object_refs[obj] += 1
+            if provider_refs[obj] == 0:
+                self._provider_bytes[entry.provider] += size
+            provider_refs[obj] += 1
+
+    def _evict(self, key: str) -> List[str]:
+        """Remove a capture and its linked duplicates, returning their keys"""
+        entry = self._entries.pop(key)
+        owned = sum(entry.files.values())
+        self.total_bytes -= owned
+        self._provider_bytes[entry.provider] -= owned
+        for relative in entry.files:
+            (self.root / relative).unlink(missing_ok=True)
+
+        provider_refs = self._provider_refs[entry.provider]
+        for obj in entry.objects:
+            size = self._object_sizes.get(obj, 0)
+            provider_refs[obj] -= 1
+            if provider_refs[obj] == 0:
+                del provider_refs[obj]
+                self._provider_bytes[entry.provider] -= size
+            self._object_refs[obj] -= 1
+            if self._object_refs[obj] == 0:
+                del self._object_refs[obj]
+                self._object_sizes.pop(obj, None)
+                self.total_bytes -= size
+                (self.root / obj).unlink(missing_ok=True)
+
+        evicted = [key]
+        for duplicate in [k for k, e in self._entries.items() if e.duplicate_of == key]:
+            evicted += self._evict(duplicate)
+        return evicted
+
+    def add(
+        self,
+        capture: Path,
+        provider: str,
+        files: Iterable[Path],
+        objects: Iterable[Path] = (),
+        duplicate_of: Optional[Path] = None,
+    ) -> List[Path]:
+        """
+        Record a capture that has just been written and enforce the limits.
+
+        Args:
+            capture: The capture's metadata file, used as its identifier.
+            provider: Provider directory name, for per-provider quotas.
+            files: Files that belong only to this capture.
+            objects: Shared store objects the capture uses.
+            duplicate_of: Metadata file of the capture whose files this one
+                          links to. That capture counts as used, and this one
+                          is evicted with it (straight away if it is gone).
+
+        Returns:
+            The metadata paths of evicted captures.
+        """
+        with self.lock:
+            self._load()
+            entry = CaptureEntry(provider=provider, accessed=time.time())
+            for path in files:
+                entry.files[self._key(path)] = Path(path).stat().st_size
+            for path in objects:
+                obj = self._key(path)
+                if obj not in self._object_sizes:
+                    self._object_sizes[obj] = Path(path).stat().st_size
+                entry.objects.append(obj)
+            key = self._key(capture)
+            evicted = []
+            if key in self._entries:
+                evicted += self._evict(key)[1:]  # The capture itself is re-added
+            self._track(key, entry)
+            if duplicate_of is not None:
+                entry.duplicate_of = self._key(duplicate_of)
+                if entry.duplicate_of in self._entries:
+                    self._use(entry.duplicate_of)
+                else:
+                    evicted += self._evict(key)
+            evicted += self._enforce()
+            self._save()
+            return [self.root / key for key in evicted]
+
+    def touch(self, capture: Path) -> None:
+        """Mark a capture as used so it is evicted last"""
+        with self.lock:
+            entries = self._load()
+            key = self._key(capture)
+            if key in entries:
+                self._use(key)
+                self._save()
+
+    def _use(self, key: str) -> None:
+        self._entries[key].accessed = time.time()
+        self._entries.move_to_end(key)
+
+    def quota(self, provider: str) -> Optional[int]:
+        return self.provider_quotas.get(provider, self.default_provider_quota)
+
+    def _enforce(self) -> List[str]:
+        """Evict oldest-first until every limit holds"""
+        evicted = []
+        if self.max_age_seconds is not None:
+            cutoff = time.time() - self.max_age_seconds
+            while self._entries:
+                key, entry = next(iter(self._entries.items()))
+                if entry.accessed >= cutoff:
+                    break
+                evicted += self._evict(key)
+
+        for provider in list(self._provider_bytes):
+            evicted += self._enforce_quota(provider)
+
+        if self.max_total_bytes is not None:
+            while self._entries and self.total_bytes > self.max_total_bytes:
+                key = next(iter(self._entries))
+                evicted += self._evict(key)
+        return evicted
+
+    def _enforce_quota(self, provider: str) -> List[str]:
+        """Evict a provider's oldest captures until it is within its quota"""
+        quota = self.quota(provider)
+        evicted = []
+        # Entries are in access order, so the first match is the oldest
+        for key in [k for k, e in self._entries.items() if e.provider == provider]:
+            if quota is None or self._provider_bytes[provider] <= quota:
+                break
+            if key in self._entries:  # Not already gone with its original
+                evicted += self._evict(key)
+        return evicted
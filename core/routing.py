@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field, replace
+from typing import TYPE_CHECKING, FrozenSet, List, Optional, Pattern, Tuple, Union
+
+if TYPE_CHECKING:
+    from playwright.async_api import BrowserContext, Route
+
+# Analytics and marketing beacons. They are answered with an empty response
+# rather than aborted, so page scripts that wait on them carry on normally.
+TRACKER_PATTERNS: Tuple[str, ...] = (
+    r"^https?://([^/]+\.)?google-analytics\.com/",
+    r"^https?://([^/]+\.)?googletagmanager\.com/",
+    r"^https?://([^/]+\.)?doubleclick\.net/",
+    r"^https?://([^/]+\.)?googleadservices\.com/",
+    r"^https?://([^/]+\.)?facebook\.(net|com)/(tr|signals|en_US/fbevents)",
+    r"^https?://([^/]+\.)?hotjar\.(com|io)/",
+    r"^https?://([^/]+\.)?clarity\.ms/",
+    r"^https?://([^/]+\.)?linkedin\.com/(px|li/track)",
+    r"^https?://([^/]+\.)?nr-data\.net/",
+    r"^https?://([^/]+\.)?segment\.(com|io)/",
+)
+
+# File extensions of the resource types that can be blocked. Routes are only
+# registered for URLs that might be blocked or stubbed: once a context has a
+# route, every request it matches makes a round trip through the Python
+# driver, and Chromium's HTTP cache is disabled for the context.
+RESOURCE_TYPE_EXTENSIONS = {
+    "font": ("woff2?", "ttf", "otf", "eot"),
+    "image": ("png", "jpe?g", "gif", "webp", "avif", "svg", "ico", "bmp"),
+    "media": ("mp4", "webm", "ogg", "ogv", "mp3", "m4a", "wav", "mov", "m3u8"),
+}
+
+STUB_CONTENT_TYPES = {
+    "script": "application/javascript",
+    "stylesheet": "text/css",
+    "xhr": "application/json",
+    "fetch": "application/json",
+}
+
+
+def _compile(patterns: Tuple[str, ...]) -> Optional[Pattern]:
+    return re.compile("|".join(f"(?:{p})" for p in patterns)) if patterns else None
+
+
+@dataclass(frozen=True)
+class RoutingProfile:
+    """
+    Declarative network filter applied to a session's browser context.
+
+    Every request is checked in order:
+
+    1. ``stub_url_patterns`` - answered locally with an empty 200 response.
+    2. ``allow_url_patterns`` - regexes matched against the request URL and
+       the URL of the frame that made it - and ``allow_frame_patterns``,
+       matched against the frame URL only. Matches are never blocked, so
+       pages that are handed to the user keep their images and fonts.
+    3. ``block_url_patterns`` and ``block_resource_types`` (Playwright
+       resource types such as "image", "font", "media") - aborted.
+
+    Anything else falls through to any other route handlers on the context
+    and then to the network.
+
+    Only requests that could be stubbed or blocked are routed at all: URLs
+    matching the stub and block patterns, and URLs with the file extensions
+    of the blocked resource types (see ``RESOURCE_TYPE_EXTENSIONS``). An
+    image served without an image extension is therefore not blocked.
+    Routing still disables Chromium's HTTP cache for the context, so
+    sessions have no profile unless their provider sets one.
+
+    Example:
+        ```python
+        profile = DEFAULT_ROUTING_PROFILE.extend(
+            block_resource_types={"image", "font"},
+            allow_url_patterns=[r"^https://portal\\.example/results"],
+        )
+        await profile.apply(context)
+        ```
+    """
+
+    block_resource_types: FrozenSet[str] = frozenset()
+    block_url_patterns: Tuple[str, ...] = ()
+    stub_url_patterns: Tuple[str, ...] = ()
+    allow_url_patterns: Tuple[str, ...] = ()
+    allow_frame_patterns: Tuple[str, ...] = ()
+    _matchers: Tuple[Optional[Pattern], ...] = field(
+        init=False, repr=False, compare=False
+    )
+
+    def __post_init__(self):
+        object.__setattr__(
+            self, "block_resource_types", frozenset(self.block_resource_types)
+        )
+        for name in (
+            "block_url_patterns",
+            "stub_url_patterns",
+            "allow_url_patterns",
+            "allow_frame_patterns",
+        ):
+            object.__setattr__(self, name, tuple(getattr(self, name)))
+        object.__setattr__(
+            self,
+            "_matchers",
+            (
+                _compile(self.allow_url_patterns),
+                _compile(self.allow_frame_patterns),
+                _compile(self.stub_url_patterns),
+                _compile(self.block_url_patterns),
+            ),
+        )
+
+    def extend(self, **additions) -> "RoutingProfile":
+        """Return a copy with extra resource types and patterns added"""
+        changes = {}
+        for name, values in additions.items():
+            current = getattr(self, name)
+            if isinstance(current, frozenset):
+                changes[name] = current | frozenset(values)
+            else:
+                changes[name] = current + tuple(values)
+        return replace(self, **changes)
+
+    @property
+    def is_empty(self) -> bool:
+        return not (
+            self.block_resource_types
+            or self.block_url_patterns
+            or self.stub_url_patterns
+        )
+
+    def decide(self, url: str, resource_type: str, frame_url: str = "") -> str:
+        """Return "allow", "stub" or "block" for a request"""
+        allow, allow_frame, stub, block = self._matchers
+        if stub and stub.search(url):
+            return "stub"
+        if allow and (allow.search(url) or (frame_url and allow.search(frame_url))):
+            return "allow"
+        if allow_frame and frame_url and allow_frame.search(frame_url):
+            return "allow"
+        if resource_type in self.block_resource_types or (block and block.search(url)):
+            return "block"
+        return "allow"
+
+    async def handle(self, route: Route) -> None:
+        """Route handler registered on the context"""
+        request = route.request
+        try:
+            frame_url = request.frame.url
+        except Exception:  # Service worker requests have no frame
+            frame_url = ""
+
+        action = self.decide(request.url, request.resource_type, frame_url)
+        if action == "stub":
+            await route.fulfill(
+                status=200,
+                body="",
+                content_type=STUB_CONTENT_TYPES.get(
+                    request.resource_type, "text/plain"
+                ),
+            )
+        elif action == "block":
+            await route.abort("blockedbyclient")
+        else:
+            await route.fallback()  # Let other handlers (or the network) serve it
+
+    def route_patterns(self) -> List[Union[str, Pattern]]:
+        """URL matchers the handler is registered for"""
+        if self.is_empty:
+            return []
+        patterns: List[Union[str, Pattern]] = []
+        urls = _compile(self.stub_url_patterns + self.block_url_patterns)
+        if urls:
+            patterns.append(urls)
+        extensions = []
+        for resource_type in sorted(self.block_resource_types):
+            if resource_type not in RESOURCE_TYPE_EXTENSIONS:
+                return ["**/*"]  # Only the request itself can tell its type
+            extensions.extend(RESOURCE_TYPE_EXTENSIONS[resource_type])
+        if extensions:
+            patterns.append(
+                re.compile(rf"\.(?:{'|'.join(extensions)})(?:[?#]|$)", re.IGNORECASE)
+            )
+        return patterns
+
+    async def apply(self, context: BrowserContext) -> None:
+        """Filter every page (including popups) opened in this context"""
+        for pattern in self.route_patterns():
+            await context.route(pattern, self.handle)
+
+
+# Safe for any provider: drop audio/video and silence analytics beacons, but
+# leave images, fonts and stylesheets so pages look as the user expects
+DEFAULT_ROUTING_PROFILE = RoutingProfile(
+    block_resource_types={"media"},
+    stub_url_patterns=TRACKER_PATTERNS,
+)
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import json
+import os
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+if TYPE_CHECKING:
+    from cryptography.fernet import Fernet
+
+KEY_ENV_VAR = "SESSION_CACHE_KEY"
+
+
+class StorageStateCache:
+    """
+    Encrypted on-disk cache of Playwright storage state per provider.
+
+    After a successful login a session's cookies and localStorage
+    (``context.storage_state()``) are written to ``<cache_dir>/<key>.bin``
+    together with the URL reached after login. Files are encrypted with
+    Fernet using the key in the ``SESSION_CACHE_KEY`` environment variable,
+    or a key generated on first use and stored in ``<cache_dir>/.key`` with
+    owner-only permissions.
+
+    Example:
+        ```python
+        cache = StorageStateCache()
+        cache.save("QXR", await context.storage_state(), page.url)
+        entry = cache.load("QXR")  # {"storage_state": ..., "search_url": ...}
+        ```
+    """
+
+    def __init__(self, cache_dir: Optional[Path] = None, max_age_hours: float = 12):
+        """
+        Args:
+            cache_dir: Directory for encrypted state files. Defaults to
+                ".session_cache" in the current working directory.
+            max_age_hours: Entries older than this are ignored and removed.
+        """
+        self.cache_dir = cache_dir or Path(".session_cache")
+        self.max_age_seconds = max_age_hours * 3600
+        self._fernet: Optional[Fernet] = None
+
+    def _cipher(self) -> Fernet:
+        """Load or create the encryption key"""
+        if self._fernet is None:
+            from cryptography.fernet import Fernet  # Only needed with --cache-logins
+
+            key = os.environ.get(KEY_ENV_VAR)
+            if key is None:
+                self.cache_dir.mkdir(parents=True, exist_ok=True)
+                key_path = self.cache_dir / ".key"
+                if not key_path.exists():
+                    fd = os.open(key_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+                    with os.fdopen(fd, "wb") as f:
+                        f.write(Fernet.generate_key())
+                key = key_path.read_bytes().strip()
+            self._fernet = Fernet(key)
+        return self._fernet
+
+    def _path(self, key: str) -> Path:
+        safe_key = "".join(c if c.isalnum() or c in "-_" else "_" for c in key)
+        return self.cache_dir / f"{safe_key}.bin"
+
+    def save(
+        self, key: str, storage_state: Dict[str, Any], search_url: Optional[str]
+    ) -> None:
+        """Encrypt and store the storage state for a provider"""
+        payload = json.dumps(
+            {
+                "storage_state": storage_state,
+                "search_url": search_url,
+                "saved_at": time.time(),
+            }
+        ).encode("utf-8")
+        token = self._cipher().encrypt(payload)
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        path = self._path(key)
+        tmp_path = path.with_suffix(".tmp")
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "wb") as f:
+            f.write(token)
+        os.replace(tmp_path, path)
+
+    def load(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached entry for a provider, or None if missing or stale"""
+        path = self._path(key)
+        if not path.exists():
+            return None
+
+        from cryptography.fernet import InvalidToken
+
+        try:
+            entry = json.loads(self._cipher().decrypt(path.read_bytes()))
+        except (InvalidToken, ValueError) as e:
+            print(f"Discarding unreadable session cache for {key}: {e}")
+            self.discard(key)
+            return None
+
+        if time.time() - entry.get("saved_at", 0) > self.max_age_seconds:
+            self.discard(key)
+            return None
+        return entry
+
+    def discard(self, key: str) -> None:
+        """Remove the cached entry for a provider"""
+        self._path(key).unlink(missing_ok=True)
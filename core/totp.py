@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import asyncio
+import base64
+import binascii
+import time
+from typing import TYPE_CHECKING, Callable, List, Optional
+
+if TYPE_CHECKING:
+    from playwright.async_api import Locator
+
+# Codes with less validity left than this are not submitted; the next one is
+DEFAULT_MIN_REMAINING = 5.0
+
+
+class TotpCode:
+    """
+    Time-based 2FA codes, entered so they do not expire on the way.
+
+    A code is generated at the moment it is filled in, not when the login
+    form is first reached, so page loads do not eat into its 30 second
+    window. If fewer than ``min_remaining`` seconds of the window are left,
+    the next window's code is waited for instead, as a code submitted that
+    late is often rejected by the time the portal checks it. A rejected code
+    is retried once, with the next window's code. Every code entered is kept
+    in ``submitted``.
+
+    Example:
+        ```python
+        totp = TotpCode(credentials.totp_secret)
+        await totp.submit(
+            page.get_by_placeholder("Authentication Code"),
+            page.get_by_role("button", name="Submit"),
+        )
+        ```
+    """
+
+    def __init__(
+        self,
+        secret: Optional[str],
+        min_remaining: float = DEFAULT_MIN_REMAINING,
+        interval: int = 30,
+        clock: Callable[[], float] = time.time,
+    ):
+        """
+        Args:
+            secret: Base32 TOTP secret from the provider's credentials.
+                    ValueError is raised if it is missing or not base32.
+            min_remaining: Seconds a code must stay valid for to be submitted.
+            interval: Length of each code's window in seconds.
+            clock: Current Unix time.
+        """
+        if not secret:
+            raise ValueError("A TOTP secret is required for 2FA")
+        try:
+            base64.b32decode(secret + "=" * (-len(secret) % 8), casefold=True)
+        except binascii.Error:
+            # Raised here, before a login fills anything in with a bad code
+            raise ValueError("The TOTP secret for 2FA is not valid base32") from None
+        self.secret = secret
+        self.min_remaining = min(min_remaining, interval)
+        self.interval = interval
+        self.clock = clock
+        self.submitted: List[str] = []
+
+    def code(self, at: Optional[float] = None) -> str:
+        """The code for the window containing ``at`` (default now)"""
+        import pyotp  # Only needed by TOTP providers
+
+        totp = pyotp.TOTP(self.secret, interval=self.interval)
+        return totp.at(self.clock() if at is None else at)
+
+    def remaining(self, at: Optional[float] = None) -> float:
+        """Seconds until the window containing ``at`` (default now) ends"""
+        at = self.clock() if at is None else at
+        return self.interval - at % self.interval
+
+    async def fresh_code(self) -> str:
+        """A code with at least ``min_remaining`` seconds of validity left"""
+        remaining = self.remaining()
+        if remaining < self.min_remaining:
+            print(f"2FA code expires in {remaining:.0f}s, waiting for the next one")
+        return await self._code_after(None)
+
+    async def next_code(self, used: str) -> str:
+        """A fresh code from a later window than ``used``"""
+        return await self._code_after(used)
+
+    async def _code_after(self, used: Optional[str]) -> str:
+        while True:
+            now = self.clock()  # Read once, so the code and its window agree
+            remaining = self.remaining(now)
+            code = self.code(now)
+            if code != used and remaining >= self.min_remaining:
+                return code
+            # Until the window ends; the clock may land a hair before it
+            await asyncio.sleep(max(remaining, 0.01))
+
+    async def submit(
+        self, field: Locator, button: Locator, confirm_timeout: float = 10.0
+    ) -> str:
+        """
+        Fill in a fresh code and submit it, retrying once with the next code
+        if the portal rejects it.
+
+        A code counts as accepted once ``field`` is hidden (the portal has
+        moved on), and as rejected if it is still shown after
+        ``confirm_timeout`` seconds.
+
+        Returns:
+            The code that was accepted.
+
+        Raises:
+            RuntimeError: If both codes are rejected.
+        """
+        code = await self.fresh_code()
+        for attempt in range(2):
+            self.submitted.append(code)
+            await field.fill(code)
+            await button.click()
+            if await self._accepted(field, confirm_timeout):
+                return code
+            if attempt == 0:
+                print("2FA code was rejected, retrying with the next code")
+                code = await self.next_code(code)
+        raise RuntimeError("2FA code was rejected twice")
+
+    @staticmethod
+    async def _accepted(field: Locator, timeout: float) -> bool:
+        # Imported on first use; Playwright is slow to import
+        from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+        try:
+            await field.wait_for(state="hidden", timeout=timeout * 1000)
+        except PlaywrightTimeoutError:
+            return False
+        return True
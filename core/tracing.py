@@ -0,0 +1,212 @@
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import math
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+DEFAULT_TRACE_PATH = Path("traces/trace.jsonl")
+
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+_span_ids = itertools.count(1)
+
+
+class Span:
+    """One timed phase; nested spans record their parent's id"""
+
+    def __init__(self, provider: Optional[str], phase: str, attrs: Dict[str, Any]):
+        parent = _current_span.get()
+        self.span_id = f"{int(time.time() * 1000):x}-{next(_span_ids)}"
+        self.parent_id = parent.span_id if parent else None
+        self.provider = provider or (parent.provider if parent else None)
+        self.phase = phase
+        self.attrs = attrs
+        self.wall_start = time.time()
+        self.start = time.monotonic()
+        self.end: Optional[float] = None
+        self.outcome = "ok"
+        self.error: Optional[str] = None
+
+    def to_record(self) -> Dict[str, Any]:
+        record = {
+            "provider": self.provider,
+            "phase": self.phase,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "wall_start": round(self.wall_start, 3),
+            "start": self.start,
+            "end": self.end,
+            "duration": round(self.end - self.start, 4),
+            "outcome": self.outcome,
+        }
+        if self.error:
+            record["error"] = self.error
+        record.update(self.attrs)
+        return record
+
+
+class Tracer:
+    """
+    Records how long each session phase takes to a rotating JSONL file.
+
+    Spans nest through a context variable, so a span opened inside another
+    (for example a 2FA wait inside login) records its parent and inherits
+    the provider name. Each provider task runs in its own copy of the
+    context, so concurrent sessions never see each other's spans.
+
+    Example:
+        ```python
+        tracer = Tracer()
+        with tracer.span("QXR", "login"):
+            with tracer.span(None, "navigate", url=url):
+                await page.goto(url)
+        ```
+    """
+
+    def __init__(
+        self,
+        path: Optional[Path] = None,
+        max_bytes: int = 5 * 1024 * 1024,
+        backup_count: int = 3,
+    ):
+        """
+        Args:
+            path: Trace file, defaults to traces/trace.jsonl.
+            max_bytes: Size at which the file is rotated to trace.jsonl.1.
+            backup_count: Number of rotated files to keep.
+        """
+        self.path = Path(path or DEFAULT_TRACE_PATH)
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self._handler: Optional[RotatingFileHandler] = None
+
+    def _write(self, record: Dict[str, Any]) -> None:
+        if self._handler is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._handler = RotatingFileHandler(
+                self.path,
+                maxBytes=self.max_bytes,
+                backupCount=self.backup_count,
+                encoding="utf-8",
+            )
+        line = json.dumps(record, default=str)
+        self._handler.handle(logging.makeLogRecord({"msg": line}))
+
+    @contextmanager
+    def span(self, provider: Optional[str], phase: str, **attrs) -> Iterator[Span]:
+        """Time the enclosed block and write it to the trace when it ends"""
+        span = Span(provider, phase, attrs)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except asyncio.CancelledError:
+            span.outcome = "cancelled"
+            raise
+        except Exception as e:
+            span.outcome = "error"
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            span.end = time.monotonic()
+            _current_span.reset(token)
+            try:
+                self._write(span.to_record())
+            except OSError as e:
+                print(f"Could not write trace: {e}")
+
+    def close(self) -> None:
+        if self._handler is not None:
+            self._handler.close()
+            self._handler = None
+
+
+def read_trace(path: Path) -> Iterator[Dict[str, Any]]:
+    """Yield span records from a trace file and its rotated backups"""
+    path = Path(path)
+    backups = sorted(
+        path.parent.glob(f"{path.name}.*"),
+        key=lambda p: int(p.suffix[1:]) if p.suffix[1:].isdigit() else 0,
+        reverse=True,
+    )
+    for trace_file in [*backups, path]:
+        if not trace_file.exists():
+            continue
+        with trace_file.open(encoding="utf-8") as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # Partially written line from an interrupted run
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a non-empty list"""
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarise(
+    records: Iterable[Dict[str, Any]],
+) -> List[Tuple[str, str, int, float, float, int]]:
+    """Rows of (provider, phase, count, p50, p95, errors) sorted by name"""
+    durations: Dict[Tuple[str, str], List[float]] = defaultdict(list)
+    errors: Dict[Tuple[str, str], int] = defaultdict(int)
+    for record in records:
+        key = (record.get("provider") or "-", record.get("phase", "?"))
+        durations[key].append(record.get("duration", 0.0))
+        if record.get("outcome") == "error":
+            errors[key] += 1
+
+    return [
+        (
+            provider,
+            phase,
+            len(values),
+            percentile(values, 50),
+            percentile(values, 95),
+            errors[(provider, phase)],
+        )
+        for (provider, phase), values in sorted(durations.items())
+    ]
+
+
+def print_summary(rows: List[Tuple[str, str, int, float, float, int]]) -> None:
+    """Print summarise() rows as a table"""
+    print(
+        f"{'Provider':<18}{'Phase':<20}{'Count':>6}{'p50 s':>9}{'p95 s':>9}{'Errors':>8}"
+    )
+    for provider, phase, count, p50, p95, error_count in rows:
+        print(
+            f"{provider:<18}{phase:<20}{count:>6}{p50:>9.2f}{p95:>9.2f}{error_count:>8}"
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Summarise session phase timings from a trace file"
+    )
+    parser.add_argument("path", nargs="?", type=Path, default=DEFAULT_TRACE_PATH)
+    parser.add_argument("--provider", help="Only show this provider")
+    args = parser.parse_args(argv)
+
+    records = read_trace(args.path)
+    if args.provider:
+        records = (r for r in records if r.get("provider") == args.provider)
+    rows = summarise(records)
+    if not rows:
+        print(f"No spans found in {args.path}")
+        return
+
+    print_summary(rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,21 @@
 import argparse
 import asyncio
-import importlib
-import inspect
-import json
-import queue
-import threading
+from datetime import datetime
 from pathlib import Path
 
-from models import PatientDetails, SharedState
-from utils import input_thread, process_inputs
+from batch import read_patients, run_batch
+from core import (
+    CAPTURE_PROFILES,
+    BrowserPool,
+    CaptureIndex,
+    HarArchive,
+    ProviderRegistry,
+    RetentionManager,
+    StorageStateCache,
+    Tracer,
+)
+from models import CredentialsStore, PatientDetails, SharedState
+from utils import ConsoleReader, process_inputs
 
 
 # ANSI color codes
@@ -20,94 +27,51 @@ class Colors:
     RESET = "\033[0m"  # Reset to default color
 
 
+# Provider details are cached in a manifest; modules load once selected
+PROVIDER_REGISTRY = ProviderRegistry(Path(__file__).parent / "providers")
+
+
 def print_error(message):
     """Print an error message in bright red"""
     print(f"\n{Colors.RED}{message}{Colors.RESET}")
 
 
 def load_credentials():
-    """Load credentials from credentials.json"""
+    """The credentials store, or None (after explaining why) if it is unusable"""
+    store = CredentialsStore.for_path("credentials.json")
     try:
-        with open("credentials.json", "r") as f:
-            return json.load(f)
+        store.data()  # Parsed once, then only re-read when the file changes
+        return store
     except FileNotFoundError:
         print_error(
             "❌ credentials.json not found. Please copy rename_to_credentials.json to credentials.json and configure it."
         )
-        return {}
-    except json.JSONDecodeError:
+        return None
+    except ValueError:
         print_error("❌ Error parsing credentials.json. Please check the file format.")
-        return {}
+        return None
 
 
 def load_providers():
-    """Dynamically load all provider modules and their run functions"""
-    providers = {}
-    providers_dir = Path(__file__).parent / "providers"
+    """Providers with credentials configured, by name; none of them are imported"""
     credentials = load_credentials()
-
-    # Skip __pycache__ and __init__.py
-    for file_path in providers_dir.glob("*.py"):
-        if file_path.stem.startswith("__"):
-            continue
-
-        try:
-            # Import module using relative path
-            module_name = f"providers.{file_path.stem}"
-            module = importlib.import_module(module_name)
-
-            # Find the session class first
-            session_class = next(
-                (
-                    obj
-                    for _, obj in inspect.getmembers(module, inspect.isclass)
-                    if obj.__name__.endswith("Session")
-                ),
-                None,
-            )
-            if not session_class:
-                continue
-
-            # Find the process function
-            process_func = next(
-                (
-                    func
-                    for _, func in inspect.getmembers(module, inspect.isfunction)
-                    if func.__name__.endswith("_process")
-                ),
-                None,
-            )
-            if not process_func:
-                continue
-
-            # Check if provider has valid credentials
-            if (
-                session_class.credentials_key in credentials
-                and isinstance(credentials[session_class.credentials_key], dict)
-                and "user_name" in credentials[session_class.credentials_key]
-                and credentials[session_class.credentials_key]["user_name"]
-                != "your_username"
-            ):
-                providers[session_class.name] = (
-                    process_func,
-                    session_class.required_fields,
-                    session_class.provider_group,
-                )
-
-        except Exception as e:
-            print(f"Error loading provider {file_path.stem}: {e}")
-
-    return providers
+    if credentials is None:
+        return {}
+    return {
+        name: info
+        for name, info in PROVIDER_REGISTRY.providers().items()
+        if credentials.configured(info.credentials_key)
+    }
 
 
 def display_providers(providers):
     """Display providers grouped by category"""
     # Group providers by their category
     grouped = {}
-    for name, (_, _, group) in providers.items():
-        if group not in grouped:
-            grouped[group] = []
-        grouped[group].append(name)
+    for name, info in providers.items():
+        if info.group not in grouped:
+            grouped[info.group] = []
+        grouped[info.group].append(name)
 
     # Sort groups, but ensure 'Other' is last
     groups = list(grouped.keys())
@@ -133,182 +97,468 @@ def display_providers(providers):
     return number_map
 
 
-async def run_tasks(patient_details=None, selected_providers=None):
-    """Run the selected tasks with the given patient details."""
-    # Load all available providers
-    providers = load_providers()
+def select_providers(providers):
+    """Prompt for a provider selection; returns None if the user quits"""
+    # Display grouped providers and get number mapping
+    number_map = display_providers(providers)
+    print("\nOther Options:")
+    print(f"  {len(number_map) + 1} or x: Quit")
 
-    if selected_providers is None:
-        # Display grouped providers and get number mapping
-        number_map = display_providers(providers)
-        print("\nOther Options:")
-        print(f"  {len(number_map) + 1} or x: Quit")
-
-        # Get provider selection
-        selection = input(
-            "\nSelect providers (comma-separated names or numbers): "
-        ).strip()
-
-        # Check for quit option or empty selection
-        if (
-            not selection
-            or selection == str(len(number_map) + 1)
-            or selection.lower() == "x"
-        ):
-            return None, None
+    # Get provider selection
+    selection = input("\nSelect providers (comma-separated names or numbers): ").strip()
 
-        while True:
-            # Handle both number and name input
-            selected_providers = []
-            for item in selection.split(","):
-                item = item.strip()
-                if item.isdigit():
-                    # Convert number to provider name using number_map
-                    num = int(item)
-                    if num in number_map:
-                        selected_providers.append(number_map[num])
-                else:
-                    # Try to match provider name
-                    matches = [
-                        name
-                        for name in providers.keys()
-                        if name.lower().startswith(item.lower())
-                    ]
-                    selected_providers.extend(matches)
-
-            # If no valid providers were selected, show error and try again
-            if not selected_providers:
-                print_error("❌ NO VALID PROVIDERS SELECTED. PLEASE TRY AGAIN.")
-                # Redisplay the providers
-                number_map = display_providers(providers)
-                print("\nOther Options:")
-                print(f"  {len(number_map) + 1} or x: Quit")
-
-                selection = input(
-                    "\nSelect providers (comma-separated names or numbers): "
-                ).strip()
+    # Check for quit option or empty selection
+    if (
+        not selection
+        or selection == str(len(number_map) + 1)
+        or selection.lower() == "x"
+    ):
+        return None
 
-                # Check for quit option or empty selection
-                if (
-                    not selection
-                    or selection == str(len(number_map) + 1)
-                    or selection.lower() == "x"
-                ):
-                    return None, None
+    while True:
+        # Handle both number and name input
+        selected_providers = []
+        for item in selection.split(","):
+            item = item.strip()
+            if item.isdigit():
+                # Convert number to provider name using number_map
+                num = int(item)
+                if num in number_map:
+                    selected_providers.append(number_map[num])
             else:
-                break
+                # Try to match provider name
+                matches = [
+                    name
+                    for name in providers.keys()
+                    if name.lower().startswith(item.lower())
+                ]
+                selected_providers.extend(matches)
+
+        # If no valid providers were selected, show error and try again
+        if not selected_providers:
+            print_error("❌ NO VALID PROVIDERS SELECTED. PLEASE TRY AGAIN.")
+            # Redisplay the providers
+            number_map = display_providers(providers)
+            print("\nOther Options:")
+            print(f"  {len(number_map) + 1} or x: Quit")
+
+            selection = input(
+                "\nSelect providers (comma-separated names or numbers): "
+            ).strip()
+
+            # Check for quit option or empty selection
+            if (
+                not selection
+                or selection == str(len(number_map) + 1)
+                or selection.lower() == "x"
+            ):
+                return None
+        else:
+            break
 
-    # Get required fields from selected providers
-    required_fields = set()
-    for provider in selected_providers:
-        if provider in providers:
-            _, fields, _ = providers[provider]
-            required_fields.update(fields)
+    return selected_providers
 
-    print(f"\nRequired fields are: {list(required_fields)}\n")
 
-    # Set up command line arguments
+def build_arg_parser():
+    """Command line arguments shared by the main loop and each run"""
     parser = argparse.ArgumentParser(description="Run Playwright script with user data")
     parser.add_argument("--family_name", help="Family Name", required=False)
     parser.add_argument("--given_name", help="Given Name", required=False)
     parser.add_argument("--dob", help="Date of Birth (DDMMYYYY)", required=False)
     parser.add_argument("--medicare_number", help="Medicare Number", required=False)
     parser.add_argument("--sex", help="Sex (M, F, or I)", required=False)
-    args = parser.parse_args()
+    parser.add_argument(
+        "--warm",
+        action="store_true",
+        help="Keep logged-in provider sessions open between patients",
+    )
+    parser.add_argument(
+        "--prewarm",
+        type=int,
+        nargs="?",
+        const=0,
+        default=None,
+        metavar="CONTEXTS",
+        help="Launch the browser as soon as the program starts and keep it open "
+        "between patients, with this many blank browser contexts ready for "
+        "sessions (none if no number is given)",
+    )
+    parser.add_argument(
+        "--cache-logins",
+        action="store_true",
+        help="Reuse encrypted cookies from previous runs to skip provider logins",
+    )
+    parser.add_argument(
+        "--no-block",
+        action="store_true",
+        help="Load every resource instead of skipping media, trackers and page assets",
+    )
+    parser.add_argument(
+        "--trace-file",
+        type=Path,
+        default=Path("traces/trace.jsonl"),
+        help="JSONL file for phase timings (summarise with python -m core.tracing)",
+    )
+    parser.add_argument(
+        "--no-trace", action="store_true", help="Do not record phase timings"
+    )
+    parser.add_argument(
+        "--auto-capture",
+        type=float,
+        nargs="?",
+        const=1.0,
+        default=0.0,
+        metavar="RATE",
+        help="Capture pages as providers navigate and after each phase, in this "
+        "fraction of runs (all runs if no rate is given)",
+    )
+    parser.add_argument(
+        "--capture-format",
+        choices=("mhtml", "dom"),
+        default="mhtml",
+        help="Save captured pages as complete MHTML copies, or as much smaller "
+        "DOM snapshots with the page text",
+    )
+    parser.add_argument(
+        "--capture-profile",
+        choices=tuple(CAPTURE_PROFILES),
+        help="Screenshot every captured page this way: full_page as PNG, or only "
+        "the visible part as a much quicker JPEG (tasks a provider sets its own "
+        "profile for keep it)",
+    )
+    parser.add_argument(
+        "--capture-dedupe",
+        action="store_true",
+        help="Save a page that looks the same as its last capture as a link to "
+        "that capture instead of a new copy",
+    )
+    parser.add_argument(
+        "--capture-budget-mb",
+        type=float,
+        default=2048,
+        help="Most disk space page captures may use before the oldest are removed",
+    )
+    parser.add_argument(
+        "--capture-provider-mb",
+        type=float,
+        help="Most disk space each provider's page captures may use",
+    )
+    parser.add_argument(
+        "--capture-max-age-days",
+        type=float,
+        default=30,
+        help="Remove page captures not used for this many days",
+    )
+    har_mode = parser.add_mutually_exclusive_group()
+    har_mode.add_argument(
+        "--record-har",
+        type=Path,
+        metavar="DIR",
+        help="Save each provider's traffic, scrubbed of credentials and patient "
+        "details, to DIR/<provider>.har",
+    )
+    har_mode.add_argument(
+        "--replay-har",
+        type=Path,
+        metavar="DIR",
+        help="Serve provider traffic from HAR files recorded with --record-har "
+        "instead of the live portals",
+    )
+    parser.add_argument(
+        "--batch",
+        type=Path,
+        help="Look up every patient in a CSV (with header row) or JSONL file",
+    )
+    parser.add_argument(
+        "--batch-workers",
+        type=int,
+        default=2,
+        help="Number of batch patients searched at the same time",
+    )
+    parser.add_argument(
+        "--batch-output",
+        type=Path,
+        default=Path("batch_results/results.jsonl"),
+        help="JSONL file that batch results are appended to",
+    )
+    return parser
+
+
+def build_har_archive(args):
+    """HAR archive for --record-har or --replay-har, if either was given"""
+    if args.record_har:
+        return HarArchive(args.record_har, "record")
+    if args.replay_har:
+        return HarArchive(args.replay_har, "replay")
+    return None
+
+
+def build_retention(args):
+    """Disk budget for screen_shots_data from the --capture-* options"""
+    mb = 1024 * 1024
+    return RetentionManager(
+        Path("screen_shots_data"),
+        max_total_bytes=int(args.capture_budget_mb * mb),
+        default_provider_quota=(
+            int(args.capture_provider_mb * mb) if args.capture_provider_mb else None
+        ),
+        max_age_days=args.capture_max_age_days,
+    )
+
+
+def start_input_handling(shared_state):
+    """Start reading the console and the task that processes its lines"""
+    console = ConsoleReader()
+    input_task = asyncio.create_task(process_inputs(console, shared_state))
+    console.start()
+    return console, input_task
+
+
+async def stop_input_handling(console, input_task):
+    """Cancel input processing and stop reading the console"""
+    input_task.cancel()
+    try:
+        await input_task
+    except asyncio.CancelledError:
+        pass
+    console.stop()
 
-    # Use existing patient details if available
-    if patient_details is not None:
-        args.family_name = patient_details.family_name
-        args.given_name = patient_details.given_name
-        args.dob = patient_details.dob
-        args.medicare_number = patient_details.medicare_number
-        args.sex = patient_details.sex
 
-    # Create or update PatientDetails object
-    patient_details = PatientDetails.from_args(args, list(required_fields))
-    print(f"Patient Details Collected: {patient_details}\n")
+async def run_batch_mode(args, shared_state):
+    """Select providers, then look up every patient in the batch file"""
+    providers = load_providers()
+    selected_providers = select_providers(providers)
+    if selected_providers is None:
+        return
 
-    # Get CLI args string for rerunning
-    flags = patient_details.to_cli_args()
-    if flags:
-        print(f"If you want to view this patient again enter: python main.py {flags}")
+    session_classes = {
+        name: providers[name].session
+        for name in selected_providers
+        if name in providers
+    }
+    try:
+        # Opened before any login, so a bad path fails before the 2FA prompts
+        patients = read_patients(args.batch)
+    except OSError as e:
+        print_error(f"❌ Cannot read batch file {args.batch}: {e.strerror or e}")
+        return
+    args.batch_output.parent.mkdir(parents=True, exist_ok=True)
+    # Results are appended across runs, so each run's screenshots get their own folder
+    screenshot_dir = args.batch_output.parent / datetime.now().strftime(
+        "run_%Y%m%d_%H%M%S"
+    )
+
+    console, input_task = start_input_handling(shared_state)
+    try:
+        async with BrowserPool() as pool:
+            await run_batch(
+                patients,
+                session_classes,
+                shared_state,
+                pool,
+                workers=args.batch_workers,
+                output_path=args.batch_output,
+                screenshot_dir=screenshot_dir,
+            )
+    finally:
+        await stop_input_handling(console, input_task)
 
-    # Only proceed with task setup if providers were selected
-    if not selected_providers:
-        return patient_details, selected_providers
 
-    # Set up shared state and input handling
-    input_queue = queue.Queue()
-    shared_state = SharedState()
+async def run_tasks(
+    patient_details=None, selected_providers=None, shared_state=None, pool=None
+):
+    """Run the selected tasks with the given patient details.
 
-    # Start input thread
-    input_thread_instance = threading.Thread(target=input_thread, args=(input_queue,))
-    input_thread_instance.start()
+    When a long-lived shared_state and pool are passed in (warm mode), sessions
+    parked by a previous run are reused instead of logging in again.
+    """
+    # Load all available providers
+    providers = load_providers()
+
+    if selected_providers is None:
+        # Off the event loop, so a pre-warming browser launches meanwhile
+        selected_providers = await asyncio.to_thread(select_providers, providers)
+        if selected_providers is None:
+            return None, None
 
-    # Create tasks for selected providers
-    tasks = []
+    # Get required fields from selected providers
+    required_fields = set()
     for provider in selected_providers:
         if provider in providers:
-            run_func, _, _ = providers[provider]
-            task = asyncio.create_task(run_func(patient_details, shared_state))
-            tasks.append(task)
-            print(f"Starting {provider} process")
+            required_fields.update(providers[provider].required_fields)
 
-    # Add input processing task
-    input_task = asyncio.create_task(process_inputs(input_queue, shared_state))
-    tasks.append(input_task)
+    print(f"\nRequired fields are: {list(required_fields)}\n")
 
-    # Wait for all tasks
-    print("Waiting for all tasks to complete...")
-    try:
-        await asyncio.gather(*tasks)
-    except asyncio.CancelledError:
-        print("Tasks cancelled during shutdown.")
+    # Only proceed with task setup if providers were selected
+    if not selected_providers:
+        return patient_details, selected_providers
+
+    # Set up shared state and input processing. The console reader starts now
+    # and answers the patient prompts too, so a manual 2FA code typed while
+    # they are shown still reaches its provider.
+    if shared_state is None:
+        shared_state = SharedState()
+    shared_state.reset()
+    shared_state.patient_ready = asyncio.get_running_loop().create_future()
+    console, input_task = start_input_handling(shared_state)
+
+    # One Playwright driver and browser shared by every provider session;
+    # each session still gets its own isolated browser context
+    owns_pool = pool is None
+    if owns_pool:
+        pool = await BrowserPool().start()
 
-    # Cleanup - only cancel input task since provider tasks are already done
-    input_task.cancel()
     try:
-        await input_task
-    except asyncio.CancelledError:
-        pass
+        # Start browsers and logins now; each session waits for the patient
+        # details before searching, so logins overlap with the typing below
+        tasks = []
+        for provider in selected_providers:
+            if provider in providers:
+                parked = shared_state.parked_sessions.pop(provider, None)
+                if parked is not None:
+                    task = asyncio.create_task(parked.run(pool))
+                    print(f"Resuming warm {provider} session")
+                else:
+                    run_func = providers[provider].process
+                    task = asyncio.create_task(
+                        run_func(patient_details, shared_state, pool)
+                    )
+                    print(f"Starting {provider} process")
+                tasks.append(task)
+
+        # Set up command line arguments
+        args = build_arg_parser().parse_args()
+
+        # Use existing patient details if available
+        if patient_details is not None:
+            args.family_name = patient_details.family_name
+            args.given_name = patient_details.given_name
+            args.dob = patient_details.dob
+            args.medicare_number = patient_details.medicare_number
+            args.sex = patient_details.sex
+
+        # Create or update PatientDetails object off the event loop so the
+        # provider tasks keep running while the user types
+        try:
+            patient_details = await asyncio.to_thread(
+                PatientDetails.from_args, args, list(required_fields), console.ask
+            )
+        except BaseException:
+            shared_state.patient_ready.cancel()
+            shared_state.request_exit()
+            input_task.cancel()
+            await asyncio.gather(*tasks, input_task, return_exceptions=True)
+            raise
+        shared_state.patient_ready.set_result(patient_details)
+        print(f"Patient Details Collected: {patient_details}\n")
+
+        # Get CLI args string for rerunning
+        flags = patient_details.to_cli_args()
+        if flags:
+            print(
+                f"If you want to view this patient again enter: python main.py {flags}"
+            )
+
+        # Add input processing task
+        tasks.append(input_task)
 
-    print("quitting input thread...")
-    input_thread_instance.join()
+        # Wait for all tasks
+        print("Waiting for all tasks to complete...")
+        try:
+            await asyncio.gather(*tasks)
+        except asyncio.CancelledError:
+            print("Tasks cancelled during shutdown.")
+    finally:
+        if owns_pool:
+            await pool.close()
+
+    # Cleanup - only cancel input task since provider tasks are already done
+    await stop_input_handling(console, input_task)
     print("All tasks terminated.")
 
     return patient_details, selected_providers
 
 
+async def prewarm_browser(pool, contexts):
+    """Launch the shared browser early; sessions launch it themselves on failure"""
+    try:
+        await pool.prewarm(contexts)
+    except Exception as e:
+        print(f"Browser pre-warm failed: {e}")
+
+
 async def main():
     """Main program loop that handles patient and provider selection."""
     patient_details = None
     selected_providers = None
 
-    while True:
-        if patient_details is not None:
-            print("\nWhat would you like to do?")
-            print("1: Use same patient (select new providers)")
-            print("2: Enter new patient details")
-            print("3 or x: Exit program")
-            choice = input("Enter choice (1-3 or x): ").strip()
-
-            if choice == "2":
-                patient_details = None
-                selected_providers = None
-            elif choice == "1":
-                selected_providers = None
-            elif choice == "3" or choice.lower() == "x":
-                break
-            else:
-                print("Invalid choice, please try again")
-                continue
+    # In warm mode the browser pool and logged-in sessions outlive each patient.
+    # A pre-warmed pool is started first, so Chromium launches behind the menus.
+    args, _ = build_arg_parser().parse_known_args()
+    pool, prewarm = None, None
+    if not args.batch and (args.warm or args.prewarm is not None):
+        pool = BrowserPool()
+        if args.prewarm is not None:
+            prewarm = asyncio.create_task(prewarm_browser(pool, args.prewarm))
+        else:
+            await pool.start()
+    shared_state = SharedState(
+        keep_warm=args.warm,
+        storage_cache=StorageStateCache() if args.cache_logins else None,
+        block_resources=not args.no_block,
+        tracer=None if args.no_trace else Tracer(args.trace_file),
+        har=build_har_archive(args),
+        retention=build_retention(args),
+        capture_index=CaptureIndex(),
+        capture_rate=args.auto_capture,
+        capture_format=args.capture_format,
+        capture_dedupe=args.capture_dedupe,
+        capture_profile=CAPTURE_PROFILES.get(args.capture_profile),
+    )
+    if args.batch:
+        await run_batch_mode(args, shared_state)
+        print("Goodbye!")
+        return
 
-        result = await run_tasks(patient_details, selected_providers)
-        if result is None or result == (None, None):
-            print("Goodbye!")
-            break
-        patient_details, selected_providers = result
+    try:
+        while True:
+            if patient_details is not None:
+                print("\nWhat would you like to do?")
+                print("1: Use same patient (select new providers)")
+                print("2: Enter new patient details")
+                print("3 or x: Exit program")
+                choice = (
+                    await asyncio.to_thread(input, "Enter choice (1-3 or x): ")
+                ).strip()
 
+                if choice == "2":
+                    patient_details = None
+                    selected_providers = None
+                elif choice == "1":
+                    selected_providers = None
+                elif choice == "3" or choice.lower() == "x":
+                    break
+                else:
+                    print("Invalid choice, please try again")
+                    continue
 
-# Run the main function
-asyncio.run(main())
+            result = await run_tasks(
+                patient_details, selected_providers, shared_state, pool
+            )
+            if result is None or result == (None, None):
+                print("Goodbye!")
+                break
+            patient_details, selected_providers = result
+    finally:
+        for session in shared_state.parked_sessions.values():
+            await session.cleanup()
+        shared_state.parked_sessions.clear()
+        if prewarm is not None:
+            prewarm.cancel()
+            await asyncio.gather(prewarm, return_exceptions=True)
+        if pool is not None:
+            await pool.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
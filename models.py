@@ -1,12 +1,37 @@
+from __future__ import annotations
+
 import asyncio
 import json
+import os
+import random
 from abc import ABC, abstractmethod
+from contextlib import nullcontext
 from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Any, Callable, Dict, List, Optional
-from core import PageDataCollector
+from enum import Enum
 from pathlib import Path
-from playwright.async_api import Browser, BrowserContext, Page, Playwright
+from typing import TYPE_CHECKING, Any, Callable, ClassVar, Dict, List, Optional, Tuple
+
+from core import (
+    DEFAULT_CAPTURE_PROFILE,
+    AutoCapture,
+    BrowserPool,
+    CaptureIndex,
+    CaptureProfile,
+    CaptureStore,
+    HarArchive,
+    PageDataCollector,
+    RetentionManager,
+    RoutingProfile,
+    ScreenshotDeduper,
+    StorageStateCache,
+    Topic,
+    TotpCode,
+    Tracer,
+)
+
+if TYPE_CHECKING:
+    from playwright.async_api import Browser, BrowserContext, Locator, Page
 
 
 @dataclass
@@ -24,33 +49,166 @@ class Credentials:
     @classmethod
     def load(cls, file_path: str, provider: str) -> "Credentials":
         """Load credentials for a specific provider"""
-        try:
-            with open(file_path, "r") as file:
-                data = json.load(file)
+        return CredentialsStore.for_path(file_path).get(provider)
+
+
+class CredentialsStore:
+    """
+    A credentials file parsed once and reloaded only when it changes.
+
+    Every read checks the file's inode, modification time and size, which
+    is a single ``stat`` call, and parses it again only if one of them has
+    changed (an edit or a replacement). Each provider's ``Credentials`` is
+    built once per version of the file. ``for_path`` returns the one store
+    for a path, so the provider menu and every session share it.
+
+    Example:
+        ```python
+        store = CredentialsStore.for_path("credentials.json")
+        if store.configured("QXR"):
+            credentials = store.get("QXR")
+        ```
+    """
+
+    _stores: ClassVar[Dict[str, "CredentialsStore"]] = {}
 
+    def __init__(self, path: str = "credentials.json"):
+        self.path = path
+        self._stamp: Optional[Tuple[int, int, int]] = None
+        self._data: Dict[str, Any] = {}
+        self._credentials: Dict[str, Credentials] = {}
+
+    @classmethod
+    def for_path(cls, path: str) -> "CredentialsStore":
+        """The shared store for a credentials file"""
+        key = os.path.abspath(path)
+        if key not in cls._stores:
+            cls._stores[key] = cls(path)
+        return cls._stores[key]
+
+    def data(self) -> Dict[str, Any]:
+        """The parsed file, reloading it if it has changed since the last read"""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            self._stamp = None
+            raise FileNotFoundError(f"Credentials file {self.path} not found")
+        stamp = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if stamp != self._stamp:
+            try:
+                with open(self.path, "r") as file:
+                    data = json.load(file)
+            except json.JSONDecodeError:
+                raise ValueError(f"Invalid JSON in credentials file {self.path}")
+            self._data, self._credentials, self._stamp = data, {}, stamp
+        return self._data
+
+    def get(self, provider: str) -> Credentials:
+        """Credentials for a provider"""
+        data = self.data()
+        if provider not in self._credentials:
             if provider not in data:
                 raise ValueError(f"Credentials for {provider} not found")
+            try:
+                self._credentials[provider] = Credentials(**data[provider])
+            except TypeError as e:
+                raise ValueError(f"Invalid credential format: {e}")
+        return self._credentials[provider]
+
+    def configured(self, provider: str) -> bool:
+        """Whether a provider has a user name other than the template's"""
+        entry = self.data().get(provider)
+        return (
+            isinstance(entry, dict)
+            and "user_name" in entry
+            and entry["user_name"] != "your_username"
+        )
 
-            return cls(**data[provider])
 
-        except FileNotFoundError:
-            raise FileNotFoundError(f"Credentials file {file_path} not found")
-        except json.JSONDecodeError:
-            raise ValueError(f"Invalid JSON in credentials file {file_path}")
-        except TypeError as e:
-            raise ValueError(f"Invalid credential format: {e}")
+class SessionStage(str, Enum):
+    """Lifecycle points published by every session"""
+
+    STARTING = "starting"  # Browser opening, about to log in
+    RESTORED = "restored"  # Cached login reused, no login needed
+    LOGGED_IN = "logged_in"
+    SEARCHED = "searched"  # Patient search finished (successfully or not)
+    PARKED = "parked"  # Kept logged in for the next patient
+    FAILED = "failed"
+    CLOSED = "closed"
+
+
+@dataclass
+class SessionEvent:
+    provider: str
+    stage: SessionStage
+    detail: str = ""
 
 
 @dataclass
 class SharedState:
     two_fa_codes: Dict[str, str] = field(default_factory=dict)
     two_fa_events: Dict[str, asyncio.Event] = field(default_factory=dict)
-    new_2fa_request: Optional[str] = None  # Keep this for monitor compatibility
-    exit: bool = False
+    # Providers waiting for a 2FA code, consumed by the clipboard monitor
+    two_fa_requests: asyncio.Queue = field(default_factory=asyncio.Queue)
+    exit_event: asyncio.Event = field(default_factory=asyncio.Event)
+    session_events: Topic[SessionEvent] = field(default_factory=Topic)
     credentials_file: str = "credentials.json"
+    keep_warm: bool = False  # Park logged-in sessions between patients
+    parked_sessions: Dict[str, Any] = field(default_factory=dict)
+    storage_cache: Optional[StorageStateCache] = None  # Persist logins to disk
+    patient_ready: Optional[asyncio.Future] = None  # Resolves once details are entered
+    block_resources: bool = True  # Apply each session's routing profile
+    tracer: Optional[Tracer] = None  # Records phase timings when set
+    har: Optional[HarArchive] = None  # Record or replay provider traffic
+    retention: Optional[RetentionManager] = None  # Disk budget for captures
+    capture_index: Optional[CaptureIndex] = None  # Capture metadata database
+    capture_rate: float = 0.0  # Fraction of runs captured automatically
+    capture_format: str = "mhtml"  # "dom" for compact DOM snapshots instead
+    capture_dedupe: bool = False  # Link unchanged pages to their last capture
+    capture_profile: Optional[CaptureProfile] = None  # Overrides each session's
+
+    @property
+    def exit(self) -> bool:
+        """True once the user has asked to quit"""
+        return self.exit_event.is_set()
+
+    def request_exit(self) -> None:
+        """Wake every session and 2FA waiter so they can finish up"""
+        self.exit_event.set()
+
+    def sample_capture(self) -> bool:
+        """Decide whether this run is one of the automatically captured ones"""
+        return random.random() < self.capture_rate
+
+    def reset(self) -> None:
+        """Clear per-patient flags and codes so a warm state can be reused"""
+        self.exit_event.clear()
+        while not self.two_fa_requests.empty():
+            self.two_fa_requests.get_nowait()
+        self.two_fa_codes.clear()
+        self.two_fa_events.clear()
+        self.patient_ready = None
+
+    def span(self, provider: Optional[str], phase: str, **attrs):
+        """Time a phase when tracing is enabled (no-op otherwise)"""
+        if self.tracer is None:
+            return nullcontext()
+        return self.tracer.span(provider, phase, **attrs)
+
+    def publish(self, provider: str, stage: SessionStage, detail: str = "") -> None:
+        """Announce a session lifecycle change to subscribers"""
+        self.session_events.publish(SessionEvent(provider, stage, detail))
+
+    async def wait_for_patient(
+        self, current: Optional["PatientDetails"]
+    ) -> Optional["PatientDetails"]:
+        """Return this run's patient, waiting until the user has entered it"""
+        if self.patient_ready is None:
+            return current
+        return await asyncio.shield(self.patient_ready)
 
     async def wait_for_2fa(self, provider_name: str) -> str:
-        """Wait for 2FA code with periodic reminders
+        """Ask the monitor for a 2FA code and wait for it with periodic reminders
         Args:
             provider_name: Name of provider requesting 2FA
         Returns:
@@ -60,22 +218,30 @@ class SharedState:
         """
         if provider_name not in self.two_fa_events:
             self.two_fa_events[provider_name] = asyncio.Event()
+        code_event = self.two_fa_events[provider_name]
+        self.two_fa_requests.put_nowait(provider_name)
 
         print(f"\nWaiting for {provider_name} 2FA code...")
 
-        while not self.two_fa_events[provider_name].is_set():
-            # Check for exit signal
-            if self.exit:
-                raise asyncio.CancelledError("Exit signal received")
-
-            # Wait for either the event or 30 seconds
-            try:
-                await asyncio.wait_for(
-                    self.two_fa_events[provider_name].wait(), timeout=30
-                )
-            except asyncio.TimeoutError:
-                # No code yet, print reminder and keep waiting
-                print(f"Still waiting for {provider_name} 2FA code...")
+        code_wait = asyncio.ensure_future(code_event.wait())
+        exit_wait = asyncio.ensure_future(self.exit_event.wait())
+        try:
+            with self.span(None, "2fa_wait", code_for=provider_name):
+                while not code_event.is_set():
+                    if self.exit:
+                        raise asyncio.CancelledError("Exit signal received")
+
+                    # Wake on the code, on exit, or after 30 seconds for a reminder
+                    done, _ = await asyncio.wait(
+                        {code_wait, exit_wait},
+                        timeout=30,
+                        return_when=asyncio.FIRST_COMPLETED,
+                    )
+                    if not done:
+                        print(f"Still waiting for {provider_name} 2FA code...")
+        finally:
+            code_wait.cancel()
+            exit_wait.cancel()
 
         return self.two_fa_codes[provider_name]
 
@@ -115,8 +281,16 @@ class PatientDetails:
             self.medicare_number = cleaned_number
 
     @classmethod
-    def from_args(cls, args, required_fields: list[str]):
-        """Create PatientDetails from argparse args and required fields"""
+    def from_args(
+        cls,
+        args,
+        required_fields: list[str],
+        input_func: Callable[[str], str] = input,
+    ):
+        """Create PatientDetails from argparse args and required fields
+
+        Missing fields are prompted for with input_func (default input()).
+        """
         details = {}
 
         # Handle each field based on args or user input
@@ -124,7 +298,7 @@ class PatientDetails:
             args.family_name
             if args.family_name
             else (
-                input("Enter Family Name: ")
+                input_func("Enter Family Name: ")
                 if "family_name" in required_fields
                 else None
             )
@@ -134,7 +308,9 @@ class PatientDetails:
             args.given_name
             if args.given_name
             else (
-                input("Enter Given Name: ") if "given_name" in required_fields else None
+                input_func("Enter Given Name: ")
+                if "given_name" in required_fields
+                else None
             )
         )
 
@@ -143,7 +319,7 @@ class PatientDetails:
                 details["dob"] = args.dob
             else:
                 while True:
-                    dob_input = input("Enter DOB (DDMMYYYY): ")
+                    dob_input = input_func("Enter DOB (DDMMYYYY): ")
                     try:
                         datetime.strptime(dob_input, "%d%m%Y")
                         details["dob"] = dob_input
@@ -158,7 +334,7 @@ class PatientDetails:
                 details["medicare_number"] = str(args.medicare_number)
             else:
                 while True:
-                    medicare_input = input("Enter Medicare Number: ")
+                    medicare_input = input_func("Enter Medicare Number: ")
                     cleaned_number = "".join(filter(str.isdigit, medicare_input))
                     if len(cleaned_number) >= 11:
                         details["medicare_number"] = cleaned_number
@@ -168,7 +344,7 @@ class PatientDetails:
         if "sex" in required_fields:
             details["sex"] = args.sex.upper() if args.sex else None
             while not details["sex"] or details["sex"] not in ["M", "F", "I"]:
-                details["sex"] = input("Enter Sex (M, F, or I): ").upper()
+                details["sex"] = input_func("Enter Sex (M, F, or I): ").upper()
 
         return cls(**details)
 
@@ -215,6 +391,18 @@ class Session(ABC):
         """Key for credentials.json"""
         pass
 
+    # Extra options for playwright.chromium.launch, merged over the pool defaults.
+    # Sessions with identical options share one browser process.
+    launch_options: Dict[str, Any] = {}
+
+    # Requests to block or stub in this provider's context. None (the default)
+    # loads everything and keeps Chromium's HTTP cache, which routing disables.
+    routing_profile: Optional[RoutingProfile] = None
+
+    # How page captures take their screenshot, with overrides per capture task
+    capture_profile: CaptureProfile = DEFAULT_CAPTURE_PROFILE
+    capture_task_profiles: Dict[str, CaptureProfile] = {}
+
     def __init__(
         self,
         credentials: Credentials,
@@ -227,6 +415,17 @@ class Session(ABC):
         self.browser: Browser | None = None
         self.context: BrowserContext | None = None
         self.page: Page | None = None
+        self.context_options: Dict[str, Any] = {}  # Extra browser.new_context options
+        self.logged_in = False
+        self.search_url: Optional[str] = None  # Page reached after login
+        self.patients_seen: List[PatientDetails] = []  # Scrubbed from HAR recordings
+        self.totp_codes: List[str] = []  # Entered 2FA codes, also scrubbed
+        self.auto_capture: Optional[AutoCapture] = None  # Set on sampled runs
+
+    @property
+    def current_page(self) -> Optional[Page]:
+        """Page the provider is currently driving (popup providers override)"""
+        return self.page
 
     @classmethod
     def create(
@@ -241,11 +440,26 @@ class Session(ABC):
             return None
         return cls(credentials, patient, shared_state)
 
+    async def new_page(self, pool: BrowserPool) -> Page:
+        """Open an isolated context on the shared browser and return its first page"""
+        har = self.shared_state.har
+        context_options = dict(self.context_options)
+        if har:
+            context_options.update(har.context_options(self.credentials_key))
+        self.browser = await pool.get_browser(self.launch_options)
+        self.context = await pool.new_context(self.launch_options, **context_options)
+        if har:
+            await har.attach(self.context, self.credentials_key)
+        if self.routing_profile and self.shared_state.block_resources:
+            await self.routing_profile.apply(self.context)
+        self.page = await self.context.new_page()
+        if self.auto_capture:
+            self.auto_capture.watch(self.page)
+        return self.page
+
     @abstractmethod
-    async def initialize(self, playwright: Playwright) -> None:
+    async def initialize(self, pool: BrowserPool) -> None:
         """Initialize browser session"""
-        task = "initializing browser"
-
         pass
 
     @abstractmethod
@@ -258,45 +472,215 @@ class Session(ABC):
         """Handle patient search"""
         pass
 
+    def span(self, phase: str, **attrs):
+        """Time a phase of this session in the trace"""
+        return self.shared_state.span(self.name, phase, **attrs)
+
+    async def capture(self, task: str) -> None:
+        """Capture the current page at a phase boundary on sampled runs"""
+        if self.auto_capture and self.current_page:
+            await self.auto_capture.capture(self.current_page, task)
+
+    async def submit_totp(self, field: Locator, button: Locator) -> str:
+        """Enter a TOTP code from this provider's secret (see TotpCode.submit)"""
+        totp = TotpCode(self.credentials.totp_secret)
+        try:
+            return await totp.submit(field, button)
+        finally:
+            self.totp_codes.extend(totp.submitted)
+
     async def wait_for_exit(self) -> None:
         """Wait for exit signal"""
         print(f"{self.name} paused for interaction")
-        while not self.shared_state.exit:
-            await asyncio.sleep(0.1)
+        await self.shared_state.exit_event.wait()
         print(f"{self.name} received exit signal")
 
     async def cleanup(self) -> None:
-        """Clean up resources"""
+        """Clean up resources (the shared browser is closed by its pool)"""
+        self.logged_in = False
         if self.context:
-            await self.context.close()
-        if self.browser:
-            await self.browser.close()
-
-    async def run(self, playwright: Playwright) -> None:
-        """Run the complete session"""
-        # Initialize collector for this session
-        collector = PageDataCollector(
-            output_dir=Path(f"screen_shots_data/{self.name.lower()}")
-        )
-        
-        try:
-            print(f"\n=== Starting {self.name} Process ===")
-            await self.initialize(playwright)
-            # if self.page:  # Capture post-initialization state
-            #     await collector.capture_page_data(
-            #         self.page,
-            #         task="initialization"
-            #     )
-
-            print(f"\n=== {self.name} Login ===")
+            await self.context.close()  # Also flushes any HAR recording
+            self.context = None
+            self.shared_state.publish(self.name, SessionStage.CLOSED)
+            har = self.shared_state.har
+            if har and har.recording:
+                har.scrub(self.credentials_key, self.scrub_values())
+
+    def scrub_values(self) -> Dict[str, str]:
+        """Credentials, patient details and 2FA codes mapped to their stand-ins"""
+        values: Dict[str, str] = {}
+        for name, value in vars(self.credentials).items():
+            if value:
+                values[str(value)] = f"[{name}]"
+        for patient in self.patients_seen:
+            for name in ("family_name", "given_name", "medicare_number"):
+                value = getattr(patient, name)
+                if value:
+                    values[value] = f"[{name}]"
+            if patient.medicare_number:  # Portals often drop the IRN digit
+                values[patient.medicare_number[:10]] = "[medicare_number]"
+            if patient.dob:
+                dob = datetime.strptime(patient.dob, "%d%m%Y")
+                for fmt in ("%d%m%Y", "%d/%m/%Y", "%Y-%m-%d"):
+                    values[dob.strftime(fmt)] = "[dob]"
+        for code in [*self.shared_state.two_fa_codes.values(), *self.totp_codes]:
+            values[code] = "[2fa_code]"
+        return values
+
+    async def start(self, pool: BrowserPool) -> None:
+        """Open the browser and log in, remembering where the search form is"""
+        if await self.restore_login(pool):
+            return
+
+        print(f"\n=== Starting {self.name} Process ===")
+        self.shared_state.publish(self.name, SessionStage.STARTING)
+        with self.span("initialize"):
+            await self.initialize(pool)
+        await self.capture("initialization")
+
+        print(f"\n=== {self.name} Login ===")
+        with self.span("login"):
             await self.login()
+        self.logged_in = True
+        self.shared_state.publish(self.name, SessionStage.LOGGED_IN)
+        await self.capture("login")
+        if self.current_page:
+            self.search_url = self.current_page.url
+        await self.save_login()
+
+    async def restore_login(self, pool: BrowserPool) -> bool:
+        """Reuse cached cookies and storage if they still hold a valid login"""
+        cache = self.shared_state.storage_cache
+        if cache is None:
+            return False
+        entry = cache.load(self.credentials_key)
+        if not entry or not entry.get("search_url"):
+            return False
+
+        print(f"\n=== Restoring {self.name} Login ===")
+        self.context_options["storage_state"] = entry["storage_state"]
+        self.search_url = entry["search_url"]
+        try:
+            with self.span("restore_login") as span:
+                await self.new_page(pool)
+                self.logged_in = await self.probe_login()
+                if span:
+                    span.attrs["restored"] = self.logged_in
+            if self.logged_in:
+                self.shared_state.publish(self.name, SessionStage.RESTORED)
+                return True
+        except Exception as e:
+            print(f"Error restoring {self.name} login: {e}")
+        finally:
+            self.context_options.pop("storage_state", None)
+
+        print(f"{self.name} cached login has expired, logging in again")
+        cache.discard(self.credentials_key)
+        await self.cleanup()
+        return False
+
+    async def probe_login(self) -> bool:
+        """Cheap check that the search page loads without a login form"""
+        await self.return_to_search()
+        return await self.current_page.locator('input[type="password"]').count() == 0
+
+    async def save_login(self) -> None:
+        """Write the current cookies and storage to the login cache"""
+        cache = self.shared_state.storage_cache
+        if cache is None or not self.context or not self.logged_in:
+            return
+        try:
+            storage_state = await self.context.storage_state()
+            cache.save(self.credentials_key, storage_state, self.search_url)
+        except Exception as e:
+            print(f"Could not cache {self.name} login: {e}")
+
+    async def return_to_search(self) -> None:
+        """Navigate a warm session back to the page it reached after login"""
+        page = self.current_page
+        if not page or not self.search_url:
+            raise RuntimeError("Session not initialized")
+        with self.span("navigate", url=self.search_url):
+            await page.goto(self.search_url)
+            await page.wait_for_load_state("networkidle")
+
+    async def lookup(self, patient: PatientDetails) -> None:
+        """Search for another patient on an already logged-in session"""
+        self.patient = patient
+        self.patients_seen.append(patient)
+        await self.return_to_search()
+        with self.span("search"):
+            await self.search_patient()
+
+    async def run(self, pool: BrowserPool) -> None:
+        """Run the complete session, reusing the login if the session is warm"""
+        # On sampled runs capture pages as the session navigates and at each
+        # phase; page parts shared between captures of every provider are
+        # stored once, and with capture_dedupe captures of an unchanged page
+        # only link to its last capture
+        collector = None
+        if self.shared_state.sample_capture():
+            collector = PageDataCollector(
+                output_dir=Path(f"screen_shots_data/{self.name.lower()}"),
+                store=CaptureStore(Path("screen_shots_data")),
+                dedupe=(
+                    ScreenshotDeduper() if self.shared_state.capture_dedupe else None
+                ),
+                retention=self.shared_state.retention,
+                index=self.shared_state.capture_index,
+                profile=self.shared_state.capture_profile or self.capture_profile,
+                task_profiles=self.capture_task_profiles,
+                page_format=self.shared_state.capture_format,
+            )
+            self.auto_capture = AutoCapture(collector)
+            for page in {self.page, self.current_page} - {None}:
+                self.auto_capture.watch(page)  # Pages of a warm session
+        parked = False
+
+        try:
+            if self.logged_in:
+                try:
+                    print(f"\n=== {self.name} Reusing Warm Session ===")
+                    await self.return_to_search()
+                except Exception as e:
+                    print(f"{self.name} warm session unusable ({e}), logging in again")
+                    await self.cleanup()
+
+            if not self.logged_in:
+                await self.start(pool)
+
+            # Logins start before the patient is known; wait for the details
+            with self.span("patient_wait"):
+                self.patient = await self.shared_state.wait_for_patient(self.patient)
+            if self.patient:
+                self.patients_seen.append(self.patient)
 
             print(f"\n=== {self.name} Patient Search ===")
             try:
-                await self.search_patient()
+                with self.span("search"):
+                    await self.search_patient()
             except Exception as e:
                 print(f"Error during patient search: {e}")
             print("\n=== Search Complete ===")
+            self.shared_state.publish(self.name, SessionStage.SEARCHED)
+            await self.capture("search")
             await self.wait_for_exit()
+            await self.save_login()  # Keep refreshed cookies for the next start
+
+            if self.shared_state.keep_warm and self.logged_in:
+                self.shared_state.parked_sessions[self.name] = self
+                parked = True
+                self.shared_state.publish(self.name, SessionStage.PARKED)
+                print(f"{self.name} parked, still logged in for the next patient")
+        except Exception as e:
+            self.shared_state.publish(self.name, SessionStage.FAILED, str(e))
+            await self.capture("failed")
+            raise
         finally:
-            await self.cleanup()
+            if self.auto_capture:
+                await self.auto_capture.close()
+                self.auto_capture = None
+            if collector:
+                await collector.close()  # Finish writing any queued captures
+            if not parked:
+                await self.cleanup()
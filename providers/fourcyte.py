@@ -1,9 +1,10 @@
 from typing import Optional
 
-from playwright.async_api import Page, Playwright, async_playwright
+from playwright.async_api import Page
 
+from core import BrowserPool
 from models import Credentials, PatientDetails, Session, SharedState
-from utils import convert_date_format, generate_2fa_code
+from utils import convert_date_format
 
 
 class FourCyteSession(Session):
@@ -21,6 +22,16 @@ class FourCyteSession(Session):
         super().__init__(credentials, patient, shared_state)
         self.active_page: Page | None = None  # For handling popup window
 
+    @property
+    def current_page(self) -> Optional[Page]:
+        """Popup window once opened, otherwise the main page"""
+        return self.active_page or self.page
+
+    async def new_page(self, pool: BrowserPool) -> Page:
+        """Open the session page and make it the active page"""
+        self.active_page = await super().new_page(pool)
+        return self.active_page
+
     @classmethod
     def create(
         cls, patient: PatientDetails, shared_state: SharedState
@@ -28,11 +39,9 @@ class FourCyteSession(Session):
         """Create a new FourCyte session"""
         return super().create(patient, shared_state)
 
-    async def initialize(self, playwright: Playwright) -> None:
+    async def initialize(self, pool: BrowserPool) -> None:
         """Initialize browser session"""
-        self.browser = await playwright.chromium.launch(headless=False)
-        self.context = await self.browser.new_context()
-        self.page = await self.context.new_page()
+        self.page = await self.new_page(pool)
         self.active_page = self.page  # Start with main page as active
         # await self.page.goto("https://www.4cyte.com.au/clinicians")
         await self.page.goto("https://4cyte.mocloud.com.au/rest/html/explorer_online/index.html#!/app")
@@ -62,14 +71,14 @@ class FourCyteSession(Session):
         )
         await self.active_page.get_by_role("button", name="Log in").click()
 
-        # Handle 2FA
-        two_fa_code = generate_2fa_code(self.credentials.totp_secret)
-        print(f"Generated 2FA code: {two_fa_code}")
-
+        # Handle 2FA, with a code generated once the form has loaded
         await self.page.wait_for_load_state("networkidle")
         await self.active_page.get_by_placeholder("-digit code").click()
-        await self.active_page.get_by_placeholder("-digit code").fill(two_fa_code)
-        await self.active_page.get_by_role("button", name="Submit").click()
+        two_fa_code = await self.submit_totp(
+            self.active_page.get_by_placeholder("-digit code"),
+            self.active_page.get_by_role("button", name="Submit"),
+        )
+        print(f"Accepted 2FA code: {two_fa_code}")
 
         # Navigate to patients and handle break glass
         await self.active_page.get_by_role("button", name="Patients").click()
@@ -99,10 +108,11 @@ class FourCyteSession(Session):
         await self.active_page.get_by_role("button", name="Search").click()
 
 
-async def FourCyte_process(patient: PatientDetails, shared_state: SharedState):
+async def FourCyte_process(
+    patient: PatientDetails, shared_state: SharedState, pool: BrowserPool
+):
     # Create and run session
     session = FourCyteSession.create(patient, shared_state)
     if not session:
         return
-    async with async_playwright() as playwright:
-        await session.run(playwright)
+    await session.run(pool)
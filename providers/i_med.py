@@ -1,8 +1,9 @@
 import asyncio
 from typing import Optional
 
-from playwright.async_api import Page, Playwright, async_playwright
+from playwright.async_api import Page
 
+from core import DEFAULT_ROUTING_PROFILE, BrowserPool
 from models import Credentials, PatientDetails, Session, SharedState
 from utils import convert_date_format
 
@@ -12,6 +13,13 @@ class IMedSession(Session):
     required_fields = ["family_name", "given_name", "dob"]
     provider_group = "Radiology"
     credentials_key = "IMed"
+    # Strip images and fonts from pages of the public i-med.com.au site used
+    # to pick a location, wherever they are hosted; the I-MED Online popup on
+    # its own host loads in full
+    routing_profile = DEFAULT_ROUTING_PROFILE.extend(
+        block_resource_types={"image", "font"},
+        allow_frame_patterns=[r"^https://(?!(?:www\.)?i-med\.com\.au/)"],
+    )
 
     def __init__(
         self,
@@ -22,6 +30,16 @@ class IMedSession(Session):
         super().__init__(credentials, patient, shared_state)
         self.active_page: Page | None = None  # For handling popup window
 
+    @property
+    def current_page(self) -> Optional[Page]:
+        """Popup window once opened, otherwise the main page"""
+        return self.active_page or self.page
+
+    async def new_page(self, pool: BrowserPool) -> Page:
+        """Open the session page and make it the active page"""
+        self.active_page = await super().new_page(pool)
+        return self.active_page
+
     @classmethod
     def create(
         cls, patient: PatientDetails, shared_state: SharedState
@@ -29,11 +47,9 @@ class IMedSession(Session):
         """Create a new IMed session"""
         return super().create(patient, shared_state)
 
-    async def initialize(self, playwright: Playwright) -> None:
+    async def initialize(self, pool: BrowserPool) -> None:
         """Initialize browser session"""
-        self.browser = await playwright.chromium.launch(headless=False)
-        self.context = await self.browser.new_context()
-        self.page = await self.context.new_page()
+        self.page = await self.new_page(pool)
         self.active_page = self.page  # Start with main page as active
         await self.page.goto("https://i-med.com.au/resources/access-patient-images")
 
@@ -131,10 +147,11 @@ class IMedSession(Session):
         await self.active_page.get_by_test_id("mobile-search").click()
 
 
-async def IMed_process(patient: PatientDetails, shared_state: SharedState):
+async def IMed_process(
+    patient: PatientDetails, shared_state: SharedState, pool: BrowserPool
+):
     # Create and run session
     session = IMedSession.create(patient, shared_state)
     if not session:
         return
-    async with async_playwright() as playwright:
-        await session.run(playwright)
+    await session.run(pool)
@@ -1,9 +1,8 @@
 from typing import Optional
 
-from playwright.async_api import Playwright, async_playwright
-
+from core import BrowserPool
 from models import Credentials, PatientDetails, Session, SharedState
-from utils import convert_date_format, generate_2fa_code
+from utils import convert_date_format
 
 
 class MaterPathologySession(Session):
@@ -27,11 +26,9 @@ class MaterPathologySession(Session):
         """Create a new Mater Pathology session"""
         return super().create(patient, shared_state)
 
-    async def initialize(self, playwright: Playwright) -> None:
+    async def initialize(self, pool: BrowserPool) -> None:
         """Initialize browser session"""
-        self.browser = await playwright.chromium.launch(headless=False)
-        self.context = await self.browser.new_context()
-        self.page = await self.context.new_page()
+        self.page = await self.new_page(pool)
         await self.page.goto("https://pathresults.mater.org.au/")
         await self.page.wait_for_load_state("networkidle")
 
@@ -106,12 +103,13 @@ class MaterPathologySession(Session):
             except Exception:
                 print("Direct OTP entry available")
 
-            # Enter 2FA code
-            two_fa_code = generate_2fa_code(self.credentials.totp_secret)
-            print(f"Generated 2FA code: {two_fa_code}")
+            # Enter 2FA code, generated as it is entered
             await self.page.get_by_label("Enter code").click()
-            await self.page.get_by_label("Enter code").fill(two_fa_code)
-            await self.page.get_by_role("button", name="Verify").click()
+            two_fa_code = await self.submit_totp(
+                self.page.get_by_label("Enter code"),
+                self.page.get_by_role("button", name="Verify"),
+            )
+            print(f"Accepted 2FA code: {two_fa_code}")
             await self.page.wait_for_load_state("networkidle")
         except Exception as e:
             raise RuntimeError(f"Error during 2FA entry: {e}")
@@ -133,10 +131,11 @@ class MaterPathologySession(Session):
         await self.page.get_by_role("button", name="Search").click()
 
 
-async def MaterPathology_process(patient: PatientDetails, shared_state: SharedState):
+async def MaterPathology_process(
+    patient: PatientDetails, shared_state: SharedState, pool: BrowserPool
+):
     # Create and run session
     session = MaterPathologySession.create(patient, shared_state)
     if not session:
         return
-    async with async_playwright() as playwright:
-        await session.run(playwright)
+    await session.run(pool)
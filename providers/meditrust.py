@@ -1,9 +1,7 @@
 from typing import Optional
 
-from playwright.async_api import Playwright, async_playwright
-
+from core import DEFAULT_ROUTING_PROFILE, BrowserPool
 from models import Credentials, PatientDetails, Session, SharedState
-from utils import generate_2fa_code
 
 
 class MediTrustSession(Session):
@@ -11,6 +9,12 @@ class MediTrustSession(Session):
     required_fields = []  # No patient details required
     provider_group = "Other"
     credentials_key = "Meditrust"
+    # Only the marketing home page is stripped, including its images from
+    # elsewhere under mtv4/; pages after login render fully
+    routing_profile = DEFAULT_ROUTING_PROFILE.extend(
+        block_resource_types={"image", "font"},
+        allow_frame_patterns=[r"^https://www\.meditrust\.com\.au/mtv4/(?!home)"],
+    )
 
     def __init__(
         self,
@@ -27,11 +31,9 @@ class MediTrustSession(Session):
         """Create a new MediTrust session"""
         return super().create(patient, shared_state)
 
-    async def initialize(self, playwright: Playwright) -> None:
+    async def initialize(self, pool: BrowserPool) -> None:
         """Initialize browser session"""
-        self.browser = await playwright.chromium.launch(headless=False)
-        self.context = await self.browser.new_context()
-        self.page = await self.context.new_page()
+        self.page = await self.new_page(pool)
         await self.page.goto("https://www.meditrust.com.au/mtv4/home")
 
     async def login(self) -> None:
@@ -47,11 +49,12 @@ class MediTrustSession(Session):
         await self.page.get_by_label("Password:").fill(self.credentials.user_password)
         await self.page.get_by_role("button", name="Login").click()
 
-        # Handle 2FA
+        # Handle 2FA, with a code generated as it is entered
         await self.page.get_by_placeholder("Authentication Code").click()
-        two_fa_code = generate_2fa_code(self.credentials.totp_secret)
-        await self.page.get_by_placeholder("Authentication Code").fill(two_fa_code)
-        await self.page.get_by_role("button", name="Submit").click()
+        await self.submit_totp(
+            self.page.get_by_placeholder("Authentication Code"),
+            self.page.get_by_role("button", name="Submit"),
+        )
 
     async def search_patient(self) -> None:
         """No patient search needed for MediTrust"""
@@ -59,11 +62,10 @@ class MediTrustSession(Session):
 
 
 async def MediTrust_process(
-    patient: Optional[PatientDetails], shared_state: SharedState
+    patient: Optional[PatientDetails], shared_state: SharedState, pool: BrowserPool
 ):
     # Create and run session
     session = MediTrustSession.create(patient, shared_state)
     if not session:
         return
-    async with async_playwright() as playwright:
-        await session.run(playwright)
+    await session.run(pool)
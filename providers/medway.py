@@ -1,7 +1,7 @@
 from typing import Optional
 import asyncio
-from playwright.async_api import Playwright, async_playwright
 
+from core import BrowserPool
 from models import Credentials, PatientDetails, Session, SharedState
 from utils import convert_date_format
 
@@ -27,11 +27,9 @@ class MedwaySession(Session):
         """Create a new Medway session"""
         return super().create(patient, shared_state)
 
-    async def initialize(self, playwright: Playwright) -> None:
+    async def initialize(self, pool: BrowserPool) -> None:
         """Initialize browser session"""
-        self.browser = await playwright.chromium.launch(headless=False)
-        self.context = await self.browser.new_context()
-        self.page = await self.context.new_page()
+        self.page = await self.new_page(pool)
         await self.page.goto("https://www.medway.com.au/login")
 
     async def login(self) -> None:
@@ -86,10 +84,11 @@ class MedwaySession(Session):
         await self.page.get_by_role("button", name="Search").click()
 
 
-async def Medway_process(patient: PatientDetails, shared_state: SharedState):
+async def Medway_process(
+    patient: PatientDetails, shared_state: SharedState, pool: BrowserPool
+):
     # Create and run session
     session = MedwaySession.create(patient, shared_state)
     if not session:
         return
-    async with async_playwright() as playwright:
-        await session.run(playwright)
+    await session.run(pool)
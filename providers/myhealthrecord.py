@@ -1,8 +1,7 @@
 import asyncio
 from typing import Optional
 
-from playwright.async_api import Playwright, async_playwright
-
+from core import BrowserPool
 from models import Credentials, PatientDetails, Session, SharedState
 from utils import convert_date_format
 
@@ -28,11 +27,9 @@ class MyHealthRecordSession(Session):
         """Create a new My Health Record session"""
         return super().create(patient, shared_state)
 
-    async def initialize(self, playwright: Playwright) -> None:
+    async def initialize(self, pool: BrowserPool) -> None:
         """Initialize browser session"""
-        self.browser = await playwright.chromium.launch(headless=False)
-        self.context = await self.browser.new_context()
-        self.page = await self.context.new_page()
+        self.page = await self.new_page(pool)
         await self.page.goto(
             "https://proda.humanservices.gov.au/prodalogin/pages/public/login.jsf?TAM_OP=login&USER"
         )
@@ -55,7 +52,6 @@ class MyHealthRecordSession(Session):
 
         # Handle 2FA
         try:
-            self.shared_state.new_2fa_request = "PRODA"  # Tell monitor we need a code
             two_fa_code = await self.shared_state.wait_for_2fa("PRODA")
             await self.page.get_by_label("Enter Code").click()
             await self.page.get_by_label("Enter Code").fill(two_fa_code)
@@ -121,10 +117,11 @@ class MyHealthRecordSession(Session):
         await self.page.get_by_role("button", name="Search").click()
 
 
-async def MyHealthRecord_process(patient: PatientDetails, shared_state: SharedState):
+async def MyHealthRecord_process(
+    patient: PatientDetails, shared_state: SharedState, pool: BrowserPool
+):
     # Create and run session
     session = MyHealthRecordSession.create(patient, shared_state)
     if not session:
         return
-    async with async_playwright() as playwright:
-        await session.run(playwright)
+    await session.run(pool)
@@ -1,8 +1,8 @@
 from typing import Optional
 
 from playwright._impl._errors import TimeoutError
-from playwright.async_api import Playwright, async_playwright
 
+from core import BrowserPool
 from models import Credentials, PatientDetails, Session, SharedState
 from utils import convert_date_format, convert_gender
 
@@ -28,11 +28,9 @@ class QGovViewerSession(Session):
         """Create a new QGov Viewer session"""
         return super().create(patient, shared_state)
 
-    async def initialize(self, playwright: Playwright) -> None:
+    async def initialize(self, pool: BrowserPool) -> None:
         """Initialize browser session"""
-        self.browser = await playwright.chromium.launch(headless=False)
-        self.context = await self.browser.new_context()
-        self.page = await self.context.new_page()
+        self.page = await self.new_page(pool)
         await self.page.goto("https://hpp.health.qld.gov.au/my.policy")
         await self.page.goto("https://hpp.health.qld.gov.au/")
 
@@ -72,7 +70,6 @@ class QGovViewerSession(Session):
         # implement SMS listener
         # Handle 2FA
         try:
-            self.shared_state.new_2fa_request = "QGov"  # Tell monitor we need a code
             two_fa_code = await self.shared_state.wait_for_2fa("QGov")
             await self.page.get_by_label("Enter the 6-digit code").click()
             await self.page.get_by_label("Enter the 6-digit code").fill(two_fa_code)
@@ -121,10 +118,11 @@ class QGovViewerSession(Session):
             print("Timeout occurred while trying to click 'The Viewer' link.")
 
 
-async def QGovViewer_process(patient: PatientDetails, shared_state: SharedState):
+async def QGovViewer_process(
+    patient: PatientDetails, shared_state: SharedState, pool: BrowserPool
+):
     # Create and run session
     session = QGovViewerSession.create(patient, shared_state)
     if not session:
         return
-    async with async_playwright() as playwright:
-        await session.run(playwright)
+    await session.run(pool)
@@ -1,8 +1,7 @@
 import asyncio
 from typing import Optional
 
-from playwright.async_api import Playwright, async_playwright
-
+from core import BrowserPool
 from models import Credentials, PatientDetails, Session, SharedState
 from utils import convert_date_format
 
@@ -28,11 +27,9 @@ class QScriptSession(Session):
         """Create a new QScript session"""
         return super().create(patient, shared_state)
 
-    async def initialize(self, playwright: Playwright) -> None:
+    async def initialize(self, pool: BrowserPool) -> None:
         """Initialize browser session"""
-        self.browser = await playwright.chromium.launch(headless=False)
-        self.context = await self.browser.new_context()
-        self.page = await self.context.new_page()
+        self.page = await self.new_page(pool)
         await self.page.goto("https://hp.qscript.health.qld.gov.au/home")
         await self.page.wait_for_load_state("networkidle")
 
@@ -59,7 +56,6 @@ class QScriptSession(Session):
 
         # Handle 2FA
         try:
-            self.shared_state.new_2fa_request = "QScript"  # Tell monitor we need a code
             two_fa_code = await self.shared_state.wait_for_2fa("QScript")
             await self.page.get_by_placeholder("Verification code").fill(two_fa_code)
             await self.page.get_by_role("button", name="Verify").click()
@@ -98,10 +94,11 @@ class QScriptSession(Session):
         await self.page.get_by_label("Search").click()
 
 
-async def QScript_process(patient: PatientDetails, shared_state: SharedState):
+async def QScript_process(
+    patient: PatientDetails, shared_state: SharedState, pool: BrowserPool
+):
     # Create and run session
     session = QScriptSession.create(patient, shared_state)
     if not session:
         return
-    async with async_playwright() as playwright:
-        await session.run(playwright)
+    await session.run(pool)
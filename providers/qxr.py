@@ -1,7 +1,6 @@
 from typing import Optional
 
-from playwright.async_api import Playwright, async_playwright
-
+from core import BrowserPool
 from models import Credentials, PatientDetails, Session, SharedState
 from utils import convert_date_format
 
@@ -27,12 +26,10 @@ class QXRSession(Session):
         """Create a new QXR session"""
         return super().create(patient, shared_state)
 
-    async def initialize(self, playwright: Playwright) -> None:
+    async def initialize(self, pool: BrowserPool) -> None:
         """Initialize browser session"""
         # print(f"Launching browser and navigating to QXR...")
-        self.browser = await playwright.chromium.launch(headless=False)
-        self.context = await self.browser.new_context()
-        self.page = await self.context.new_page()
+        self.page = await self.new_page(pool)
         await self.page.goto("https://qxrpacs.com.au/Portal/app#/")
         await self.page.wait_for_load_state("networkidle")
         # print("✓ Page loaded successfully")
@@ -142,11 +139,12 @@ class QXRSession(Session):
             raise
 
 
-async def QXR_process(patient: PatientDetails, shared_state: SharedState):
+async def QXR_process(
+    patient: PatientDetails, shared_state: SharedState, pool: BrowserPool
+):
     """Main entry point for QXR provider"""
     # Create and run session
     session = QXRSession.create(patient, shared_state)
     if not session:
         return
-    async with async_playwright() as playwright:
-        await session.run(playwright)
+    await session.run(pool)
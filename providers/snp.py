@@ -1,7 +1,6 @@
 from typing import Optional
 
-from playwright.async_api import Playwright, async_playwright
-
+from core import BrowserPool
 from models import Credentials, PatientDetails, Session, SharedState
 from utils import convert_date_format
 
@@ -27,11 +26,9 @@ class SNPSession(Session):
         """Create a new SNP session"""
         return super().create(patient, shared_state)
 
-    async def initialize(self, playwright: Playwright) -> None:
+    async def initialize(self, pool: BrowserPool) -> None:
         """Initialize browser session"""
-        self.browser = await playwright.chromium.launch(headless=False)
-        self.context = await self.browser.new_context()
-        self.page = await self.context.new_page()
+        self.page = await self.new_page(pool)
         await self.page.goto("https://www.sonicdx.com.au/#/login")
         await self.page.wait_for_load_state("networkidle")
 
@@ -75,10 +72,11 @@ class SNPSession(Session):
         await self.page.get_by_role("button", name="Search").click()
 
 
-async def SNP_process(patient: PatientDetails, shared_state: SharedState):
+async def SNP_process(
+    patient: PatientDetails, shared_state: SharedState, pool: BrowserPool
+):
     # Create and run session
     session = SNPSession.create(patient, shared_state)
     if not session:
         return
-    async with async_playwright() as playwright:
-        await session.run(playwright)
+    await session.run(pool)
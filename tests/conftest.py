@@ -3,6 +3,8 @@ from unittest.mock import AsyncMock, MagicMock, Mock
 import pytest
 from playwright.async_api import Browser, BrowserContext, Page
 
+from core import BrowserPool
+
 
 @pytest.fixture
 def mock_page():
@@ -39,6 +41,7 @@ def mock_context(mock_page):
     """Create a mock browser context."""
     context = MagicMock(spec=BrowserContext)
     context.new_page = AsyncMock(return_value=mock_page)
+    context.route = AsyncMock()
     return context
 
 
@@ -65,7 +68,7 @@ def test_credentials():
         "MaterPath": {
             "user_name": "test_user",
             "user_password": "test_pass",
-            "totp_secret": "test_secret",
+            "totp_secret": "JBSWY3DPEHPK3PXP",
         },
         "Sonic": {"user_name": "test_user", "user_password": "test_pass"},
         "QScript": {
@@ -88,7 +91,7 @@ def test_credentials():
         "Meditrust": {
             "user_name": "test_user",
             "user_password": "test_pass",
-            "totp_secret": "test_secret",
+            "totp_secret": "JBSWY3DPEHPK3PXP",
         },
         "QXR": {"user_name": "test_user", "user_password": "test_pass"},
         "QScan": {"user_name": "test_user", "user_password": "test_pass"},
@@ -96,7 +99,7 @@ def test_credentials():
         "4cyte": {
             "user_name": "test_user",
             "user_password": "test_pass",
-            "totp_secret": "test_secret",
+            "totp_secret": "JBSWY3DPEHPK3PXP",
         },
         "MaterLegacy": {"user_name": "test_user", "user_password": "test_pass"},
     }
@@ -122,14 +125,15 @@ async def initialized_session(provider_session, mock_playwright, mock_page):
     # We need to ensure this is the page returned by the initialization chain
     mock_context = MagicMock()
     mock_context.new_page = AsyncMock(return_value=mock_page)
+    mock_context.route = AsyncMock()
 
     mock_browser = MagicMock()
     mock_browser.new_context = AsyncMock(return_value=mock_context)
 
     mock_playwright.chromium.launch = AsyncMock(return_value=mock_browser)
 
-    # Initialize with our mocked chain
-    await provider_session.initialize(mock_playwright)
+    # Initialize with our mocked chain through a pool wrapping the mock driver
+    await provider_session.initialize(BrowserPool(mock_playwright))
 
     # Return both session and page for tests to use
     return provider_session, mock_page
@@ -48,7 +48,7 @@ class TestFourCyte(PlaywrightTestCase):
         username_field = self.get_mock_element(click=None, fill=None)
         password_field = self.get_mock_element(click=None, fill=None)
         login_button = self.get_mock_element(click=None)
-        code_field = self.get_mock_element(click=None, fill=None)
+        code_field = self.get_mock_element(click=None, fill=None, wait_for=None)
         submit_button = self.get_mock_element(click=None)
         patients_button = self.get_mock_element(click=None)
         break_glass_link = self.get_mock_element(click=None)
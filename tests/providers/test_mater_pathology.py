@@ -47,7 +47,7 @@ class TestMaterPathology(PlaywrightTestCase):
         password_field = self.get_mock_element(fill=None)
         verify_button = self.get_mock_element(click=None)
         authenticator_link = self.get_mock_element(click=None)
-        code_field = self.get_mock_element(click=None, fill=None)
+        code_field = self.get_mock_element(click=None, fill=None, wait_for=None)
 
         # Mock role selectors
         page.get_by_role = MagicMock(
@@ -39,7 +39,7 @@ class TestMediTrust(PlaywrightTestCase):
         username_field = self.get_mock_element(click=None, fill=None)
         password_field = self.get_mock_element(click=None, fill=None)
         login_button = self.get_mock_element(click=None)
-        code_field = self.get_mock_element(click=None, fill=None)
+        code_field = self.get_mock_element(click=None, fill=None, wait_for=None)
         submit_button = self.get_mock_element(click=None)
 
         # Mock role selectors
@@ -96,6 +96,19 @@ class TestMediTrust(PlaywrightTestCase):
         page.get_by_role.assert_any_call("button", name="Submit")
         submit_button.click.assert_called_once()
 
+    @pytest.mark.asyncio
+    async def test_login_with_invalid_totp_secret(self, initialized_session):
+        """Test that a secret that is not base32 stops login before 2FA."""
+        session, page = await initialized_session
+        session.credentials.totp_secret = "not a secret"
+        code_field = self.get_mock_element(click=None, fill=None, wait_for=None)
+        page.get_by_placeholder = MagicMock(return_value=code_field)
+
+        with pytest.raises(ValueError, match="not valid base32"):
+            await session.login()
+
+        code_field.fill.assert_not_called()
+
     @pytest.mark.asyncio
     async def test_search_patient(self, initialized_session):
         """Test that search_patient is a no-op."""
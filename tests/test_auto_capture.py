@@ -0,0 +1,124 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from core import AutoCapture
+
+
+def make_page():
+    """Create a mock page whose event listeners can be fired by tests."""
+    page = MagicMock()
+    page.listeners = {}
+    page.on.side_effect = lambda event, listener: page.listeners.setdefault(
+        event, []
+    ).append(listener)
+    page.remove_listener.side_effect = lambda event, listener: page.listeners[
+        event
+    ].remove(listener)
+    page.is_closed.return_value = False
+    return page
+
+
+def fire(page, event, arg):
+    for listener in list(page.listeners.get(event, [])):
+        listener(arg)
+
+
+def make_collector():
+    return MagicMock(capture_page_data=AsyncMock())
+
+
+class TestAutoCapture:
+    """Test cases for automatic debounced page captures."""
+
+    @pytest.mark.asyncio
+    async def test_navigation_burst_is_captured_once(self):
+        """Test that quick route changes produce one capture after they stop."""
+        collector = make_collector()
+        auto_capture = AutoCapture(collector, debounce=0.05)
+        page = make_page()
+        auto_capture.watch(page)
+
+        for _ in range(5):
+            fire(page, "framenavigated", page.main_frame)
+            await asyncio.sleep(0.01)
+        collector.capture_page_data.assert_not_called()
+
+        await asyncio.sleep(0.1)
+        collector.capture_page_data.assert_called_once_with(page, task="navigation")
+        await auto_capture.close()
+
+    @pytest.mark.asyncio
+    async def test_subframe_navigation_is_ignored(self):
+        """Test that iframes navigating do not trigger captures."""
+        collector = make_collector()
+        auto_capture = AutoCapture(collector, debounce=0)
+        page = make_page()
+        auto_capture.watch(page)
+
+        fire(page, "framenavigated", MagicMock())
+        await auto_capture.close()
+
+        collector.capture_page_data.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_phase_capture_replaces_pending(self):
+        """Test that a phase capture happens now and drops the pending one."""
+        collector = make_collector()
+        auto_capture = AutoCapture(collector, debounce=0.05)
+        page = make_page()
+        auto_capture.watch(page)
+
+        fire(page, "framenavigated", page.main_frame)
+        await auto_capture.capture(page, "login")
+        await asyncio.sleep(0.1)
+
+        collector.capture_page_data.assert_called_once_with(page, task="login")
+        await auto_capture.close()
+
+    @pytest.mark.asyncio
+    async def test_popups_are_watched(self):
+        """Test that a popup is captured and its own navigations followed."""
+        collector = make_collector()
+        auto_capture = AutoCapture(collector, debounce=0)
+        page = make_page()
+        popup = make_page()
+        auto_capture.watch(page)
+
+        fire(page, "popup", popup)
+        await asyncio.sleep(0.01)
+        fire(popup, "framenavigated", popup.main_frame)
+        await asyncio.sleep(0.01)
+
+        tasks = [c.kwargs["task"] for c in collector.capture_page_data.call_args_list]
+        assert tasks == ["popup", "popup"]
+        await auto_capture.close()
+
+    @pytest.mark.asyncio
+    async def test_close_stops_watching(self):
+        """Test that closing removes listeners and cancels pending captures."""
+        collector = make_collector()
+        auto_capture = AutoCapture(collector, debounce=0.05)
+        page = make_page()
+        auto_capture.watch(page)
+
+        fire(page, "framenavigated", page.main_frame)
+        await auto_capture.close()
+        await asyncio.sleep(0.1)
+
+        assert page.listeners == {"framenavigated": [], "popup": []}
+        collector.capture_page_data.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_failures_do_not_raise(self, capsys):
+        """Test that a failed capture is reported without stopping the session."""
+        collector = make_collector()
+        collector.capture_page_data.side_effect = Exception("page crashed")
+        auto_capture = AutoCapture(collector)
+
+        await auto_capture.capture(make_page(), "search")
+
+        assert (
+            "Automatic search capture failed: page crashed" in capsys.readouterr().out
+        )
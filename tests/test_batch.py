@@ -0,0 +1,147 @@
+import asyncio
+import json
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from batch import BatchRunner, read_patients
+from models import PatientDetails, SharedState
+
+
+def make_session(required_fields, delay=0.0, error=None):
+    """Create a mock logged-in session that records concurrent lookups."""
+    session = MagicMock()
+    session.required_fields = required_fields
+    session.current_page = MagicMock(url="https://portal.example/results")
+    session.active = 0
+    session.max_active = 0
+
+    async def lookup(patient):
+        session.active += 1
+        session.max_active = max(session.max_active, session.active)
+        await asyncio.sleep(delay)
+        session.active -= 1
+        if error:
+            raise error
+
+    session.lookup = AsyncMock(side_effect=lookup)
+    return session
+
+
+class TestReadPatients:
+    """Test cases for streaming patient files."""
+
+    def test_csv_rows_are_validated(self, tmp_path):
+        """Test that CSV rows become PatientDetails or validation errors."""
+        path = tmp_path / "patients.csv"
+        path.write_text(
+            "family_name,given_name,dob,sex\n"
+            "SMITH,JOHN,01011990,m\n"
+            "JONES,ANN,1990-01-01,F\n"
+        )
+
+        rows = list(read_patients(path))
+
+        assert rows[0][0] == 1
+        assert rows[0][1] == PatientDetails("SMITH", "JOHN", "01011990", None, "M")
+        assert isinstance(rows[1][1], ValueError)
+        assert "DDMMYYYY" in str(rows[1][1])
+
+    def test_jsonl_rows(self, tmp_path):
+        """Test that JSONL rows are read and blank lines ignored."""
+        path = tmp_path / "patients.jsonl"
+        path.write_text(
+            json.dumps({"family_name": "SMITH", "medicare_number": "1234 56789 01"})
+            + "\n\n"
+        )
+
+        rows = list(read_patients(path))
+
+        assert len(rows) == 1
+        assert rows[0][1].medicare_number == "12345678901"
+
+    def test_bad_json_line_is_invalid(self, tmp_path):
+        """Test that a malformed line is reported and later lines still read."""
+        path = tmp_path / "patients.jsonl"
+        path.write_text('{"family_name": "SMITH"\n\n{"family_name": "JONES"}\n')
+
+        rows = list(read_patients(path))
+
+        assert [number for number, _ in rows] == [1, 3]
+        assert isinstance(rows[0][1], ValueError)
+        assert "Invalid JSON" in str(rows[0][1])
+        assert rows[1][1].family_name == "JONES"
+
+    def test_non_object_line_is_invalid(self, tmp_path):
+        """Test that a JSON line that is not an object is reported."""
+        path = tmp_path / "patients.jsonl"
+        path.write_text('[1, 2]\n"SMITH"\n{"family_name": "JONES"}\n')
+
+        rows = list(read_patients(path))
+
+        assert [str(error) for _, error in rows[:2]] == [
+            "Expected a JSON object, not list",
+            "Expected a JSON object, not str",
+        ]
+        assert rows[2] == (3, PatientDetails(family_name="JONES"))
+
+    def test_missing_file_fails_before_reading(self, tmp_path):
+        """Test that a bad path raises as soon as the file is opened."""
+        with pytest.raises(FileNotFoundError):
+            read_patients(tmp_path / "missing.csv")
+
+
+class TestBatchRunner:
+    """Test cases for the batch worker pool."""
+
+    @pytest.mark.asyncio
+    async def test_results_per_patient_and_provider(self, tmp_path):
+        """Test that every patient is looked up on every usable provider."""
+        sessions = {
+            "QXR": make_session(["family_name", "dob"]),
+            "Broken": make_session(["family_name"], error=Exception("Timeout")),
+        }
+        output = tmp_path / "results.jsonl"
+        runner = BatchRunner(sessions, SharedState(), workers=2, output_path=output)
+        patients = [
+            (1, PatientDetails("SMITH", dob="01011990")),
+            (2, PatientDetails("JONES")),
+            (3, ValueError("Sex must be 'M', 'F', or 'I'")),
+        ]
+
+        results = await runner.run(iter(patients))
+
+        outcomes = {(r.row, r.provider): r.status for r in results}
+        assert outcomes == {
+            (1, "QXR"): "ok",
+            (1, "Broken"): "error",
+            (2, "QXR"): "skipped",
+            (2, "Broken"): "error",
+            (3, None): "invalid",
+        }
+        assert len(output.read_text().splitlines()) == 5
+
+    @pytest.mark.asyncio
+    async def test_one_lookup_per_provider_at_a_time(self):
+        """Test that workers never drive one provider page concurrently."""
+        session = make_session(["family_name"], delay=0.01)
+        runner = BatchRunner({"QXR": session}, SharedState(), workers=4)
+        patients = ((i, PatientDetails(f"PATIENT{i}")) for i in range(8))
+
+        results = await runner.run(patients)
+
+        assert len(results) == 8
+        assert session.max_active == 1
+
+    @pytest.mark.asyncio
+    async def test_stops_on_exit(self):
+        """Test that no further patients are queued after a quit instruction."""
+        shared_state = SharedState()
+        shared_state.request_exit()
+        session = make_session(["family_name"])
+        runner = BatchRunner({"QXR": session}, shared_state)
+
+        results = await runner.run(iter([(1, PatientDetails("SMITH"))]))
+
+        assert results == []
+        session.lookup.assert_not_called()
@@ -0,0 +1,115 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from core import BrowserPool
+
+
+def make_playwright():
+    """Create a mock playwright whose launches return distinct browsers."""
+    playwright = MagicMock()
+
+    def launch(**options):
+        browser = MagicMock()
+        browser.is_connected = MagicMock(return_value=True)
+        browser.new_context = AsyncMock(side_effect=lambda **kwargs: MagicMock())
+        browser.close = AsyncMock()
+        return browser
+
+    playwright.chromium.launch = AsyncMock(side_effect=launch)
+    playwright.stop = AsyncMock()
+    return playwright
+
+
+class TestBrowserPool:
+    """Test cases for the shared browser pool."""
+
+    @pytest.mark.asyncio
+    async def test_contexts_share_one_browser(self):
+        """Test that sessions with the same options share a single launch."""
+        playwright = make_playwright()
+        pool = BrowserPool(playwright)
+
+        first = await pool.new_context()
+        second = await pool.new_context({})
+
+        assert first is not second
+        playwright.chromium.launch.assert_called_once_with(headless=False)
+
+    @pytest.mark.asyncio
+    async def test_launch_options_per_provider(self):
+        """Test that different launch options get their own browser."""
+        playwright = make_playwright()
+        pool = BrowserPool(playwright)
+
+        default_browser = await pool.get_browser()
+        headless_browser = await pool.get_browser({"headless": True})
+
+        assert default_browser is not headless_browser
+        assert playwright.chromium.launch.call_count == 2
+        playwright.chromium.launch.assert_any_call(headless=True)
+
+    @pytest.mark.asyncio
+    async def test_relaunch_disconnected_browser(self):
+        """Test that a crashed browser is replaced on next use."""
+        playwright = make_playwright()
+        pool = BrowserPool(playwright)
+
+        browser = await pool.get_browser()
+        browser.is_connected.return_value = False
+
+        assert await pool.get_browser() is not browser
+        assert playwright.chromium.launch.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_close_keeps_injected_driver(self):
+        """Test that close shuts browsers but not a driver it did not start."""
+        playwright = make_playwright()
+        pool = BrowserPool(playwright)
+        browser = await pool.get_browser()
+
+        await pool.close()
+
+        browser.close.assert_called_once()
+        playwright.stop.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_prewarm_hands_out_spare_contexts(self):
+        """Test that pre-warmed contexts are used and replaced in the background."""
+        playwright = make_playwright()
+        pool = BrowserPool(playwright)
+
+        await pool.prewarm(contexts=2)
+        browser = await pool.get_browser()
+        spares = list(pool._spares[pool._launch_key(None)])
+
+        assert await pool.new_context() is spares[0]
+        await pool._refills[pool._launch_key(None)]
+        assert len(pool._spares[pool._launch_key(None)]) == 2
+        assert browser.new_context.call_count == 3
+        playwright.chromium.launch.assert_called_once_with(headless=False)
+
+    @pytest.mark.asyncio
+    async def test_context_options_skip_spares(self):
+        """Test that sessions with their own context options get a new context."""
+        playwright = make_playwright()
+        pool = BrowserPool(playwright)
+        await pool.prewarm(contexts=1)
+        spare = pool._spares[pool._launch_key(None)][0]
+
+        context = await pool.new_context(storage_state={"cookies": []})
+
+        assert context is not spare
+        assert pool._spares[pool._launch_key(None)] == [spare]
+
+    @pytest.mark.asyncio
+    async def test_relaunch_drops_spares(self):
+        """Test that contexts on a crashed browser are not handed out."""
+        playwright = make_playwright()
+        pool = BrowserPool(playwright)
+        await pool.prewarm(contexts=1)
+        spare = pool._spares[pool._launch_key(None)][0]
+        (await pool.get_browser()).is_connected.return_value = False
+
+        assert await pool.new_context() is not spare
+        await pool.close()
@@ -0,0 +1,154 @@
+import json
+import sqlite3
+from datetime import datetime
+
+import pytest
+
+from core import CaptureIndex, PageDataCollector, RetentionManager
+from core.capture_index import main
+from tests.test_data_collector import make_page
+
+
+def metadata(timestamp, task="search", url="https://portal.example/results"):
+    """Metadata as written by PageDataCollector."""
+    return {
+        "task": task,
+        "url": url,
+        "timestamp": timestamp,
+        "screenshot_path": f"qxr/screenshot_{timestamp}.png",
+        "mhtml_path": f"qxr/page_{timestamp}.mhtml",
+    }
+
+
+def epoch(text):
+    return datetime.fromisoformat(text).timestamp()
+
+
+class TestCaptureIndex:
+    """Test cases for the SQLite capture metadata index."""
+
+    def test_query_filters(self, tmp_path):
+        """Test that provider, task, URL and time filters combine."""
+        index = CaptureIndex(tmp_path / "captures.db")
+        index.add("qxr", "qxr/1", metadata("20241001_090000_000000_0001"))
+        index.add("qxr", "qxr/2", metadata("20241002_090000_000000_0001", "login"))
+        index.add("medway", "medway/1", metadata("20241003_090000_000000_0001"))
+
+        assert [r["capture_id"] for r in index.query(provider="qxr")] == [
+            "qxr/2",
+            "qxr/1",
+        ]
+        assert [r["capture_id"] for r in index.query(task="search")] == [
+            "medway/1",
+            "qxr/1",
+        ]
+        rows = index.query(since=epoch("2024-10-02"), until=epoch("2024-10-02T23:59"))
+        assert [r["capture_id"] for r in rows] == ["qxr/2"]
+        rows = index.query(url="https://portal.example/res", limit=1)
+        assert rows[0]["capture_id"] == "medway/1"
+        assert index.query(url="https://portal.example/resultz") == []
+        assert index.query(url="results") == []  # Prefixes, not substrings
+
+    def test_url_lookup_uses_index(self, tmp_path):
+        """Test that URL lookups are answered from the url index."""
+        index = CaptureIndex(tmp_path / "captures.db")
+        index.add("qxr", "qxr/1", metadata("20241001_090000_000000_0001"))
+        index.flush()
+
+        plan = index._connect().execute(
+            "EXPLAIN QUERY PLAN SELECT * FROM captures WHERE url >= ? AND url < ?",
+            ("https://a", "https://b"),
+        )
+
+        assert "captures_url" in " ".join(row[-1] for row in plan)
+
+    def test_inserts_are_batched(self, tmp_path):
+        """Test that rows reach the database a batch at a time."""
+        path = tmp_path / "captures.db"
+        index = CaptureIndex(path, batch_size=2)
+
+        index.add("qxr", "qxr/1", metadata("20241001_090000_000000_0001"))
+        assert not path.exists()
+        index.add("qxr", "qxr/2", metadata("20241001_090000_000000_0002"))
+
+        with sqlite3.connect(path) as connection:
+            assert connection.execute("SELECT count(*) FROM captures").fetchone() == (
+                2,
+            )
+            assert connection.execute("PRAGMA journal_mode").fetchone() == ("wal",)
+        index.close()
+
+    def test_remove(self, tmp_path):
+        """Test that evicted captures disappear from the index."""
+        index = CaptureIndex(tmp_path / "captures.db")
+        index.add("qxr", tmp_path / "qxr/1", metadata("20241001_090000_000000_0001"))
+
+        index.remove([tmp_path / "qxr/1"])
+
+        assert index.query() == []
+
+    def test_import_json(self, tmp_path):
+        """Test that metadata files from before the index are picked up."""
+        (tmp_path / "qxr").mkdir()
+        (tmp_path / "qxr" / "metadata_20240101_120000.json").write_text(
+            json.dumps(metadata("20240101_120000"))
+        )
+        (tmp_path / "qxr" / "metadata_broken.json").write_text("{")
+        index = CaptureIndex(tmp_path / "captures.db")
+
+        assert index.import_json(tmp_path) == 1
+        row = index.query()[0]
+        assert row["provider"] == "qxr"
+        assert row["captured_at"] == epoch("2024-01-01T12:00:00")
+
+    def test_cli(self, tmp_path, capsys):
+        """Test that the command line prints matching captures."""
+        path = tmp_path / "captures.db"
+        index = CaptureIndex(path)
+        index.add("qxr", "qxr/1", metadata("20241001_090000_000000_0001"))
+        index.close()
+
+        main(["--index", str(path), "--provider", "qxr", "--since", "2024-09-30"])
+
+        out = capsys.readouterr().out
+        assert "2024-10-01 09:00:00" in out
+        assert "qxr/page_20241001_090000_000000_0001.mhtml" in out
+
+    def test_adds_dom_path_to_older_databases(self, tmp_path):
+        """Test that an index created before DOM snapshots is upgraded."""
+        path = tmp_path / "captures.db"
+        with sqlite3.connect(path) as connection:
+            connection.execute(
+                "CREATE TABLE captures (capture_id TEXT PRIMARY KEY, provider TEXT, "
+                "task TEXT, url TEXT, timestamp TEXT, captured_at REAL, "
+                "screenshot_path TEXT, mhtml_path TEXT, duplicate_of TEXT)"
+            )
+        index = CaptureIndex(path)
+        row = metadata("20241001_090000_000000_0001")
+        row["dom_path"] = row.pop("mhtml_path").replace(".mhtml", ".dom.jsonl.gz")
+
+        index.add("qxr", "qxr/1", row)
+
+        assert index.query()[0]["dom_path"] == row["dom_path"]
+        index.close()
+
+    @pytest.mark.asyncio
+    async def test_collector_writes_no_metadata_files(self, tmp_path):
+        """Test that an indexed collector records metadata only in SQLite."""
+        index = CaptureIndex(tmp_path / "captures.db")
+        retention = RetentionManager(tmp_path, max_total_bytes=30)
+        collector = PageDataCollector(
+            tmp_path / "qxr", index=index, retention=retention
+        )
+
+        first = await collector.capture_page_data(make_page(), task="search")
+        await collector.flush()
+        assert [r["timestamp"] for r in index.query(task="search")] == [
+            first["timestamp"]
+        ]
+        assert not list((tmp_path / "qxr").glob("metadata_*.json"))
+
+        # Over budget, so the first capture is evicted along with its row
+        second = await collector.capture_page_data(make_page(), task="search")
+        await collector.close()
+        assert [r["timestamp"] for r in index.query()] == [second["timestamp"]]
@@ -0,0 +1,132 @@
+import base64
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from core import DEFAULT_CAPTURE_PROFILE, CaptureProfile, PageDataCollector
+from tests.test_data_collector import make_page
+
+
+def make_cdp_page():
+    """Create a mock page whose DevTools session returns layout metrics."""
+    cdp_session = MagicMock(detach=AsyncMock())
+
+    async def send(method, params=None):
+        if method == "Page.getLayoutMetrics":
+            return {
+                "cssLayoutViewport": {
+                    "pageX": 0,
+                    "pageY": 200,
+                    "clientWidth": 1280,
+                    "clientHeight": 720,
+                },
+                "cssContentSize": {"x": 0, "y": 0, "width": 1280, "height": 5000},
+            }
+        return {"data": base64.b64encode(b"RIFFWEBP").decode()}
+
+    cdp_session.send = AsyncMock(side_effect=send)
+    page = MagicMock()
+    page.context.new_cdp_session = AsyncMock(return_value=cdp_session)
+    page.locator.return_value.first.bounding_box = AsyncMock(
+        return_value={"x": 10, "y": 20, "width": 300, "height": 400}
+    )
+    return page, cdp_session
+
+
+class TestCaptureProfile:
+    """Test cases for screenshot capture profiles."""
+
+    def test_rejects_bad_settings(self):
+        """Test that invalid combinations fail when the profile is made."""
+        with pytest.raises(ValueError):
+            CaptureProfile("thumbnail")
+        with pytest.raises(ValueError):
+            CaptureProfile("element")
+        with pytest.raises(ValueError):
+            CaptureProfile(image_format="gif")
+        with pytest.raises(ValueError):
+            CaptureProfile(quality=80)
+        with pytest.raises(ValueError):
+            CaptureProfile(scale=2)
+
+    @pytest.mark.asyncio
+    async def test_default_is_full_page_png(self):
+        """Test that the default keeps the original full page PNG."""
+        page = MagicMock(screenshot=AsyncMock(return_value=b"png"))
+
+        assert await DEFAULT_CAPTURE_PROFILE.screenshot(page) == b"png"
+        page.screenshot.assert_called_once_with(full_page=True, type="png")
+        assert DEFAULT_CAPTURE_PROFILE.suffix == ".png"
+
+    @pytest.mark.asyncio
+    async def test_element_jpeg(self):
+        """Test that element captures screenshot the first matching element."""
+        page = MagicMock()
+        element = page.locator.return_value.first
+        element.screenshot = AsyncMock(return_value=b"jpeg")
+        profile = CaptureProfile(
+            "element", selector="table.results", image_format="jpeg", quality=60
+        )
+
+        assert await profile.screenshot(page) == b"jpeg"
+        page.locator.assert_called_once_with("table.results")
+        element.screenshot.assert_called_once_with(type="jpeg", quality=60)
+
+    @pytest.mark.asyncio
+    async def test_scaled_webp_uses_devtools(self):
+        """Test that WebP and scaled captures go through DevTools."""
+        page, cdp_session = make_cdp_page()
+        profile = CaptureProfile(image_format="webp", quality=50, scale=0.5)
+
+        assert await profile.screenshot(page) == b"RIFFWEBP"
+        cdp_session.send.assert_called_with(
+            "Page.captureScreenshot",
+            {
+                "format": "webp",
+                "clip": {"x": 0, "y": 0, "width": 1280, "height": 5000, "scale": 0.5},
+                "captureBeyondViewport": True,
+                "quality": 50,
+            },
+        )
+        cdp_session.detach.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_devtools_clips(self):
+        """Test the clip for viewport and element captures."""
+        page, cdp_session = make_cdp_page()
+
+        await CaptureProfile("viewport", scale=0.5).screenshot(page)
+        params = cdp_session.send.call_args.args[1]
+        assert params["clip"] == {
+            "x": 0,
+            "y": 200,
+            "width": 1280,
+            "height": 720,
+            "scale": 0.5,
+        }
+        assert params["captureBeyondViewport"] is False
+
+        await CaptureProfile("element", selector="#grid", scale=0.5).screenshot(page)
+        params = cdp_session.send.call_args.args[1]
+        assert params["clip"] == {
+            "x": 10,
+            "y": 220,
+            "width": 300,
+            "height": 400,
+            "scale": 0.5,
+        }
+
+    @pytest.mark.asyncio
+    async def test_collector_uses_task_profile(self, tmp_path):
+        """Test that a task's profile decides the image format and suffix."""
+        search = CaptureProfile("viewport", image_format="jpeg", quality=70)
+        collector = PageDataCollector(tmp_path, task_profiles={"search": search})
+        page = make_page()
+
+        login = await collector.capture_page_data(page, task="login")
+        results = await collector.capture_page_data(page, task="search")
+        await collector.close()
+
+        assert login["screenshot_path"].endswith(".png")
+        assert results["screenshot_path"].endswith(".jpg")
+        page.screenshot.assert_called_with(full_page=False, type="jpeg", quality=70)
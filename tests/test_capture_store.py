@@ -0,0 +1,115 @@
+import json
+
+import pytest
+
+from core import CaptureStore, PageDataCollector
+from core.capture_store import main, split_mhtml
+from tests.test_data_collector import make_page
+
+
+def make_mhtml(body: str, boundary: str = "----MultipartBoundary--abc----") -> str:
+    """Create a Chrome-style MHTML snapshot with a page and a shared stylesheet."""
+    return (
+        "From: <Saved by Blink>\r\n"
+        "Snapshot-Content-Location: https://portal.example/\r\n"
+        "MIME-Version: 1.0\r\n"
+        "Content-Type: multipart/related;\r\n"
+        '\ttype="text/html";\r\n'
+        f'\tboundary="{boundary}"\r\n'
+        "\r\n\r\n"
+        f"--{boundary}\r\n"
+        "Content-Type: text/html\r\n"
+        "Content-Location: https://portal.example/\r\n\r\n"
+        f"<html><body>{body}</body></html>\r\n"
+        f"--{boundary}\r\n"
+        "Content-Type: text/css\r\n"
+        "Content-Location: https://portal.example/site.css\r\n\r\n"
+        f"body {{ font-family: sans-serif; }}{' ' * 2000}\r\n"
+        f"--{boundary}--\r\n"
+    )
+
+
+def object_files(store):
+    return [p for p in store.objects_dir.rglob("*") if p.is_file()]
+
+
+class TestCaptureStore:
+    """Test cases for content-addressed capture storage."""
+
+    def test_split_round_trips(self):
+        """Test that splitting and joining gives back the exact document."""
+        mhtml = make_mhtml("<p>Results</p>")
+
+        header, parts, tail, delimiter = split_mhtml(mhtml)
+
+        assert len(parts) == 2
+        assert delimiter.join([header, *parts, tail]) == mhtml
+
+    def test_document_without_boundary(self, tmp_path):
+        """Test that a non-multipart document is stored as a single part."""
+        store = CaptureStore(tmp_path)
+        manifest = tmp_path / "page.mhtml.json"
+
+        store.put_mhtml("<html></html>", manifest)
+
+        assert store.read_mhtml(manifest) == "<html></html>"
+
+    def test_shared_parts_are_stored_once(self, tmp_path):
+        """Test that a stylesheet repeated across snapshots is kept once."""
+        store = CaptureStore(tmp_path)
+        first = make_mhtml("<p>Login</p>", "----MultipartBoundary--one----")
+        second = make_mhtml("<p>Results</p>", "----MultipartBoundary--two----")
+
+        store.put_mhtml(first, tmp_path / "qxr" / "page_1.mhtml.json")
+        store.put_mhtml(second, tmp_path / "qxr" / "page_2.mhtml.json")
+
+        assert len(object_files(store)) == 3
+        assert store.read_mhtml(tmp_path / "qxr" / "page_1.mhtml.json") == first
+        assert store.read_mhtml(tmp_path / "qxr" / "page_2.mhtml.json") == second
+        stored = sum(p.stat().st_size for p in object_files(store))
+        assert stored < len(first) + len(second)
+
+    def test_rejects_other_json(self, tmp_path):
+        """Test that an unrelated JSON file is not treated as a manifest."""
+        path = tmp_path / "metadata.json"
+        path.write_text(json.dumps({"task": "login"}))
+
+        with pytest.raises(ValueError):
+            CaptureStore(tmp_path).read_mhtml(path)
+
+    def test_identical_screenshots_share_a_file(self, tmp_path):
+        """Test that the same image is stored once and left uncompressed."""
+        store = CaptureStore(tmp_path)
+
+        first = store.put_screenshot(b"\x89PNG same")
+        second = store.put_screenshot(b"\x89PNG same")
+
+        assert first == second == store.screenshot_path(b"\x89PNG same")
+        assert first.read_bytes() == b"\x89PNG same"
+
+    def test_cli_restores_mhtml(self, tmp_path, capsys):
+        """Test that the command line rebuilds the .mhtml next to the manifest."""
+        mhtml = make_mhtml("<p>Results</p>")
+        manifest = tmp_path / "qxr" / "page_1.mhtml.json"
+        CaptureStore(tmp_path).put_mhtml(mhtml, manifest)
+
+        main([str(manifest), "--root", str(tmp_path)])
+
+        restored = tmp_path / "qxr" / "page_1.mhtml"
+        assert restored.read_bytes() == mhtml.encode("utf-8")
+        assert str(restored) in capsys.readouterr().out
+
+    @pytest.mark.asyncio
+    async def test_collector_uses_store(self, tmp_path):
+        """Test that a collector with a store writes a manifest, not raw MHTML."""
+        store = CaptureStore(tmp_path)
+        collector = PageDataCollector(tmp_path / "qxr", store=store)
+
+        metadata = await collector.capture_page_data(make_page())
+        await collector.close()
+
+        assert metadata["mhtml_path"].endswith(".mhtml.json")
+        assert store.read_mhtml(metadata["mhtml_path"]).startswith("MIME-Version")
+        with open(metadata["screenshot_path"], "rb") as f:
+            assert f.read() == b"\x89PNG"
+        assert not list((tmp_path / "qxr").glob("*.mhtml"))
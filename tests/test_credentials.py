@@ -0,0 +1,95 @@
+import json
+import os
+
+import pytest
+
+from models import Credentials, CredentialsStore
+
+CREDENTIALS = {
+    "QXR": {"user_name": "qxr_user", "user_password": "qxr_pass"},
+    "Template": {"user_name": "your_username", "user_password": "your_password"},
+}
+
+
+@pytest.fixture
+def credentials_file(tmp_path):
+    path = tmp_path / "credentials.json"
+    path.write_text(json.dumps(CREDENTIALS))
+    return path
+
+
+def rewrite(path, data):
+    """Rewrite the file, moving its modification time on for coarse clocks."""
+    stat = path.stat()
+    path.write_text(json.dumps(data))
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+
+class TestCredentialsStore:
+    """Test cases for the cached credentials file."""
+
+    def test_parses_file_once(self, credentials_file, monkeypatch):
+        """Test that an unchanged file is not parsed again."""
+        store = CredentialsStore(str(credentials_file))
+        first = store.get("QXR")
+
+        def fail(*args, **kwargs):
+            raise AssertionError("credentials file was parsed again")
+
+        monkeypatch.setattr(json, "load", fail)
+        assert store.get("QXR") is first
+        assert first.user_name == "qxr_user"
+
+    def test_reloads_changed_file(self, credentials_file):
+        """Test that edits to the file are picked up on the next read."""
+        store = CredentialsStore(str(credentials_file))
+        store.get("QXR")
+
+        rewrite(credentials_file, {"QXR": {"user_name": "new", "user_password": "x"}})
+
+        assert store.get("QXR").user_name == "new"
+        with pytest.raises(ValueError, match="Credentials for Template not found"):
+            store.get("Template")
+
+    def test_reloads_replaced_file(self, credentials_file, tmp_path):
+        """Test that a file moved into place is picked up."""
+        store = CredentialsStore(str(credentials_file))
+        store.get("QXR")
+
+        replacement = tmp_path / "replacement.json"
+        replacement.write_text(
+            json.dumps({"QXR": {"user_name": "moved", "user_password": "x"}})
+        )
+        os.replace(replacement, credentials_file)
+
+        assert store.get("QXR").user_name == "moved"
+
+    def test_configured(self, credentials_file):
+        """Test that template and missing entries are not configured."""
+        store = CredentialsStore(str(credentials_file))
+
+        assert store.configured("QXR")
+        assert not store.configured("Template")
+        assert not store.configured("Missing")
+
+    def test_errors(self, credentials_file, tmp_path):
+        """Test that missing files, bad JSON and bad entries are reported."""
+        with pytest.raises(FileNotFoundError, match="not found"):
+            CredentialsStore(str(tmp_path / "missing.json")).data()
+
+        rewrite(credentials_file, {"QXR": {"user_name": "only"}})
+        with pytest.raises(ValueError, match="Invalid credential format"):
+            CredentialsStore(str(credentials_file)).get("QXR")
+
+        credentials_file.write_text("{not json")
+        with pytest.raises(ValueError, match="Invalid JSON"):
+            CredentialsStore(str(credentials_file)).data()
+
+    def test_load_shares_store(self, credentials_file):
+        """Test that Credentials.load uses one store per file."""
+        store = CredentialsStore.for_path(str(credentials_file))
+
+        credentials = Credentials.load(str(credentials_file), "QXR")
+
+        assert CredentialsStore.for_path(str(credentials_file)) is store
+        assert store.get("QXR") is credentials
@@ -0,0 +1,109 @@
+import asyncio
+import json
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from core import CaptureWriter, PageDataCollector
+
+
+def make_page():
+    """Create a mock page that returns screenshot bytes and an MHTML snapshot."""
+    cdp_session = MagicMock(
+        send=AsyncMock(return_value={"data": "MIME-Version: 1.0\r\n"}),
+        detach=AsyncMock(),
+    )
+    page = MagicMock()
+    page.url = "https://portal.example/results"
+    page.screenshot = AsyncMock(return_value=b"\x89PNG")
+    page.context.new_cdp_session = AsyncMock(return_value=cdp_session)
+    return page
+
+
+class TestPageDataCollector:
+    """Test cases for queued page captures."""
+
+    @pytest.mark.asyncio
+    async def test_capture_is_written_in_background(self, tmp_path):
+        """Test that a capture returns its paths and the files follow."""
+        collector = PageDataCollector(tmp_path)
+
+        metadata = await collector.capture_page_data(make_page(), task="results")
+        await collector.close()
+
+        assert metadata["url"] == "https://portal.example/results"
+        with open(metadata["screenshot_path"], "rb") as f:
+            assert f.read() == b"\x89PNG"
+        with open(metadata["mhtml_path"], encoding="utf-8") as f:
+            assert f.read().startswith("MIME-Version")
+        saved = json.loads(
+            (tmp_path / f"metadata_{metadata['timestamp']}.json").read_text()
+        )
+        assert saved == metadata
+        assert not list(tmp_path.glob("*.tmp"))
+
+    @pytest.mark.asyncio
+    async def test_same_second_captures_do_not_collide(self, tmp_path):
+        """Test that back-to-back captures get distinct filenames."""
+        collector = PageDataCollector(tmp_path)
+        page = make_page()
+
+        first = await collector.capture_page_data(page)
+        second = await collector.capture_page_data(page)
+        await collector.close()
+
+        assert first["screenshot_path"] != second["screenshot_path"]
+        assert len(list(tmp_path.glob("metadata_*.json"))) == 2
+
+    @pytest.mark.asyncio
+    async def test_shared_writer_is_left_running(self, tmp_path):
+        """Test that closing a collector only flushes a writer it was given."""
+        writer = CaptureWriter()
+        collector = PageDataCollector(tmp_path, writer=writer)
+
+        metadata = await collector.capture_page_data(make_page())
+        await collector.close()
+
+        assert (tmp_path / f"metadata_{metadata['timestamp']}.json").exists()
+        assert writer._worker is not None and not writer._worker.done()
+        await writer.close()
+
+
+class TestCaptureWriter:
+    """Test cases for the bounded background writer."""
+
+    @pytest.mark.asyncio
+    async def test_submit_waits_when_queue_is_full(self, tmp_path, monkeypatch):
+        """Test that a slow disk applies back-pressure to new captures."""
+        release = asyncio.Event()
+        writer = CaptureWriter(max_pending=1)
+
+        async def slow_to_thread(func, files):
+            await release.wait()
+            func(files)
+
+        monkeypatch.setattr(asyncio, "to_thread", slow_to_thread)
+        await writer.submit({tmp_path / "a": b"a"})
+        await asyncio.sleep(0)  # Worker takes the first capture
+        await writer.submit({tmp_path / "b": b"b"})
+
+        third = asyncio.create_task(writer.submit({tmp_path / "c": b"c"}))
+        await asyncio.sleep(0)
+        assert not third.done()
+
+        release.set()
+        await asyncio.wait_for(third, 1)
+        await writer.close()
+        assert sorted(p.name for p in tmp_path.iterdir()) == ["a", "b", "c"]
+
+    @pytest.mark.asyncio
+    async def test_failed_write_removes_partial_capture(self, tmp_path):
+        """Test that a capture that cannot be written leaves no files behind."""
+        writer = CaptureWriter()
+
+        await writer.submit(
+            {tmp_path / "shot.png": b"png", tmp_path / "missing" / "meta.json": "{}"}
+        )
+        await writer.close()
+
+        assert list(tmp_path.iterdir()) == []
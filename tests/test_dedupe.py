@@ -0,0 +1,165 @@
+import io
+import json
+from unittest.mock import AsyncMock
+
+import pytest
+
+from core import PageDataCollector, ScreenshotDeduper
+from core.dedupe import hamming_distance, perceptual_hash
+from tests.test_data_collector import make_page
+
+np = pytest.importorskip("numpy")
+Image = pytest.importorskip("PIL.Image")
+
+
+def make_png(pixels) -> bytes:
+    """Encode a greyscale array as PNG."""
+    buffer = io.BytesIO()
+    Image.fromarray(np.asarray(pixels, dtype=np.uint8)).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def gradient(width=320, height=240):
+    """A left-to-right ramp with a dark band, like a page with a header."""
+    pixels = np.tile(np.linspace(0, 255, width), (height, 1))
+    pixels[:40] = 30
+    return pixels
+
+
+def search_page(results=()):
+    """A white page with a header and search form, and a row per result."""
+    pixels = np.full((600, 800), 255)
+    pixels[:60] = 40  # Header
+    pixels[90:120, 40:400] = 200  # Search box
+    for row, words in enumerate(results):
+        top = 160 + row * 30
+        left = 40
+        for width in words:  # Dark text blocks of varying length
+            pixels[top : top + 10, left : left + width] = 60
+            left += width + 12
+    return pixels
+
+
+RESULTS = [(60, 90, 40, 120), (75, 50, 110, 30), (40, 130, 70, 55)]
+
+
+class TestPerceptualHash:
+    """Test cases for the difference hash."""
+
+    def test_small_changes_keep_the_hash_close(self):
+        """Test that a blinking cursor barely moves the hash."""
+        page = gradient()
+        cursor = page.copy()
+        cursor[100:110, 50:52] = 0
+
+        distance = hamming_distance(
+            perceptual_hash(make_png(page)), perceptual_hash(make_png(cursor))
+        )
+
+        assert distance <= 2
+
+    def test_different_pages_are_far_apart(self):
+        """Test that a different layout changes many bits."""
+        page = gradient()
+        other = np.fliplr(page)
+
+        distance = hamming_distance(
+            perceptual_hash(make_png(page)), perceptual_hash(make_png(other))
+        )
+
+        assert distance > 16
+
+
+class TestScreenshotDeduper:
+    """Test cases for spotting a page that has not changed."""
+
+    def test_matches_last_capture_of_page(self):
+        """Test that a repeated screenshot returns the page's last capture."""
+        deduper = ScreenshotDeduper()
+        image_hash, previous = deduper.check(make_png(gradient()), "search")
+        assert previous is None
+        deduper.remember("search", image_hash, {"timestamp": "1"})
+
+        _, previous = deduper.check(make_png(gradient()), "search")
+
+        assert previous == {"timestamp": "1"}
+
+    def test_results_do_not_match_empty_form(self):
+        """Test that a page with results is not a duplicate of the bare form."""
+        deduper = ScreenshotDeduper()
+        form_hash, _ = deduper.check(make_png(search_page()), "search")
+        deduper.remember("search", form_hash, {"timestamp": "1"})
+
+        results = make_png(search_page(RESULTS))
+        results_hash, previous = deduper.check(results, "search")
+        assert previous is None
+        deduper.remember("search", results_hash, {"timestamp": "2"})
+
+        other = [(90, 60, 40, 120), (75, 50, 110, 30), (40, 130, 70, 55)]
+        assert deduper.check(make_png(search_page(other)), "search")[1] is None
+        assert deduper.check(make_png(search_page()), "search")[1] is None
+
+    def test_perceptual_match_is_opt_in(self):
+        """Test that re-encoded screenshots only match with a max_distance."""
+        page = gradient()
+        png = make_png(page)
+        buffer = io.BytesIO()
+        Image.fromarray(np.asarray(page, dtype=np.uint8)).save(
+            buffer, "PNG", compress_level=1
+        )
+        reencoded = buffer.getvalue()
+        assert reencoded != png
+
+        for deduper, matches in (
+            (ScreenshotDeduper(), False),
+            (ScreenshotDeduper(max_distance=0), True),
+        ):
+            image_hash, _ = deduper.check(png, "search")
+            deduper.remember("search", image_hash, {"timestamp": "1"})
+            assert (deduper.check(reencoded, "search")[1] is not None) == matches
+
+    def test_other_pages_never_match(self):
+        """Test that only captures of the same page are compared."""
+        deduper = ScreenshotDeduper()
+        image_hash, _ = deduper.check(make_png(gradient()), "login")
+        deduper.remember("login", image_hash, {"timestamp": "1"})
+
+        assert deduper.check(make_png(gradient()), "search")[1] is None
+
+    def test_history_is_bounded(self):
+        """Test that only the last few pages are remembered."""
+        deduper = ScreenshotDeduper(history=1)
+        page = make_png(gradient())
+        page_hash, _ = deduper.check(page, "login")
+        deduper.remember("login", page_hash, {"timestamp": "1"})
+        deduper.remember("search", page_hash, {"timestamp": "2"})
+
+        assert deduper.check(page, "login")[1] is None
+        assert deduper.check(page, "search")[1] == {"timestamp": "2"}
+
+    def test_undecodable_image_is_never_a_duplicate(self):
+        """Test that a broken image is captured rather than skipped."""
+        deduper = ScreenshotDeduper(max_distance=0)
+        deduper.remember("search", 0, {"timestamp": "1"})
+
+        assert deduper.check(b"not an image", "search") == (None, None)
+
+    @pytest.mark.asyncio
+    async def test_collector_links_duplicates(self, tmp_path):
+        """Test that an unchanged page only writes metadata pointing back."""
+        collector = PageDataCollector(tmp_path, dedupe=ScreenshotDeduper())
+        page = make_page()
+        page.screenshot = AsyncMock(return_value=make_png(gradient()))
+
+        first = await collector.capture_page_data(page, task="search_form")
+        second = await collector.capture_page_data(page, task="search_form")
+        other = await collector.capture_page_data(page, task="search")
+        await collector.close()
+
+        assert second["duplicate_of"] == first["timestamp"]
+        assert second["mhtml_path"] == first["mhtml_path"]
+        assert "duplicate_of" not in other
+        assert page.context.new_cdp_session.await_count == 2
+        assert len(list(tmp_path.glob("screenshot_*.png"))) == 2
+        saved = tmp_path / f"metadata_{second['timestamp']}.json"
+        assert json.loads(saved.read_text()) == second
@@ -0,0 +1,187 @@
+import gzip
+import json
+from unittest.mock import AsyncMock
+
+import pytest
+
+from core import CaptureStore, DomSnapshot, PageDataCollector
+from core.dom_snapshot import capture_dom_snapshot, main, read_dom_snapshot, to_html
+from tests.test_data_collector import make_page
+
+STYLES = ("display", "color")
+
+
+def make_result():
+    """A DOMSnapshot.captureSnapshot result for a small results page."""
+    strings = [
+        "#document",  # 0
+        "HTML",  # 1
+        "BODY",  # 2
+        "P",  # 3
+        "#text",  # 4
+        "Results for SMITH",  # 5
+        "class",  # 6
+        "hit",  # 7
+        "INPUT",  # 8
+        "SMITH",  # 9
+        "block",  # 10
+        "rgb(0, 0, 0)",  # 11
+    ]
+    nodes = {
+        "parentIndex": [-1, 0, 1, 2, 3, 2],
+        "nodeType": [9, 1, 1, 1, 3, 1],
+        "nodeName": [0, 1, 2, 3, 4, 8],
+        "nodeValue": [-1, -1, -1, -1, 5, -1],
+        "attributes": [[], [], [], [6, 7], [], []],
+        "inputValue": {"index": [5], "value": [9]},
+    }
+    layout = {
+        "nodeIndex": [1, 3],
+        "styles": [[10, 11], [10, -1]],
+        "bounds": [[0, 0, 1280, 720], [8, 8, 300.25, 18]],
+    }
+    return {"documents": [{"nodes": nodes, "layout": layout}], "strings": strings}
+
+
+def make_dom_page():
+    """A mock page whose DevTools session returns a DOM snapshot."""
+    page = make_page()
+    page.context.new_cdp_session.return_value.send.return_value = make_result()
+    page.inner_text = AsyncMock(return_value="Results for SMITH")
+    return page
+
+
+class TestDomSnapshot:
+    """Test cases for compact DOM snapshots."""
+
+    @pytest.mark.asyncio
+    async def test_capture_requests_whitelisted_styles(self):
+        """Test that only the given computed styles are requested."""
+        page = make_dom_page()
+
+        snapshot = await capture_dom_snapshot(page, STYLES)
+
+        cdp_session = page.context.new_cdp_session.return_value
+        cdp_session.send.assert_called_once_with(
+            "DOMSnapshot.captureSnapshot", {"computedStyles": ["display", "color"]}
+        )
+        cdp_session.detach.assert_called_once()
+        assert snapshot.text == "Results for SMITH"
+        assert snapshot.url == "https://portal.example/results"
+
+    def test_encode_round_trip(self, tmp_path):
+        """Test that nodes are written with resolved names, styles and values."""
+        result = make_result()
+        snapshot = DomSnapshot(
+            "https://portal.example/results", "Results", STYLES, **result
+        )
+        path = tmp_path / "page.dom.jsonl.gz"
+        path.write_bytes(snapshot.encode())
+
+        header, nodes = read_dom_snapshot(path)
+
+        assert header["url"] == "https://portal.example/results"
+        assert header["styles"] == ["display", "color"]
+        assert nodes[3] == {
+            "d": 0,
+            "i": 3,
+            "p": 2,
+            "t": 1,
+            "n": "P",
+            "a": {"class": "hit"},
+            "s": {"display": "block"},
+            "b": [8, 8, 300.2, 18],
+        }
+        assert nodes[4]["v"] == "Results for SMITH"
+        assert nodes[5]["in"] == "SMITH"
+        assert "s" not in nodes[2]
+
+    def test_password_values_are_not_written(self, tmp_path):
+        """Test that a password field's typed value and attribute are dropped."""
+        result = make_result()
+        strings = result["strings"]
+        strings += ["type", "Password", "value", "hunter2", "secret"]
+        nodes = result["documents"][0]["nodes"]
+        nodes["parentIndex"].append(2)
+        nodes["nodeType"].append(1)
+        nodes["nodeName"].append(8)
+        nodes["nodeValue"].append(-1)
+        nodes["attributes"].append([12, 13, 14, 15])
+        nodes["inputValue"] = {"index": [5, 6], "value": [9, 16]}
+        snapshot = DomSnapshot("https://portal.example", "", STYLES, **result)
+        path = tmp_path / "page.dom.jsonl.gz"
+        path.write_bytes(snapshot.encode())
+
+        _, nodes = read_dom_snapshot(path)
+
+        assert nodes[6]["a"] == {"type": "Password"}
+        assert "in" not in nodes[6]
+        assert nodes[5]["in"] == "SMITH"
+        assert b"hunter2" not in gzip.decompress(path.read_bytes())
+        assert b"secret" not in gzip.decompress(path.read_bytes())
+
+    def test_rejects_other_files(self, tmp_path):
+        """Test that reading a file in another format fails clearly."""
+        path = tmp_path / "page.dom.jsonl.gz"
+        path.write_bytes(gzip.compress(json.dumps({"format": "other"}).encode()))
+
+        with pytest.raises(ValueError):
+            read_dom_snapshot(path)
+
+    def test_to_html(self):
+        """Test that the DOM is rebuilt as HTML without styles."""
+        snapshot = DomSnapshot("https://portal.example", "", STYLES, **make_result())
+
+        html = to_html(list(snapshot._nodes()))
+
+        assert html == (
+            '<html><body><p class="hit">Results for SMITH</p>'
+            '<input value="SMITH"></body></html>'
+        )
+
+    def test_cli(self, tmp_path, capsys):
+        """Test that the command line prints the text or writes the HTML."""
+        result = make_result()
+        snapshot = DomSnapshot("https://portal.example", "Results", STYLES, **result)
+        path = tmp_path / "page_1.dom.jsonl.gz"
+        path.write_bytes(snapshot.encode())
+
+        main([str(path)])
+        assert capsys.readouterr().out == "https://portal.example\nResults\n"
+
+        main([str(path), "--html"])
+        assert (tmp_path / "page_1.html").read_text().startswith("<html><body>")
+
+    @pytest.mark.asyncio
+    async def test_collector_dom_format(self, tmp_path):
+        """Test that the collector saves a DOM snapshot instead of MHTML."""
+        collector = PageDataCollector(tmp_path / "qxr", page_format="dom")
+
+        metadata = await collector.capture_page_data(make_dom_page(), task="search")
+        await collector.close()
+
+        assert "mhtml_path" not in metadata
+        assert metadata["dom_path"].endswith(".dom.jsonl.gz")
+        header, nodes = read_dom_snapshot(metadata["dom_path"])
+        assert header["text"] == "Results for SMITH"
+        assert len(nodes) == 6
+        assert not list(tmp_path.rglob("*.mhtml"))
+
+    @pytest.mark.asyncio
+    async def test_collector_dom_format_with_store(self, tmp_path):
+        """Test that stored captures keep the snapshot next to the metadata."""
+        collector = PageDataCollector(
+            tmp_path / "qxr", store=CaptureStore(tmp_path), page_format="dom"
+        )
+
+        metadata = await collector.capture_page_data(make_dom_page())
+        await collector.close()
+
+        assert metadata["dom_path"].startswith(str(tmp_path / "qxr"))
+        assert read_dom_snapshot(metadata["dom_path"])[0]["format"] == "domsnapshot/1"
+        assert not list(tmp_path.rglob("*.mhtml.json"))
+
+    def test_collector_rejects_unknown_format(self, tmp_path):
+        """Test that an unknown page format fails when the collector is made."""
+        with pytest.raises(ValueError):
+            PageDataCollector(tmp_path, page_format="html")
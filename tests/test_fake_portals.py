@@ -0,0 +1,132 @@
+import asyncio
+import re
+import urllib.error
+import urllib.request
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from benchmarks.fake_portals import (
+    PORTAL_HOSTS,
+    PORTALS_DIR,
+    FakePortalPool,
+    FakePortalServer,
+)
+from benchmarks.run import discover_sessions, run_benchmark
+from core.tracing import read_trace
+
+
+def chromium_installed() -> bool:
+    """Whether the Playwright browser needed for end-to-end runs is present."""
+    from playwright.sync_api import sync_playwright
+
+    try:
+        with sync_playwright() as p:
+            return Path(p.chromium.executable_path).exists()
+    except Exception:
+        return False
+
+
+@pytest.fixture
+def server():
+    """Run the fake portal server without added latency."""
+    with FakePortalServer(latency=0) as server:
+        yield server
+
+
+def fetch(url):
+    with urllib.request.urlopen(url, timeout=5) as response:
+        return response.headers["Content-Type"], response.read()
+
+
+class TestFakePortalServer:
+    """Test cases for the local stand-in portal server."""
+
+    def test_every_provider_has_a_portal(self):
+        """Test that each provider session has a stand-in for its start page."""
+        sessions = discover_sessions()
+        assert set(sessions) == set(PORTAL_HOSTS)
+
+        providers_dir = Path(__file__).parent.parent / "providers"
+        for name, session_class in sessions.items():
+            source = providers_dir / f"{session_class.__module__.split('.')[-1]}.py"
+            start_hosts = re.findall(r'goto\(\s*"https://([^/"]+)', source.read_text())
+            assert PORTAL_HOSTS[name] in start_hosts
+            assert (PORTALS_DIR / PORTAL_HOSTS[name] / "index.html").is_file()
+
+    def test_serves_portal_page_for_any_path(self, server):
+        """Test that the portal page is served for deep links."""
+        url = server.local_url("https://qxrpacs.com.au/Portal/app")
+        content_type, body = fetch(url)
+
+        assert content_type.startswith("text/html")
+        assert b'placeholder="Search patient name, id,' in body
+
+        _, deep_link = fetch(server.local_url("https://www.medway.com.au/login"))
+        assert b"Patient given name(s)" in deep_link
+
+    def test_shared_script_and_assets(self, server):
+        """Test that shared files, sized assets and API calls are served."""
+        content_type, script = fetch(
+            server.local_url("https://qxrpacs.com.au/portal.js")
+        )
+        assert content_type == "application/javascript"
+        assert b"function go(step)" in script
+
+        content_type, asset = fetch(
+            server.local_url("https://i-med.com.au/assets/hero-12k.jpg")
+        )
+        assert content_type == "image/jpeg"
+        assert len(asset) == 12 * 1024
+
+        _, api = fetch(server.local_url("https://hpp.health.qld.gov.au/api/code"))
+        assert api == b"{}"
+
+    def test_unknown_host_is_not_served(self, server):
+        """Test that only portal hosts are answered."""
+        assert server.serves("https://qxrpacs.com.au/Portal/app")
+        assert not server.serves("https://www.google-analytics.com/collect")
+
+        with pytest.raises(urllib.error.HTTPError):
+            fetch(f"http://127.0.0.1:{server.port}/example.com/")
+        with pytest.raises(urllib.error.HTTPError):
+            fetch(f"http://127.0.0.1:{server.port}/qxrpacs.com.au/../run.py")
+
+    @pytest.mark.asyncio
+    async def test_pool_forwards_portal_requests(self, server):
+        """Test that portal requests are fulfilled locally and others aborted."""
+        pool = FakePortalPool(server, playwright=MagicMock())
+
+        route = MagicMock(fetch=AsyncMock(), fulfill=AsyncMock(), abort=AsyncMock())
+        route.request.url = "https://www.sonicdx.com.au/?next=search"
+        await pool._forward(route)
+        route.fetch.assert_called_once_with(
+            url=f"http://127.0.0.1:{server.port}/www.sonicdx.com.au/?next=search"
+        )
+        route.fulfill.assert_called_once_with(response=route.fetch.return_value)
+
+        tracker = MagicMock(abort=AsyncMock())
+        tracker.request.url = "https://connect.facebook.net/en_US/fbevents.js"
+        await pool._forward(tracker)
+        tracker.abort.assert_called_once_with("blockedbyclient")
+
+
+@pytest.mark.playwright
+@pytest.mark.skipif(not chromium_installed(), reason="Chromium is not installed")
+class TestProviderBenchmark:
+    """End-to-end runs of the real sessions against the stand-in portals."""
+
+    def test_every_provider_completes_search(self, tmp_path, monkeypatch):
+        """Test that each provider logs in and searches on its stand-in."""
+        monkeypatch.chdir(tmp_path)
+        trace_file = asyncio.run(
+            run_benchmark(iterations=1, latency=0, trace_file=tmp_path / "t.jsonl")
+        )
+
+        searched = {
+            record["provider"]
+            for record in read_trace(trace_file)
+            if record["phase"] == "search" and record["outcome"] == "ok"
+        }
+        assert searched == set(PORTAL_HOSTS)
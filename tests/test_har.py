@@ -0,0 +1,273 @@
+import base64
+import json
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from core import HarArchive
+from core.har import (
+    scrub_content,
+    scrub_cookies,
+    scrub_har,
+    scrub_headers,
+    scrub_post_data,
+    scrub_query_string,
+)
+
+SECRETS = {"hunter2": "[user_password]", "SMITH": "[family_name]"}
+
+
+def scrub(text):
+    """Stand-in for the compiled replacements, for the per-part scrubbers."""
+    return text.replace("SMITH", "[family_name]").replace("hunter2", "[user_password]")
+
+
+def make_har(request=None, response=None):
+    """Create a one-entry HAR with the given request and response fields."""
+    entry = {
+        "request": {
+            "method": "GET",
+            "url": "https://portal.example/",
+            "headers": [],
+            "cookies": [],
+            **(request or {}),
+        },
+        "response": {
+            "status": 200,
+            "headers": [],
+            "cookies": [],
+            "content": {"mimeType": "text/html", "text": ""},
+            **(response or {}),
+        },
+    }
+    return {"log": {"version": "1.2", "entries": [entry]}}
+
+
+class TestScrubHar:
+    """Test cases for removing credentials and patient details from HARs."""
+
+    def test_replaces_values_everywhere(self):
+        """Test that URLs, headers and text bodies lose the sensitive values."""
+        har = make_har(
+            request={"url": "https://portal.example/search?name=SMITH"},
+            response={"content": {"mimeType": "text/html", "text": "<b>SMITH</b>"}},
+        )
+
+        entry = scrub_har(har, SECRETS)["log"]["entries"][0]
+
+        assert entry["request"]["url"].endswith("name=[family_name]")
+        assert entry["response"]["content"]["text"] == "<b>[family_name]</b>"
+
+    def test_only_whole_values_are_replaced(self):
+        """Test that a value inside a longer word is left alone."""
+        har = make_har(response={"content": {"text": "SMITHSON and SMITH"}})
+
+        content = scrub_har(har, SECRETS)["log"]["entries"][0]["response"]["content"]
+
+        assert content["text"] == "SMITHSON and [family_name]"
+
+    def test_blanks_session_tokens(self):
+        """Test that cookies and authorization headers are blanked."""
+        har = make_har(
+            request={
+                "headers": [
+                    {"name": "Authorization", "value": "Bearer abc"},
+                    {"name": "Accept", "value": "text/html"},
+                ],
+                "cookies": [{"name": "sid", "value": "abc"}],
+            }
+        )
+
+        request = scrub_har(har, SECRETS)["log"]["entries"][0]["request"]
+
+        assert request["headers"][0]["value"] == "[scrubbed]"
+        assert request["headers"][1]["value"] == "text/html"
+        assert request["cookies"][0]["value"] == "[scrubbed]"
+
+    def test_login_body_is_not_matched_on_replay(self):
+        """Test that a posted password moves the body out of replay matching."""
+        har = make_har(
+            request={
+                "method": "POST",
+                "postData": {
+                    "mimeType": "application/x-www-form-urlencoded",
+                    "text": "user=me&password=hunter2",
+                },
+            }
+        )
+
+        request = scrub_har(har, SECRETS)["log"]["entries"][0]["request"]
+
+        assert "postData" not in request
+        assert request["_postData"]["text"] == "user=me&password=[user_password]"
+
+    def test_plain_body_is_kept_for_matching(self):
+        """Test that request bodies without secrets still match on replay."""
+        post_data = {"mimeType": "application/json", "text": '{"page": 2}'}
+        har = make_har(request={"method": "POST", "postData": dict(post_data)})
+
+        request = scrub_har(har, SECRETS)["log"]["entries"][0]["request"]
+
+        assert request["postData"] == post_data
+
+    def test_base64_text_bodies(self):
+        """Test that encoded text bodies are scrubbed and images untouched."""
+        text = base64.b64encode(b'{"surname": "SMITH"}').decode()
+        image = base64.b64encode(b"\x89PNG SMITH").decode()
+        har = make_har(
+            response={
+                "content": {
+                    "mimeType": "application/json",
+                    "encoding": "base64",
+                    "text": text,
+                }
+            }
+        )
+        har["log"]["entries"].append(
+            make_har(
+                response={
+                    "content": {
+                        "mimeType": "image/png",
+                        "encoding": "base64",
+                        "text": image,
+                    }
+                }
+            )["log"]["entries"][0]
+        )
+
+        entries = scrub_har(har, SECRETS)["log"]["entries"]
+
+        body = base64.b64decode(entries[0]["response"]["content"]["text"])
+        assert json.loads(body) == {"surname": "[family_name]"}
+        assert entries[1]["response"]["content"]["text"] == image
+
+
+class TestScrubParts:
+    """Test cases for scrubbing each part of a HAR entry."""
+
+    def test_scrub_headers(self):
+        """Test that token headers are blanked and other headers scrubbed."""
+        message = {
+            "headers": [
+                {"name": "X-CSRF-Token", "value": "abc"},
+                {"name": "Referer", "value": "https://portal.example/?q=SMITH"},
+            ]
+        }
+
+        scrub_headers(message, scrub)
+
+        assert [h["value"] for h in message["headers"]] == [
+            "[scrubbed]",
+            "https://portal.example/?q=[family_name]",
+        ]
+
+    def test_scrub_cookies(self):
+        """Test that every cookie value is blanked, keeping its name."""
+        message = {"cookies": [{"name": "sid", "value": "abc"}, {"name": "x"}]}
+
+        scrub_cookies(message)
+
+        assert message["cookies"] == [
+            {"name": "sid", "value": "[scrubbed]"},
+            {"name": "x", "value": "[scrubbed]"},
+        ]
+
+    def test_scrub_query_string(self):
+        """Test that the URL and its parsed parameters are both scrubbed."""
+        request = {
+            "url": "https://portal.example/search?surname=SMITH",
+            "queryString": [{"name": "surname", "value": "SMITH"}],
+        }
+
+        scrub_query_string(request, scrub)
+
+        assert request["url"].endswith("surname=[family_name]")
+        assert request["queryString"] == [{"name": "surname", "value": "[family_name]"}]
+
+    def test_scrub_post_data(self):
+        """Test that only a body holding a secret is moved out of matching."""
+        login = {"postData": {"text": "password=hunter2", "params": []}}
+        paging = {"postData": {"text": "page=2"}}
+
+        scrub_post_data(login, scrub)
+        scrub_post_data(paging, scrub)
+
+        assert login == {
+            "_postData": {"text": "password=[user_password]", "params": []}
+        }
+        assert paging == {"postData": {"text": "page=2"}}
+
+    def test_scrub_content(self):
+        """Test that plain and base64 text bodies are scrubbed, images kept."""
+        plain = {"mimeType": "text/html", "text": "<b>SMITH</b>"}
+        encoded = {
+            "mimeType": "text/plain",
+            "encoding": "base64",
+            "text": base64.b64encode(b"SMITH").decode(),
+        }
+        image = {
+            "mimeType": "image/png",
+            "encoding": "base64",
+            "text": base64.b64encode(b"SMITH").decode(),
+        }
+
+        for content in (plain, encoded, image):
+            scrub_content(content, scrub)
+
+        assert plain["text"] == "<b>[family_name]</b>"
+        assert base64.b64decode(encoded["text"]) == b"[family_name]"
+        assert base64.b64decode(image["text"]) == b"SMITH"
+
+
+class TestHarArchive:
+    """Test cases for per-provider HAR recording and replay."""
+
+    def test_rejects_unknown_mode(self, tmp_path):
+        """Test that only record and replay modes are accepted."""
+        with pytest.raises(ValueError):
+            HarArchive(tmp_path, "capture")
+
+    def test_record_options(self, tmp_path):
+        """Test that recording writes an embedded HAR per provider."""
+        archive = HarArchive(tmp_path / "hars", "record")
+
+        options = archive.context_options("Mater Pathology")
+
+        assert options == {
+            "record_har_path": str(tmp_path / "hars" / "Mater_Pathology.har"),
+            "record_har_content": "embed",
+        }
+        assert (tmp_path / "hars").is_dir()
+        assert HarArchive(tmp_path, "replay").context_options("QXR") == {}
+
+    @pytest.mark.asyncio
+    async def test_replay_routes_from_har(self, tmp_path):
+        """Test that replay serves the recording and aborts anything else."""
+        archive = HarArchive(tmp_path, "replay")
+        archive.path("QXR").write_text(json.dumps(make_har()))
+        context = MagicMock(route_from_har=AsyncMock())
+
+        await archive.attach(context, "QXR")
+
+        context.route_from_har.assert_called_once_with(
+            archive.path("QXR"), not_found="abort"
+        )
+
+    @pytest.mark.asyncio
+    async def test_replay_without_recording(self, tmp_path):
+        """Test that a provider with no recording fails instead of going live."""
+        context = MagicMock(route_from_har=AsyncMock())
+
+        with pytest.raises(FileNotFoundError):
+            await HarArchive(tmp_path, "replay").attach(context, "QXR")
+
+    def test_scrub_rewrites_recording(self, tmp_path):
+        """Test that a finished recording is replaced by its scrubbed copy."""
+        archive = HarArchive(tmp_path, "record")
+        har = make_har(request={"url": "https://portal.example/?q=SMITH"})
+        archive.path("QXR").write_text(json.dumps(har))
+
+        archive.scrub("QXR", SECRETS)
+
+        assert "SMITH" not in archive.path("QXR").read_text()
+        assert list(tmp_path.iterdir()) == [archive.path("QXR")]
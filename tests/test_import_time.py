@@ -0,0 +1,35 @@
+from benchmarks.import_time import deferred_imports, measure_import, parse_importtime
+
+IMPORTTIME_OUTPUT = """\
+import time: self [us] | cumulative | imported package
+import time:       120 |        120 |   _json
+import time:       900 |       1020 | json
+import time:       300 |        300 |     core.tracing
+import time:      2000 |       2300 |   core
+import time:      5000 |      12000 | main
+"""
+
+
+class TestImportTime:
+    """Test cases for the startup import benchmark."""
+
+    def test_parse_importtime(self):
+        """Test that the top level cumulative time and module names are read."""
+        total_ms, loaded = parse_importtime(IMPORTTIME_OUTPUT, "main")
+
+        assert total_ms == 12.0
+        assert loaded == ["_json", "json", "core.tracing", "core", "main"]
+        assert parse_importtime(IMPORTTIME_OUTPUT, "core")[0] is None
+
+    def test_deferred_imports(self):
+        """Test that submodules count as their package."""
+        loaded = ["json", "playwright.async_api", "playwright", "sqlite3"]
+
+        assert deferred_imports(loaded) == ["playwright", "sqlite3"]
+
+    def test_entry_point_defers_heavy_imports(self):
+        """Test that starting the program imports no deferred dependency."""
+        _, loaded = measure_import("main")
+
+        assert "models" in loaded
+        assert deferred_imports(loaded) == []
@@ -0,0 +1,108 @@
+import os
+import sys
+
+import pytest
+
+from core import ProviderRegistry, provider_registry
+
+PROVIDER_SOURCE = """
+from models import Session
+
+
+class {cls}Session(Session):
+    name = "{name}"
+    required_fields = ["family_name", "dob"]
+    provider_group = "Radiology"
+    credentials_key = "{cls}"
+
+
+async def {cls}_process(patient, shared_state, pool):
+    return "{cls} ran"
+"""
+
+
+@pytest.fixture
+def package(tmp_path, monkeypatch):
+    """An importable package of fake provider modules."""
+    directory = tmp_path / "fake_providers"
+    directory.mkdir()
+    (directory / "__init__.py").write_text("")
+    (directory / "alpha.py").write_text(
+        PROVIDER_SOURCE.format(cls="Alpha", name="Alpha Radiology")
+    )
+    (directory / "helpers.py").write_text("def helper():\n    pass\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    yield directory
+    for module in [m for m in sys.modules if m.startswith("fake_providers")]:
+        del sys.modules[module]
+
+
+def make_registry(package):
+    return ProviderRegistry(
+        package, package.parent / "registry.json", package="fake_providers"
+    )
+
+
+class TestProviderRegistry:
+    """Test cases for listing providers from a cached manifest."""
+
+    def test_lists_providers_without_importing(self, package):
+        """Test that provider details come from the source alone."""
+        providers = make_registry(package).providers()
+
+        info = providers["Alpha Radiology"]
+        assert info.group == "Radiology"
+        assert info.required_fields == ["family_name", "dob"]
+        assert info.credentials_key == "Alpha"
+        assert info.module == "fake_providers.alpha"
+        assert list(providers) == ["Alpha Radiology"]  # helpers.py is skipped
+        assert "fake_providers.alpha" not in sys.modules
+
+    def test_load_imports_selected_provider(self, package):
+        """Test that loading a provider gives its process function and class."""
+        info = make_registry(package).providers()["Alpha Radiology"]
+
+        process, session_class = info.load()
+
+        assert process.__name__ == "Alpha_process"
+        assert session_class.__name__ == "AlphaSession"
+        assert info.session is session_class
+
+    def test_manifest_is_reused(self, package, monkeypatch):
+        """Test that unchanged files are not read again by a new registry."""
+        make_registry(package).providers()
+
+        def fail(*args):
+            raise AssertionError("provider source was scanned again")
+
+        monkeypatch.setattr(provider_registry, "_scan_source", fail)
+        assert list(make_registry(package).providers()) == ["Alpha Radiology"]
+
+    def test_changed_and_new_files_are_rescanned(self, package):
+        """Test that edits and new providers show up on the next call."""
+        registry = make_registry(package)
+        registry.providers()
+
+        alpha = package / "alpha.py"
+        alpha.write_text(PROVIDER_SOURCE.format(cls="Alpha", name="Alpha Imaging"))
+        stat = alpha.stat()
+        os.utime(alpha, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+        (package / "beta.py").write_text(
+            PROVIDER_SOURCE.format(cls="Beta", name="Beta")
+        )
+
+        assert sorted(registry.providers()) == ["Alpha Imaging", "Beta"]
+        assert sorted(make_registry(package).providers()) == ["Alpha Imaging", "Beta"]
+
+    def test_computed_details_fall_back_to_import(self, package):
+        """Test that a provider with non-literal details is imported to read them."""
+        (package / "gamma.py").write_text(
+            PROVIDER_SOURCE.format(cls="Gamma", name="Gamma").replace(
+                'name = "Gamma"', 'name = "Gam" + "ma"'
+            )
+        )
+
+        info = make_registry(package).providers()["Gamma"]
+
+        assert info.session_class == "GammaSession"
+        assert "fake_providers.gamma" in sys.modules
@@ -0,0 +1,216 @@
+import json
+import time
+from pathlib import Path
+
+import pytest
+
+from core import (
+    CaptureIndex,
+    CaptureStore,
+    PageDataCollector,
+    RetentionManager,
+    ScreenshotDeduper,
+)
+from tests.test_capture_store import make_mhtml
+from tests.test_data_collector import make_page
+
+
+def write_capture(root, provider, name, size=100):
+    """Write a metadata file and a screenshot of the given size."""
+    directory = root / provider
+    directory.mkdir(parents=True, exist_ok=True)
+    metadata = directory / f"metadata_{name}.json"
+    screenshot = directory / f"screenshot_{name}.png"
+    metadata.write_text("{}")
+    screenshot.write_bytes(b"x" * size)
+    return metadata, screenshot
+
+
+class TestRetentionManager:
+    """Test cases for the capture disk budget."""
+
+    def test_total_budget_evicts_oldest(self, tmp_path):
+        """Test that the oldest capture goes when the budget is exceeded."""
+        retention = RetentionManager(tmp_path, max_total_bytes=250)
+        first = write_capture(tmp_path, "qxr", "1")
+        second = write_capture(tmp_path, "qxr", "2")
+        third = write_capture(tmp_path, "qxr", "3")
+
+        retention.add(first[0], "qxr", first)
+        retention.add(second[0], "qxr", second)
+        evicted = retention.add(third[0], "qxr", third)
+
+        assert evicted == [first[0]]
+        assert not first[1].exists()
+        assert second[1].exists() and third[1].exists()
+        assert retention.total_bytes == 2 * (100 + 2)
+
+    def test_touch_keeps_capture(self, tmp_path):
+        """Test that a recently used capture outlives newer unused ones."""
+        retention = RetentionManager(tmp_path, max_total_bytes=250)
+        first = write_capture(tmp_path, "qxr", "1")
+        second = write_capture(tmp_path, "qxr", "2")
+        retention.add(first[0], "qxr", first)
+        retention.add(second[0], "qxr", second)
+
+        retention.touch(first[0])
+        third = write_capture(tmp_path, "qxr", "3")
+        retention.add(third[0], "qxr", third)
+
+        assert first[1].exists()
+        assert not second[1].exists()
+
+    def test_provider_quota(self, tmp_path):
+        """Test that one provider's quota does not evict other providers."""
+        retention = RetentionManager(tmp_path, provider_quotas={"qxr": 150})
+        medway = write_capture(tmp_path, "medway", "1")
+        first = write_capture(tmp_path, "qxr", "1")
+        second = write_capture(tmp_path, "qxr", "2")
+
+        retention.add(medway[0], "medway", medway)
+        retention.add(first[0], "qxr", first)
+        retention.add(second[0], "qxr", second)
+
+        assert medway[1].exists()
+        assert not first[1].exists()
+        assert second[1].exists()
+
+    def test_age_limit(self, tmp_path, monkeypatch):
+        """Test that captures unused for too long are removed."""
+        retention = RetentionManager(tmp_path, max_age_days=1)
+        old = write_capture(tmp_path, "qxr", "old")
+        retention.add(old[0], "qxr", old)
+
+        later = time.time() + 2 * 86400
+        monkeypatch.setattr(time, "time", lambda: later)
+        new = write_capture(tmp_path, "qxr", "new")
+        retention.add(new[0], "qxr", new)
+
+        assert not old[0].exists()
+        assert new[0].exists()
+
+    def test_shared_objects_are_reference_counted(self, tmp_path):
+        """Test that a store object is deleted with the last capture using it."""
+        retention = RetentionManager(tmp_path, max_total_bytes=10_000)
+        shared = tmp_path / "objects" / "ab" / "cdef.gz"
+        shared.parent.mkdir(parents=True)
+        shared.write_bytes(b"y" * 1000)
+        first = write_capture(tmp_path, "qxr", "1", size=10)
+        second = write_capture(tmp_path, "medway", "1", size=10)
+
+        retention.add(first[0], "qxr", first, [shared])
+        retention.add(second[0], "medway", second, [shared])
+        assert retention.total_bytes == 1000 + 2 * (10 + 2)
+
+        retention.max_total_bytes = 1020
+        third = write_capture(tmp_path, "qxr", "2", size=5)
+        retention.add(third[0], "qxr", third)
+        assert not first[1].exists()
+        assert shared.exists()
+
+        retention.max_total_bytes = 10
+        fourth = write_capture(tmp_path, "qxr", "3", size=5)
+        retention.add(fourth[0], "qxr", fourth)
+        assert not shared.exists()
+
+    def test_duplicates_are_evicted_with_original(self, tmp_path):
+        """Test that captures linking to an evicted capture's files go too."""
+        retention = RetentionManager(tmp_path, max_total_bytes=10_000)
+        original = write_capture(tmp_path, "qxr", "1")
+        duplicate = tmp_path / "qxr" / "metadata_2.json"
+        duplicate.write_text("{}")
+        retention.add(original[0], "qxr", original)
+        retention.add(duplicate, "qxr", [duplicate], duplicate_of=original[0])
+        retention.touch(duplicate)  # Now used more recently than the original
+
+        retention.max_total_bytes = 150
+        newer = write_capture(tmp_path, "qxr", "3")
+        evicted = retention.add(newer[0], "qxr", newer)
+
+        assert evicted == [original[0], duplicate]
+        assert not duplicate.exists() and not original[1].exists()
+        assert retention.total_bytes == 100 + 2
+
+    def test_duplicate_of_evicted_capture_is_dropped(self, tmp_path):
+        """Test that a link to a capture that is already gone is not kept."""
+        retention = RetentionManager(tmp_path)
+        duplicate = tmp_path / "qxr" / "metadata_2.json"
+        duplicate.parent.mkdir()
+        duplicate.write_text("{}")
+
+        evicted = retention.add(
+            duplicate, "qxr", [duplicate], duplicate_of=tmp_path / "qxr" / "gone.json"
+        )
+
+        assert evicted == [duplicate]
+        assert not duplicate.exists()
+
+    def test_ledger_survives_restart(self, tmp_path):
+        """Test that a new manager enforces limits on earlier captures."""
+        first = write_capture(tmp_path, "qxr", "1")
+        RetentionManager(tmp_path).add(first[0], "qxr", first)
+        assert (
+            "qxr/metadata_1.json"
+            in json.loads((tmp_path / "retention.json").read_text())["captures"]
+        )
+
+        retention = RetentionManager(tmp_path, max_total_bytes=150)
+        second = write_capture(tmp_path, "qxr", "2")
+        retention.add(second[0], "qxr", second)
+
+        assert not first[0].exists()
+        assert second[0].exists()
+
+    @pytest.mark.asyncio
+    async def test_collector_records_captures(self, tmp_path):
+        """Test that stored captures are recorded with their shared objects."""
+        retention = RetentionManager(tmp_path)
+        collector = PageDataCollector(
+            tmp_path / "qxr", store=CaptureStore(tmp_path), retention=retention
+        )
+        page = make_page()
+        page.context.new_cdp_session.return_value.send.return_value = {
+            "data": make_mhtml("<p>Results</p>")
+        }
+
+        metadata = await collector.capture_page_data(page)
+        await collector.close()
+
+        ledger = json.loads((tmp_path / "retention.json").read_text())
+        entry = ledger["captures"][f"qxr/metadata_{metadata['timestamp']}.json"]
+        assert entry["provider"] == "qxr"
+        assert len(entry["files"]) == 2
+        assert len(entry["objects"]) == 3  # Screenshot and two MHTML parts
+        assert (
+            retention.total_bytes
+            == sum(p.stat().st_size for p in tmp_path.rglob("*") if p.is_file())
+            - (tmp_path / "retention.json").stat().st_size
+        )
+
+    @pytest.mark.asyncio
+    async def test_evicted_duplicates_leave_the_index(self, tmp_path):
+        """Test that index rows of linked duplicates go with the original."""
+        retention = RetentionManager(tmp_path)
+        index = CaptureIndex(tmp_path / "captures.db")
+        collector = PageDataCollector(
+            tmp_path / "qxr",
+            dedupe=ScreenshotDeduper(),
+            retention=retention,
+            index=index,
+        )
+        page = make_page()
+
+        first = await collector.capture_page_data(page, task="search")
+        second = await collector.capture_page_data(page, task="search")
+        await collector.close()
+        assert second["duplicate_of"] == first["timestamp"]
+        assert len(index.query(provider="qxr")) == 2
+
+        # Evicting the original for the budget takes the duplicate with it
+        retention.touch(tmp_path / "qxr" / f"metadata_{second['timestamp']}.json")
+        retention.max_total_bytes = retention.total_bytes + 100
+        newer = write_capture(tmp_path, "qxr", "newer")
+        index.remove(retention.add(newer[0], "qxr", newer))
+
+        assert index.query(provider="qxr") == []
+        assert not Path(first["screenshot_path"]).exists()
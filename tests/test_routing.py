@@ -0,0 +1,150 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from core import DEFAULT_ROUTING_PROFILE, RoutingProfile
+from models import Session
+from providers.i_med import IMedSession
+from providers.meditrust import MediTrustSession
+
+
+def make_route(url, resource_type, frame_url=""):
+    """Create a mock route for a request of the given type."""
+    route = MagicMock()
+    route.request.url = url
+    route.request.resource_type = resource_type
+    route.request.frame.url = frame_url
+    route.fulfill = AsyncMock()
+    route.abort = AsyncMock()
+    route.fallback = AsyncMock()
+    return route
+
+
+class TestRoutingProfile:
+    """Test cases for per-provider request blocking."""
+
+    def test_default_profile_is_safe(self):
+        """Test that the default only drops media and trackers."""
+        profile = DEFAULT_ROUTING_PROFILE
+        page = "https://portal.example/app"
+
+        assert profile.decide(f"{page}/logo.png", "image") == "allow"
+        assert profile.decide(f"{page}/icons.woff2", "font") == "allow"
+        assert profile.decide(f"{page}/intro.mp4", "media") == "block"
+        assert (
+            profile.decide("https://www.google-analytics.com/g/collect", "xhr")
+            == "stub"
+        )
+
+    def test_allowlist_keeps_result_pages_intact(self):
+        """Test that allowlisted requests and frames are never blocked."""
+        profile = RoutingProfile(
+            block_resource_types={"image"},
+            stub_url_patterns=[r"tracker\.example"],
+            allow_url_patterns=[r"^https://portal\.example/results"],
+        )
+
+        assert profile.decide("https://cdn.example/a.png", "image") == "block"
+        assert (
+            profile.decide(
+                "https://cdn.example/a.png",
+                "image",
+                "https://portal.example/results/1",
+            )
+            == "allow"
+        )
+        assert (
+            profile.decide(
+                "https://tracker.example/px",
+                "image",
+                "https://portal.example/results/1",
+            )
+            == "stub"
+        )
+
+    def test_extend_adds_to_defaults(self):
+        """Test that provider profiles keep the default rules."""
+        profile = DEFAULT_ROUTING_PROFILE.extend(block_resource_types={"font"})
+
+        assert profile.block_resource_types == {"media", "font"}
+        assert profile.stub_url_patterns == DEFAULT_ROUTING_PROFILE.stub_url_patterns
+
+    def test_provider_profiles(self):
+        """Test that IMed and MediTrust only strip their public landing pages."""
+        imed = IMedSession.routing_profile
+        public = "https://i-med.com.au/resources/access-patient-images"
+        assert imed.decide("https://i-med.com.au/hero.jpg", "image", public) == "block"
+        assert imed.decide("https://cdn.example/hero.jpg", "image", public) == "block"
+        assert (
+            imed.decide(
+                "https://online.example/scan.jpg", "image", "https://online.example/"
+            )
+            == "allow"
+        )
+
+        meditrust = MediTrustSession.routing_profile
+        home = "https://www.meditrust.com.au/mtv4/home"
+        account = "https://www.meditrust.com.au/mtv4/patients"
+        assert meditrust.decide(f"{home}/banner.png", "image", home) == "block"
+        logo = "https://www.meditrust.com.au/mtv4/images/logo.png"
+        assert meditrust.decide(logo, "image", home) == "block"
+        assert meditrust.decide(logo, "image", account) == "allow"
+        assert meditrust.decide(f"{home}/banner.png", "image", account) == "allow"
+
+    @pytest.mark.asyncio
+    async def test_handle_dispatches_actions(self):
+        """Test that the route handler stubs, aborts or passes on requests."""
+        profile = DEFAULT_ROUTING_PROFILE
+
+        tracker = make_route("https://www.googletagmanager.com/gtm.js", "script")
+        await profile.handle(tracker)
+        tracker.fulfill.assert_called_once()
+        assert tracker.fulfill.call_args.kwargs["content_type"] == (
+            "application/javascript"
+        )
+
+        video = make_route("https://portal.example/intro.mp4", "media")
+        await profile.handle(video)
+        video.abort.assert_called_once_with("blockedbyclient")
+
+        form = make_route("https://portal.example/login", "document")
+        await profile.handle(form)
+        form.fallback.assert_called_once()
+
+    def test_routing_is_opt_in(self):
+        """Test that sessions keep the HTTP cache unless the provider blocks."""
+        assert Session.routing_profile is None
+
+    @pytest.mark.asyncio
+    async def test_apply_skips_empty_profile(self):
+        """Test that a profile with nothing to block adds no routing overhead."""
+        context = MagicMock(route=AsyncMock())
+
+        await RoutingProfile(allow_url_patterns=[".*"]).apply(context)
+        context.route.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_apply_routes_only_blockable_urls(self):
+        """Test that routes cover trackers and blocked file types, not everything."""
+        context = MagicMock(route=AsyncMock())
+
+        await IMedSession.routing_profile.apply(context)
+
+        patterns = [c.args[0] for c in context.route.call_args_list]
+        assert "**/*" not in patterns
+
+        def routed(url):
+            return any(p.search(url) for p in patterns)
+
+        assert routed("https://www.google-analytics.com/g/collect?v=2")
+        assert routed("https://i-med.com.au/hero.JPG?w=800")
+        assert routed("https://i-med.com.au/fonts/brand.woff2")
+        assert routed("https://i-med.com.au/intro.mp4")
+        assert not routed("https://i-med.com.au/resources/access-patient-images")
+        assert not routed("https://i-med.com.au/app.js")
+
+    def test_unknown_resource_type_routes_everything(self):
+        """Test that types with no file extension still get blocked."""
+        profile = RoutingProfile(block_resource_types={"xhr"})
+
+        assert profile.route_patterns() == ["**/*"]
@@ -0,0 +1,396 @@
+import asyncio
+import json
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from core import (
+    VIEWPORT_CAPTURE_PROFILE,
+    HarArchive,
+    ScreenshotDeduper,
+    StorageStateCache,
+    Tracer,
+)
+from models import Credentials, PatientDetails, Session, SessionStage, SharedState
+from tests.test_data_collector import make_page
+
+
+class DummySession(Session):
+    """Minimal provider used to exercise the base session lifecycle."""
+
+    name = "Dummy"
+    required_fields = ["family_name"]
+    provider_group = "Other"
+    credentials_key = "Dummy"
+
+    def __init__(self, credentials, patient, shared_state, page):
+        super().__init__(credentials, patient, shared_state)
+        self.mock_page = page
+        self.initialize_calls = 0
+        self.login_calls = 0
+        self.searched = []
+
+    async def initialize(self, pool):
+        self.initialize_calls += 1
+        self.context = MagicMock(close=AsyncMock())
+        self.page = self.mock_page
+
+    async def login(self):
+        self.login_calls += 1
+
+    async def search_patient(self):
+        self.searched.append(self.patient.family_name)
+
+
+def exited_state(**kwargs) -> SharedState:
+    """Shared state where the user has already quit, so runs finish at once."""
+    shared_state = SharedState(**kwargs)
+    shared_state.request_exit()
+    return shared_state
+
+
+@pytest.fixture(autouse=True)
+def run_in_tmp(tmp_path, monkeypatch):
+    """Keep capture directories created by Session.run out of the repo."""
+    monkeypatch.chdir(tmp_path)
+
+
+@pytest.fixture
+def dummy_page():
+    """Create a mock page that reports a post-login URL."""
+    page = MagicMock()
+    page.url = "https://portal.example/search"
+    page.goto = AsyncMock()
+    page.wait_for_load_state = AsyncMock()
+    return page
+
+
+class TestSessionLifecycle:
+    """Test cases for the shared Session run/park behaviour."""
+
+    def make_session(self, page, shared_state):
+        credentials = Credentials(user_name="test_user", user_password="test_pass")
+        patient = PatientDetails(family_name="SMITH")
+        return DummySession(credentials, patient, shared_state, page)
+
+    @pytest.mark.asyncio
+    async def test_cold_run_cleans_up(self, dummy_page):
+        """Test that without warm mode the context is closed after exit."""
+        shared_state = exited_state()
+        session = self.make_session(dummy_page, shared_state)
+        context = None
+
+        async def initialize(pool):
+            nonlocal context
+            await DummySession.initialize(session, pool)
+            context = session.context
+
+        session.initialize = initialize
+        await session.run(MagicMock())
+
+        context.close.assert_called_once()
+        assert not session.logged_in
+        assert shared_state.parked_sessions == {}
+
+    @pytest.mark.asyncio
+    async def test_publishes_lifecycle_events(self, dummy_page):
+        """Test that subscribers see each stage of a cold run in order."""
+        shared_state = exited_state()
+        events = shared_state.session_events.subscribe()
+        session = self.make_session(dummy_page, shared_state)
+
+        await session.run(MagicMock())
+
+        stages = []
+        while not events.empty():
+            event = events.get_nowait()
+            assert event.provider == "Dummy"
+            stages.append(event.stage)
+        assert stages == [
+            SessionStage.STARTING,
+            SessionStage.LOGGED_IN,
+            SessionStage.SEARCHED,
+            SessionStage.CLOSED,
+        ]
+
+    @pytest.mark.asyncio
+    async def test_warm_session_skips_login(self, dummy_page):
+        """Test that a parked session only searches for the next patient."""
+        shared_state = exited_state(keep_warm=True)
+        session = self.make_session(dummy_page, shared_state)
+
+        await session.run(MagicMock())
+        assert shared_state.parked_sessions["Dummy"] is session
+        assert session.search_url == "https://portal.example/search"
+
+        shared_state.reset()
+        shared_state.request_exit()
+        session.patient = PatientDetails(family_name="JONES")
+        await shared_state.parked_sessions.pop("Dummy").run(MagicMock())
+
+        assert session.initialize_calls == 1
+        assert session.login_calls == 1
+        assert session.searched == ["SMITH", "JONES"]
+        dummy_page.goto.assert_called_once_with("https://portal.example/search")
+
+    @pytest.mark.asyncio
+    async def test_warm_session_relogs_when_stale(self, dummy_page):
+        """Test that a failed return to the search form triggers a new login."""
+        shared_state = exited_state(keep_warm=True)
+        session = self.make_session(dummy_page, shared_state)
+        await session.run(MagicMock())
+
+        dummy_page.goto.side_effect = Exception("Session expired")
+        await session.run(MagicMock())
+
+        assert session.login_calls == 2
+        assert session.searched == ["SMITH", "SMITH"]
+
+    def make_pool(self, page):
+        """Create a mock pool whose contexts open the given page."""
+        context = MagicMock(
+            close=AsyncMock(),
+            new_page=AsyncMock(return_value=page),
+            route=AsyncMock(),
+            storage_state=AsyncMock(return_value={"cookies": [], "origins": []}),
+        )
+        pool = MagicMock()
+        pool.get_browser = AsyncMock()
+        pool.new_context = AsyncMock(return_value=context)
+        return pool
+
+    @pytest.mark.asyncio
+    async def test_cached_login_skips_login(self, dummy_page, tmp_path):
+        """Test that a valid cached storage state avoids logging in."""
+        cache = StorageStateCache(tmp_path / "cache")
+        state = {"cookies": [{"name": "sid", "value": "1"}], "origins": []}
+        cache.save("Dummy", state, "https://portal.example/search")
+        dummy_page.locator = MagicMock(
+            return_value=MagicMock(count=AsyncMock(return_value=0))
+        )
+        session = self.make_session(dummy_page, exited_state(storage_cache=cache))
+        pool = self.make_pool(dummy_page)
+
+        await session.run(pool)
+
+        assert session.login_calls == 0
+        assert session.searched == ["SMITH"]
+        assert pool.new_context.call_args.kwargs["storage_state"] == state
+        dummy_page.locator.assert_called_with('input[type="password"]')
+
+    @pytest.mark.asyncio
+    async def test_expired_cache_logs_in(self, dummy_page, tmp_path):
+        """Test that a cached state landing on a login form is replaced."""
+        cache = StorageStateCache(tmp_path / "cache")
+        cache.save(
+            "Dummy", {"cookies": [], "origins": []}, "https://portal.example/search"
+        )
+        dummy_page.locator = MagicMock(
+            return_value=MagicMock(count=AsyncMock(return_value=1))
+        )
+        session = self.make_session(dummy_page, exited_state(storage_cache=cache))
+
+        await session.run(self.make_pool(dummy_page))
+
+        assert session.login_calls == 1
+        assert cache.load("Dummy") is None
+
+    @pytest.mark.asyncio
+    async def test_login_overlaps_patient_entry(self, dummy_page):
+        """Test that login runs before the patient is known and search waits."""
+        shared_state = exited_state()
+        shared_state.patient_ready = asyncio.get_running_loop().create_future()
+        session = self.make_session(dummy_page, shared_state)
+        session.patient = None
+
+        task = asyncio.create_task(session.run(MagicMock()))
+        await asyncio.sleep(0)
+        assert session.login_calls == 1
+        assert session.searched == []
+
+        shared_state.patient_ready.set_result(PatientDetails(family_name="JONES"))
+        await task
+
+        assert session.searched == ["JONES"]
+
+    @pytest.mark.asyncio
+    async def test_run_records_phase_spans(self, dummy_page, tmp_path):
+        """Test that each phase of a run is written to the trace."""
+        tracer = Tracer(tmp_path / "trace.jsonl")
+        session = self.make_session(dummy_page, exited_state(tracer=tracer))
+
+        await session.run(MagicMock())
+        tracer.close()
+
+        phases = [
+            json.loads(line)
+            for line in (tmp_path / "trace.jsonl").read_text().splitlines()
+        ]
+        assert [(p["provider"], p["phase"]) for p in phases] == [
+            ("Dummy", "initialize"),
+            ("Dummy", "login"),
+            ("Dummy", "patient_wait"),
+            ("Dummy", "search"),
+        ]
+        assert all(p["outcome"] == "ok" for p in phases)
+
+    @pytest.mark.asyncio
+    async def test_recorded_har_is_scrubbed(self, dummy_page, tmp_path):
+        """Test that record mode saves a HAR without credentials or patient."""
+        archive = HarArchive(tmp_path / "hars", "record")
+        session = self.make_session(dummy_page, exited_state(har=archive))
+        pool = self.make_pool(dummy_page)
+        context = pool.new_context.return_value
+
+        async def initialize(pool):
+            await session.new_page(pool)
+
+        async def close():  # Playwright writes the HAR when the context closes
+            entry = {
+                "request": {
+                    "method": "GET",
+                    "url": "https://portal.example/search?name=SMITH",
+                    "headers": [],
+                },
+                "response": {"headers": [], "content": {"text": "test_pass"}},
+            }
+            archive.path("Dummy").write_text(json.dumps({"log": {"entries": [entry]}}))
+
+        session.initialize = initialize
+        context.close.side_effect = close
+        await session.run(pool)
+
+        options = pool.new_context.call_args.kwargs
+        assert options["record_har_path"] == str(archive.path("Dummy"))
+        context.route_from_har.assert_not_called()
+        har = archive.path("Dummy").read_text()
+        assert "SMITH" not in har and "test_pass" not in har
+        assert "name=[family_name]" in har
+
+    @pytest.mark.asyncio
+    async def test_only_submitted_totp_codes_are_scrubbed(self, dummy_page):
+        """Test that the TOTP codes entered, and no others, are scrubbed."""
+        pytest.importorskip("pyotp")
+        session = self.make_session(dummy_page, SharedState())
+        session.credentials.totp_secret = "JBSWY3DPEHPK3PXP"
+        field = MagicMock(fill=AsyncMock(), wait_for=AsyncMock())
+
+        code = await session.submit_totp(field, MagicMock(click=AsyncMock()))
+
+        values = session.scrub_values()
+        assert session.totp_codes == [code]
+        assert [v for v, name in values.items() if name == "[2fa_code]"] == [code]
+
+    @pytest.mark.asyncio
+    async def test_sampled_run_captures_phases(self, dummy_page, monkeypatch):
+        """Test that a sampled run captures the page after each phase."""
+        collector = MagicMock(capture_page_data=AsyncMock(), close=AsyncMock())
+        monkeypatch.setattr("models.PageDataCollector", lambda **kwargs: collector)
+        dummy_page.is_closed.return_value = False
+        session = self.make_session(dummy_page, exited_state(capture_rate=1.0))
+
+        await session.run(MagicMock())
+
+        tasks = [c.kwargs["task"] for c in collector.capture_page_data.call_args_list]
+        assert tasks == ["initialization", "login", "search"]
+        collector.close.assert_called_once()
+        assert session.auto_capture is None
+
+    @pytest.mark.asyncio
+    async def test_dedupe_is_opt_in(self, dummy_page, monkeypatch):
+        """Test that captures are only deduplicated when asked for."""
+        collector_class = MagicMock(return_value=MagicMock(close=AsyncMock()))
+        monkeypatch.setattr("models.PageDataCollector", collector_class)
+
+        for capture_dedupe in (False, True):
+            state = exited_state(capture_rate=1.0, capture_dedupe=capture_dedupe)
+            await self.make_session(dummy_page, state).run(MagicMock())
+
+        off, on = [c.kwargs["dedupe"] for c in collector_class.call_args_list]
+        assert off is None
+        assert isinstance(on, ScreenshotDeduper)
+
+    @pytest.mark.asyncio
+    async def test_run_uses_shared_capture_profile(self):
+        """Test that --capture-profile viewport takes JPEGs of the visible page."""
+        page = make_page()
+        page.is_closed.return_value = False
+        state = exited_state(capture_rate=1.0, capture_profile=VIEWPORT_CAPTURE_PROFILE)
+
+        await self.make_session(page, state).run(MagicMock())
+
+        assert page.screenshot.await_count == 3  # After each phase
+        page.screenshot.assert_awaited_with(full_page=False, type="jpeg", quality=70)
+        assert len(list(Path("screen_shots_data").rglob("*.jpg"))) == 1
+
+    @pytest.mark.asyncio
+    async def test_unsampled_run_captures_nothing(self, dummy_page, monkeypatch):
+        """Test that automatic capture is off unless a rate is set."""
+        collector_class = MagicMock()
+        monkeypatch.setattr("models.PageDataCollector", collector_class)
+        session = self.make_session(dummy_page, exited_state())
+
+        await session.run(MagicMock())
+
+        collector_class.assert_not_called()
+
+
+class TestSharedStateSignals:
+    """Test cases for the exit event and 2FA request queue."""
+
+    @pytest.mark.asyncio
+    async def test_exit_wakes_waiting_session(self, dummy_page):
+        """Test that a paused session returns as soon as exit is requested."""
+        shared_state = SharedState()
+        credentials = Credentials(user_name="test_user", user_password="test_pass")
+        session = DummySession(credentials, None, shared_state, dummy_page)
+
+        task = asyncio.create_task(session.wait_for_exit())
+        await asyncio.sleep(0)
+        assert not task.done()
+
+        shared_state.request_exit()
+        await asyncio.wait_for(task, 1)
+        assert shared_state.exit is True
+
+    @pytest.mark.asyncio
+    async def test_concurrent_2fa_requests_are_queued(self):
+        """Test that two providers asking at once are both delivered."""
+        shared_state = SharedState()
+        proda = asyncio.create_task(shared_state.wait_for_2fa("PRODA"))
+        qscript = asyncio.create_task(shared_state.wait_for_2fa("QScript"))
+        await asyncio.sleep(0)
+
+        requests = {
+            shared_state.two_fa_requests.get_nowait(),
+            shared_state.two_fa_requests.get_nowait(),
+        }
+        assert requests == {"PRODA", "QScript"}
+
+        shared_state.set_2fa_code("QScript", "222222")
+        shared_state.set_2fa_code("PRODA", "111111")
+        assert await asyncio.wait_for(proda, 1) == "111111"
+        assert await asyncio.wait_for(qscript, 1) == "222222"
+
+    @pytest.mark.asyncio
+    async def test_exit_cancels_2fa_wait(self):
+        """Test that quitting interrupts a provider waiting for a code."""
+        shared_state = SharedState()
+        task = asyncio.create_task(shared_state.wait_for_2fa("QGov"))
+        await asyncio.sleep(0)
+
+        shared_state.request_exit()
+        with pytest.raises(asyncio.CancelledError):
+            await asyncio.wait_for(task, 1)
+
+    def test_reset_clears_signals(self):
+        """Test that a reused state starts without exit or stale requests."""
+        shared_state = SharedState()
+        shared_state.request_exit()
+        shared_state.two_fa_requests.put_nowait("PRODA")
+
+        shared_state.reset()
+
+        assert shared_state.exit is False
+        assert shared_state.two_fa_requests.empty()
@@ -0,0 +1,48 @@
+import os
+import time
+
+import pytest
+
+from core import StorageStateCache
+
+STATE = {"cookies": [{"name": "sid", "value": "abc"}], "origins": []}
+
+
+class TestStorageStateCache:
+    """Test cases for the encrypted login cache."""
+
+    def test_round_trip(self, tmp_path):
+        """Test that a saved state loads back unchanged."""
+        cache = StorageStateCache(tmp_path)
+        cache.save("QXR", STATE, "https://qxrpacs.com.au/Portal/app#/")
+
+        entry = cache.load("QXR")
+
+        assert entry["storage_state"] == STATE
+        assert entry["search_url"] == "https://qxrpacs.com.au/Portal/app#/"
+
+    def test_encrypted_at_rest(self, tmp_path):
+        """Test that cookie values are not stored in plain text."""
+        cache = StorageStateCache(tmp_path)
+        cache.save("QXR", STATE, None)
+
+        raw = (tmp_path / "QXR.bin").read_bytes()
+        assert b"sid" not in raw
+        assert oct((tmp_path / "QXR.bin").stat().st_mode & 0o777) == "0o600"
+
+    def test_wrong_key_discards_entry(self, tmp_path):
+        """Test that an entry written with another key is ignored and removed."""
+        StorageStateCache(tmp_path).save("QXR", STATE, None)
+        os.remove(tmp_path / ".key")
+
+        assert StorageStateCache(tmp_path).load("QXR") is None
+        assert not (tmp_path / "QXR.bin").exists()
+
+    def test_expired_entry(self, tmp_path, monkeypatch):
+        """Test that entries older than max_age_hours are not reused."""
+        cache = StorageStateCache(tmp_path, max_age_hours=1)
+        cache.save("QXR", STATE, None)
+        saved_at = time.time()
+
+        monkeypatch.setattr(time, "time", lambda: saved_at + 7200)
+        assert cache.load("QXR") is None
@@ -0,0 +1,109 @@
+import time
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from core import TotpCode
+
+pyotp = pytest.importorskip("pyotp")
+
+SECRET = "JBSWY3DPEHPK3PXP"
+
+
+def make_clock(seconds_into_window):
+    """A clock that runs in real time from a point in a 30 second window."""
+    start = time.monotonic()
+    base = 1_700_000_010 - 1_700_000_010 % 30 + seconds_into_window
+    return lambda: base + time.monotonic() - start
+
+
+def make_field(accepted):
+    """A code field that is hidden after each submission in ``accepted``."""
+    from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+    field = MagicMock(fill=AsyncMock())
+    field.wait_for = AsyncMock(
+        side_effect=[None if ok else PlaywrightTimeoutError("shown") for ok in accepted]
+    )
+    return field
+
+
+class TestTotpCode:
+    """Test cases for timing and retrying TOTP codes."""
+
+    def test_code_matches_pyotp(self):
+        """Test that codes are the standard TOTP codes for the window."""
+        clock = make_clock(3)
+        totp = TotpCode(SECRET, clock=clock)
+
+        assert totp.code() == pyotp.TOTP(SECRET).at(clock())
+        assert 26 < totp.remaining() <= 27
+
+    @pytest.mark.asyncio
+    async def test_fresh_code_is_immediate(self):
+        """Test that a code with time left is used straight away."""
+        clock = make_clock(3)
+        totp = TotpCode(SECRET, clock=clock)
+
+        started = time.monotonic()
+        code = await totp.fresh_code()
+
+        assert time.monotonic() - started < 0.05
+        assert code == pyotp.TOTP(SECRET).at(clock())
+
+    @pytest.mark.asyncio
+    async def test_fresh_code_waits_for_next_window(self):
+        """Test that a code about to expire is replaced by the next one."""
+        clock = make_clock(29.9)
+        totp = TotpCode(SECRET, clock=clock)
+        expiring = totp.code()
+
+        code = await totp.fresh_code()
+
+        assert code != expiring
+        assert totp.remaining() > 25
+        assert code == pyotp.TOTP(SECRET).at(clock())
+
+    @pytest.mark.asyncio
+    async def test_submit_accepted(self):
+        """Test that an accepted code is submitted once."""
+        totp = TotpCode(SECRET, clock=make_clock(3))
+        field, button = make_field([True]), MagicMock(click=AsyncMock())
+
+        code = await totp.submit(field, button)
+
+        field.fill.assert_called_once_with(code)
+        button.click.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_submit_retries_with_next_code(self):
+        """Test that a rejected code is retried once with the next window's."""
+        totp = TotpCode(SECRET, min_remaining=0, clock=make_clock(29.9))
+        field, button = make_field([False, True]), MagicMock(click=AsyncMock())
+
+        code = await totp.submit(field, button, confirm_timeout=0)
+
+        first, second = [call.args[0] for call in field.fill.call_args_list]
+        assert first != second == code
+        assert button.click.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_submit_gives_up_after_retry(self):
+        """Test that two rejections raise instead of retrying forever."""
+        totp = TotpCode(SECRET, min_remaining=0, clock=make_clock(29.9))
+        field, button = make_field([False, False]), MagicMock(click=AsyncMock())
+
+        with pytest.raises(RuntimeError, match="rejected twice"):
+            await totp.submit(field, button, confirm_timeout=0)
+
+    def test_secret_required(self):
+        """Test that providers without a TOTP secret fail clearly."""
+        with pytest.raises(ValueError, match="TOTP secret"):
+            TotpCode(None)
+
+    def test_invalid_secret(self):
+        """Test that a secret that is not base32 fails before any code is made."""
+        with pytest.raises(ValueError, match="not valid base32"):
+            TotpCode("test_secret")
+
+        assert TotpCode(SECRET.lower()).code()  # Case does not matter
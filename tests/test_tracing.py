@@ -0,0 +1,130 @@
+import asyncio
+import json
+
+import pytest
+
+from core import Tracer
+from core.tracing import main, percentile, read_trace, summarise
+from models import SharedState
+
+
+def read_records(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+class TestTracer:
+    """Test cases for phase timing spans."""
+
+    def test_nested_spans_inherit_provider(self, tmp_path):
+        """Test that child spans record their parent and provider."""
+        tracer = Tracer(tmp_path / "trace.jsonl")
+        with tracer.span("QScript", "login") as login:
+            with tracer.span(None, "2fa_wait", code_for="QScript"):
+                pass
+
+        wait, outer = read_records(tmp_path / "trace.jsonl")
+        assert outer["phase"] == "login" and outer["parent_id"] is None
+        assert wait["provider"] == "QScript"
+        assert wait["parent_id"] == login.span_id
+        assert wait["code_for"] == "QScript"
+        assert outer["start"] <= wait["start"] <= wait["end"] <= outer["end"]
+
+    def test_error_outcome(self, tmp_path):
+        """Test that a failing phase is recorded before the error propagates."""
+        tracer = Tracer(tmp_path / "trace.jsonl")
+        with pytest.raises(RuntimeError):
+            with tracer.span("QXR", "search"):
+                raise RuntimeError("no results table")
+
+        (record,) = read_records(tmp_path / "trace.jsonl")
+        assert record["outcome"] == "error"
+        assert record["error"] == "RuntimeError: no results table"
+
+    @pytest.mark.asyncio
+    async def test_concurrent_sessions_do_not_nest(self, tmp_path):
+        """Test that spans in separate provider tasks stay independent."""
+        tracer = Tracer(tmp_path / "trace.jsonl")
+
+        async def phase(provider):
+            with tracer.span(provider, "login"):
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(phase("QXR"), phase("QScan"))
+
+        assert [r["parent_id"] for r in read_records(tmp_path / "trace.jsonl")] == [
+            None,
+            None,
+        ]
+
+    def test_rotation_keeps_backups_readable(self, tmp_path):
+        """Test that rotated files are still included when reading a trace."""
+        path = tmp_path / "trace.jsonl"
+        tracer = Tracer(path, max_bytes=400, backup_count=10)
+        for _ in range(10):
+            with tracer.span("Medway", "login"):
+                pass
+        tracer.close()
+
+        assert (tmp_path / "trace.jsonl.1").exists()
+        assert len(list(read_trace(path))) == 10
+
+
+class TestSummary:
+    """Test cases for the trace summariser."""
+
+    def test_percentiles(self):
+        """Test nearest-rank percentiles."""
+        values = [float(n) for n in range(1, 21)]
+        assert percentile(values, 50) == 10.0
+        assert percentile(values, 95) == 19.0
+        assert percentile([3.0], 95) == 3.0
+
+    def test_summarise_groups_by_provider_and_phase(self):
+        """Test that rows are grouped and errors counted."""
+        records = [
+            {"provider": "QXR", "phase": "login", "duration": 2.0, "outcome": "ok"},
+            {"provider": "QXR", "phase": "login", "duration": 4.0, "outcome": "error"},
+            {"provider": "IMed", "phase": "search", "duration": 1.0, "outcome": "ok"},
+        ]
+
+        assert summarise(records) == [
+            ("IMed", "search", 1, 1.0, 1.0, 0),
+            ("QXR", "login", 2, 2.0, 4.0, 1),
+        ]
+
+    def test_cli_prints_table(self, tmp_path, capsys):
+        """Test that the CLI prints one row per provider phase."""
+        tracer = Tracer(tmp_path / "trace.jsonl")
+        with tracer.span("SNP", "initialize"):
+            pass
+        tracer.close()
+
+        main([str(tmp_path / "trace.jsonl")])
+
+        lines = capsys.readouterr().out.splitlines()
+        assert lines[0].startswith("Provider")
+        assert lines[1].split()[:3] == ["SNP", "initialize", "1"]
+
+
+class TestSharedStateSpans:
+    """Test cases for tracing through the shared state."""
+
+    def test_span_is_noop_without_tracer(self):
+        """Test that phases run untraced when tracing is disabled."""
+        with SharedState().span("QXR", "login") as span:
+            assert span is None
+
+    @pytest.mark.asyncio
+    async def test_2fa_wait_is_traced(self, tmp_path):
+        """Test that waiting for a code is recorded as its own phase."""
+        shared_state = SharedState(tracer=Tracer(tmp_path / "trace.jsonl"))
+        with shared_state.span("My Health Record", "login"):
+            waiter = asyncio.create_task(shared_state.wait_for_2fa("PRODA"))
+            await asyncio.sleep(0)
+            shared_state.set_2fa_code("PRODA", "123456")
+            assert await waiter == "123456"
+
+        wait, login = read_records(tmp_path / "trace.jsonl")
+        assert wait["phase"] == "2fa_wait"
+        assert wait["provider"] == "My Health Record"
+        assert wait["parent_id"] == login["span_id"]
@@ -0,0 +1,139 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+import utils
+from models import SharedState
+from utils import (
+    ClipboardTwoFactorMonitor,
+    ConsoleReader,
+    handle_input,
+    process_inputs,
+    watch_2fa_requests,
+)
+
+
+class TestConsoleInput:
+    """Test cases for the event-driven console input pipeline."""
+
+    @pytest.mark.asyncio
+    async def test_reader_delivers_lines(self, monkeypatch):
+        """Test that lines written to stdin arrive without polling."""
+        read_fd, write_fd = os.pipe()
+        monkeypatch.setattr(sys, "stdin", os.fdopen(read_fd))
+        reader = ConsoleReader()
+        reader.start()
+        try:
+            os.write(write_fd, b"1123456\nx\npartial")
+            assert await asyncio.wait_for(reader.readline(), 1) == "1123456"
+            assert await asyncio.wait_for(reader.readline(), 1) == "x"
+
+            os.close(write_fd)
+            assert await asyncio.wait_for(reader.readline(), 1) is None
+        finally:
+            reader.stop()
+            sys.stdin.close()
+
+    @pytest.mark.asyncio
+    async def test_prompts_leave_2fa_codes_to_providers(self, monkeypatch):
+        """Test that a 2FA code typed at a prompt is not taken as its answer."""
+        read_fd, write_fd = os.pipe()
+        monkeypatch.setattr(sys, "stdin", os.fdopen(read_fd))
+        monkeypatch.setattr(utils, "read_clipboard", lambda: "")
+        shared_state = SharedState()
+        console = ConsoleReader()
+        console.start()
+        inputs = asyncio.create_task(process_inputs(console, shared_state))
+        shared_state.two_fa_requests.put_nowait("QScript")
+        try:
+            answer = asyncio.create_task(
+                asyncio.to_thread(console.ask, "Enter Family Name: ")
+            )
+            while not console._prompts:
+                await asyncio.sleep(0.01)
+            os.write(write_fd, b"2654321\nSMITH\n")
+
+            assert await asyncio.wait_for(answer, 1) == "SMITH"
+            assert shared_state.two_fa_codes["QScript"] == "654321"
+        finally:
+            inputs.cancel()
+            await asyncio.gather(inputs, return_exceptions=True)
+            console.stop()
+            os.close(write_fd)
+            sys.stdin.close()
+
+    def test_quit_sets_exit(self):
+        """Test that 'x' signals every session to exit."""
+        shared_state = SharedState()
+        monitor = ClipboardTwoFactorMonitor(shared_state)
+
+        assert handle_input("X", monitor, shared_state) is False
+        assert shared_state.exit is True
+
+    @pytest.mark.asyncio
+    async def test_manual_2fa_code(self):
+        """Test that a manual code is only delivered to a waiting provider."""
+        shared_state = SharedState()
+        monitor = ClipboardTwoFactorMonitor(shared_state)
+
+        assert handle_input("2654321", monitor, shared_state) is True
+        assert "QScript" not in shared_state.two_fa_codes
+
+        monitor.add_provider("QScript")
+        handle_input("2654321", monitor, shared_state)
+        assert shared_state.two_fa_codes["QScript"] == "654321"
+        assert "QScript" not in monitor.waiting_providers
+        monitor.stop()
+
+    @pytest.mark.asyncio
+    async def test_watcher_registers_every_request(self):
+        """Test that simultaneous 2FA requests all reach the monitor."""
+        shared_state = SharedState()
+        monitor = ClipboardTwoFactorMonitor(shared_state)
+        monitor.watch = asyncio.Event().wait  # Keep the clipboard out of it
+        watcher = asyncio.create_task(watch_2fa_requests(monitor, shared_state))
+
+        shared_state.two_fa_requests.put_nowait("PRODA")
+        shared_state.two_fa_requests.put_nowait("QGov")
+        await asyncio.sleep(0)
+
+        assert monitor.waiting_providers == {"PRODA", "QGov"}
+        watcher.cancel()
+        monitor.stop()
+
+
+class TestClipboardMonitor:
+    """Test cases for clipboard 2FA detection."""
+
+    @pytest.mark.asyncio
+    async def test_detects_code_for_waiting_provider(self, monkeypatch):
+        """Test that only a changed clipboard for a waiting provider is used."""
+        clipboard = ["Your one time code is: 111111"]
+        monkeypatch.setattr(utils, "read_clipboard", lambda: clipboard[0])
+        monkeypatch.setattr(utils, "CLIPBOARD_POLL_INTERVAL", 0.01)
+        shared_state = SharedState()
+        monitor = ClipboardTwoFactorMonitor(shared_state)
+
+        monitor.add_provider("QScript")
+        await asyncio.sleep(0.03)
+        clipboard[0] = "Use verification code 222222 for QScript authentication"
+        await asyncio.wait_for(monitor._watch_task, 1)
+
+        # The stale QGov message was the baseline and QGov was not waiting
+        assert shared_state.two_fa_codes == {"QScript": "222222"}
+        assert monitor.waiting_providers == set()
+
+    def test_single_matcher_skips_providers_not_waiting(self):
+        """Test that a message matching another provider is ignored."""
+        shared_state = SharedState()
+        monitor = ClipboardTwoFactorMonitor(shared_state)
+        monitor.waiting_providers.add("PRODA")
+
+        text = "Your one time code is: 123456"
+        assert monitor.check_text(text) is False
+
+        text += " Your verification code is 654321 for Provider Digital Access"
+        assert monitor.check_text(text) is True
+        assert shared_state.two_fa_codes == {"PRODA": "654321"}
@@ -1,34 +1,47 @@
 import argparse
 import asyncio
 import json
-import queue
+import os
 import re
+import sys
 import threading
 import time
+from collections import deque
 from datetime import datetime
-from typing import Dict, Optional, Set
-
-import aioconsole
-import pyotp
-import pyperclip
-from aioconsole import ainput
-from playwright.async_api import async_playwright
-from playwright.sync_api import Playwright, expect, sync_playwright
-from pynput import keyboard
+from typing import Deque, Dict, Optional, Set
 
 from models import Credentials, SharedState
 
+# Seconds between clipboard reads while a provider is waiting for a 2FA code
+CLIPBOARD_POLL_INTERVAL = 0.5
+
+
+def read_clipboard() -> str:
+    """Current clipboard text"""
+    import pyperclip  # Imported on first use; it probes for a clipboard tool
+
+    return pyperclip.paste()
+
 
 class ClipboardTwoFactorMonitor:
     def __init__(self, shared_state: SharedState):
         self.shared_state = shared_state
         self.waiting_providers: Set[str] = set()
-        self.last_clipboard = ""
+        self.last_clipboard: Optional[str] = None
         self.patterns = {
             r"Use verification code (\d{6}) for QScript authentication": "QScript",
             r"Your verification code is (\d{6}) for Provider Digital Access": "PRODA",
             r"Your one time code is: (\d{6})": "QGov",
         }
+        # One alternation with a named group per provider, so each clipboard
+        # change is scanned once regardless of how many providers are waiting
+        self.matcher = re.compile(
+            "|".join(
+                pattern.replace("(\\d{6})", f"(?P<{provider}>\\d{{6}})", 1)
+                for pattern, provider in self.patterns.items()
+            )
+        )
+        self._watch_task: Optional[asyncio.Task] = None
 
     def add_provider(self, provider: str):
         self.waiting_providers.add(provider)
@@ -47,6 +60,10 @@ class ClipboardTwoFactorMonitor:
                 f"\nCurrently waiting for {len(self.waiting_providers)} 2FA codes from: {', '.join(self.waiting_providers)}"
             )
 
+        # Only watch the clipboard while someone is waiting for a code
+        if self._watch_task is None or self._watch_task.done():
+            self._watch_task = asyncio.get_running_loop().create_task(self.watch())
+
     def remove_provider(self, provider: str):
         if provider in self.waiting_providers:
             self.waiting_providers.discard(provider)
@@ -55,98 +72,225 @@ class ClipboardTwoFactorMonitor:
                 0, getattr(self.shared_state, "pending_2fa_count", 0) - 1
             )
 
-    def check_clipboard(self):
+    def stop(self):
+        """Stop watching the clipboard"""
+        if self._watch_task is not None:
+            self._watch_task.cancel()
+            self._watch_task = None
+
+    async def watch(self):
+        """Read the clipboard off the event loop until no provider is waiting"""
+        while self.waiting_providers:
+            await self.check_clipboard()
+            await asyncio.sleep(CLIPBOARD_POLL_INTERVAL)
+
+    async def check_clipboard(self) -> bool:
         try:
-            current_clipboard = pyperclip.paste()
-            if current_clipboard != self.last_clipboard:
-                self.last_clipboard = current_clipboard
-
-                # Check clipboard content against patterns for waiting providers
-                for pattern, provider in self.patterns.items():
-                    if provider in self.waiting_providers:
-                        match = re.search(pattern, current_clipboard)
-                        if match:
-                            code = match.group(1)  # Get the captured 6-digit code
-                            self.shared_state.set_2fa_code(provider, code)
-                            print(
-                                f"\n✓ 2FA code automatically detected for {provider}: {code}"
-                            )
-                            self.remove_provider(provider)
-
-                            # Show remaining providers if any
-                            if self.waiting_providers:
-                                print(
-                                    f"\nStill waiting for {len(self.waiting_providers)} 2FA codes from: {', '.join(self.waiting_providers)}"
-                                )
-                            return True
+            # pyperclip shells out to xclip/xsel on Linux, so keep it off the loop
+            current_clipboard = await asyncio.to_thread(read_clipboard)
         except Exception as e:
             print(f"\nError reading clipboard: {e}")
+            return False
+
+        if self.last_clipboard is None:
+            # First read is the baseline; an old message is not a new code
+            self.last_clipboard = current_clipboard
+            return False
+        if current_clipboard == self.last_clipboard:
+            return False
+        self.last_clipboard = current_clipboard
+        return self.check_text(current_clipboard)
+
+    def check_text(self, text: str) -> bool:
+        """Deliver the first code in text that belongs to a waiting provider"""
+        for match in self.matcher.finditer(text):
+            provider = match.lastgroup
+            if provider not in self.waiting_providers:
+                continue
+
+            code = match.group(provider)  # Get the captured 6-digit code
+            self.shared_state.set_2fa_code(provider, code)
+            print(f"\n✓ 2FA code automatically detected for {provider}: {code}")
+            self.remove_provider(provider)
+
+            # Show remaining providers if any
+            if self.waiting_providers:
+                print(
+                    f"\nStill waiting for {len(self.waiting_providers)} 2FA codes from: {', '.join(self.waiting_providers)}"
+                )
+            return True
         return False
 
 
-async def process_inputs(input_queue, shared_state: SharedState):
-    monitor = ClipboardTwoFactorMonitor(shared_state)
+class ConsoleReader:
+    """
+    Delivers console lines to the event loop as they are typed.
 
-    while True:
-        if not input_queue.empty():
-            user_input = input_queue.get()
+    On POSIX the stdin file descriptor is registered with the event loop, so
+    nothing runs until a line arrives. Where that is not supported (Windows
+    event loops) a daemon thread blocks on input() and hands lines over.
 
-            # Check for quit command
-            if user_input.lower() == "x":
-                print("\nReceived quit instruction...")
-                shared_state.exit = True
-                break
+    While the reader runs, prompts (such as the patient details) must go
+    through ``ask`` rather than input(), so the line consumer can keep
+    manual 2FA codes typed meanwhile out of the answers.
+    """
 
-            # Allow manual entry as fallback (e.g. 1123456)
-            match = re.match(r"^([12])(\d{6})$", user_input)
-            if match:
-                menu_num, code = match.groups()
-                provider_map = {"1": "PRODA", "2": "QScript"}
-                if menu_num in provider_map:
-                    provider = provider_map[menu_num]
-                    if provider in monitor.waiting_providers:
-                        shared_state.set_2fa_code(provider, code)
-                        print(f"\n✓ 2FA code manually entered for {provider}")
-                        monitor.remove_provider(provider)
-
-                        # Show remaining providers if any
-                        if monitor.waiting_providers:
-                            print(
-                                f"\nStill waiting for {len(monitor.waiting_providers)} 2FA codes from: {', '.join(monitor.waiting_providers)}"
-                            )
-                    else:
-                        print(
-                            f"\n⚠ No {provider} process is currently waiting for a 2FA code"
-                        )
-                        if monitor.waiting_providers:
-                            print(
-                                f"\nWaiting for codes from: {', '.join(monitor.waiting_providers)}"
-                            )
-
-        # Check if any provider is waiting for 2FA
-        if hasattr(shared_state, "new_2fa_request"):
-            provider = shared_state.new_2fa_request
-            if provider and provider not in monitor.waiting_providers:
-                monitor.add_provider(provider)
-            shared_state.new_2fa_request = None
-
-        # Check clipboard for new 2FA codes
-        monitor.check_clipboard()
-
-        await asyncio.sleep(0.1)
-
-
-def input_thread(input_queue):
-    print("Enter 'x' to quit")
-    while True:
+    def __init__(self):
+        self.lines: asyncio.Queue = asyncio.Queue()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._fd: Optional[int] = None
+        self._partial = b""
+        self._prompts: Deque[asyncio.Future] = deque()
+
+    def start(self) -> None:
+        """Begin reading stdin"""
+        self._loop = asyncio.get_running_loop()
+        print("Enter 'x' to quit")
         try:
-            user_input = input("> ")
-            input_queue.put(user_input)
-            if user_input.lower() == "x":
+            fd = sys.stdin.fileno()
+            self._loop.add_reader(fd, self._on_readable)
+            self._fd = fd
+        except (AttributeError, NotImplementedError, OSError, ValueError):
+            threading.Thread(target=self._read_blocking, daemon=True).start()
+
+    def stop(self) -> None:
+        """Stop reading so later prompts can use input() again"""
+        if self._fd is not None and self._loop is not None:
+            self._loop.remove_reader(self._fd)
+            self._fd = None
+
+    def _on_readable(self) -> None:
+        data = os.read(self._fd, 4096)
+        if not data:
+            self.stop()
+            self.lines.put_nowait(None)
+            return
+        self._partial += data
+        *lines, self._partial = self._partial.split(b"\n")
+        for line in lines:
+            self.lines.put_nowait(line.decode(errors="replace").rstrip("\r"))
+
+    def _read_blocking(self) -> None:
+        while True:
+            try:
+                line = input()
+            except EOFError:
+                line = None
+            self._loop.call_soon_threadsafe(self.lines.put_nowait, line)
+            if line is None or line.lower() == "x":
+                return
+
+    async def readline(self) -> Optional[str]:
+        """Next console line, or None at end of input"""
+        return await self.lines.get()
+
+    def ask(self, prompt: str) -> str:
+        """Drop-in for input() in worker threads, answered by ``answer``"""
+        return asyncio.run_coroutine_threadsafe(self._ask(prompt), self._loop).result()
+
+    async def _ask(self, prompt: str) -> str:
+        print(prompt, end="", flush=True)
+        answer = self._loop.create_future()
+        self._prompts.append(answer)
+        return await answer
+
+    def answer(self, line: str) -> bool:
+        """Answer the oldest open prompt with a line; False if none is open"""
+        while self._prompts:
+            prompt = self._prompts.popleft()
+            if not prompt.done():
+                prompt.set_result(line)
+                return True
+        return False
+
+    def close_prompts(self) -> None:
+        """Fail open prompts as input() would at end of input"""
+        while self._prompts:
+            prompt = self._prompts.popleft()
+            if not prompt.done():
+                prompt.set_exception(EOFError())
+
+
+# Manual 2FA entry: a provider's menu number followed by its 6 digit code
+MANUAL_2FA_PATTERN = re.compile(r"^([12])(\d{6})$")
+MANUAL_2FA_PROVIDERS = {"1": "PRODA", "2": "QScript"}
+
+
+def is_manual_2fa_code(user_input: str, monitor: ClipboardTwoFactorMonitor) -> bool:
+    """Whether a line is a manual 2FA code for a provider that is waiting"""
+    match = MANUAL_2FA_PATTERN.match(user_input)
+    return bool(
+        match and MANUAL_2FA_PROVIDERS.get(match.group(1)) in monitor.waiting_providers
+    )
+
+
+def handle_input(
+    user_input: str, monitor: ClipboardTwoFactorMonitor, shared_state: SharedState
+) -> bool:
+    """Dispatch one console command; returns False when the user quits"""
+    # Check for quit command
+    if user_input.lower() == "x":
+        print("\nReceived quit instruction...")
+        shared_state.request_exit()
+        return False
+
+    # Allow manual entry as fallback (e.g. 1123456)
+    match = MANUAL_2FA_PATTERN.match(user_input)
+    if match:
+        menu_num, code = match.groups()
+        if menu_num in MANUAL_2FA_PROVIDERS:
+            provider = MANUAL_2FA_PROVIDERS[menu_num]
+            if provider in monitor.waiting_providers:
+                shared_state.set_2fa_code(provider, code)
+                print(f"\n✓ 2FA code manually entered for {provider}")
+                monitor.remove_provider(provider)
+
+                # Show remaining providers if any
+                if monitor.waiting_providers:
+                    print(
+                        f"\nStill waiting for {len(monitor.waiting_providers)} 2FA codes from: {', '.join(monitor.waiting_providers)}"
+                    )
+            else:
+                print(f"\n⚠ No {provider} process is currently waiting for a 2FA code")
+                if monitor.waiting_providers:
+                    print(
+                        f"\nWaiting for codes from: {', '.join(monitor.waiting_providers)}"
+                    )
+    return True
+
+
+async def watch_2fa_requests(
+    monitor: ClipboardTwoFactorMonitor, shared_state: SharedState
+):
+    """Register providers asking for 2FA so the clipboard monitor watches for them"""
+    while True:
+        provider = await shared_state.two_fa_requests.get()
+        if provider not in monitor.waiting_providers:
+            monitor.add_provider(provider)
+
+
+async def process_inputs(console: ConsoleReader, shared_state: SharedState):
+    """Handle console commands as they arrive alongside 2FA code detection"""
+    monitor = ClipboardTwoFactorMonitor(shared_state)
+    watcher = asyncio.create_task(watch_2fa_requests(monitor, shared_state))
+
+    try:
+        while True:
+            user_input = await console.readline()
+            if user_input is None:
+                print("EOF encountered in input stream.")
+                console.close_prompts()
+                await watcher
+            elif not is_manual_2fa_code(user_input, monitor) and console.answer(
+                user_input
+            ):
+                continue  # An answer to a prompt, not a command
+            elif not handle_input(user_input, monitor, shared_state):
                 break
-        except EOFError:
-            print("EOF encountered in input stream.")
-            break
+    finally:
+        watcher.cancel()
+        monitor.stop()
+        console.close_prompts()
 
 
 def load_credentials(shared_state: SharedState, company: str) -> Optional[Credentials]:
@@ -169,6 +313,8 @@ def generate_2fa_code(totp_secret):
     :return: The current OTP code.
     """
     try:
+        import pyotp  # Only needed by TOTP providers
+
         # Create a TOTP object using the secret
         totp = pyotp.TOTP(totp_secret)
 